@@ -1,6 +1,11 @@
 from flask import Flask
 from flask_cors import CORS
 from config import config
+from app.services.parse_cache import ParseCache
+from app.services.disk_parse_cache import DiskParseCache
+from app.services.parse_worker_pool import ParseWorkerPool
+from app.services.strategy_worker_pool import StrategyWorkerPool
+import logging
 import os
 
 def create_app(config_name='development'):
@@ -20,6 +25,36 @@ def create_app(config_name='development'):
     if not os.path.exists(app.config['UPLOAD_FOLDER']):
         os.makedirs(app.config['UPLOAD_FOLDER'])
     
+    # Content-addressed cache of parsed uploads, shared by all requests
+    app.extensions['parse_cache'] = ParseCache(app.config.get('PARSE_CACHE_MAX_BYTES', 0))
+    
+    # Optional persistent cache so parsed scores survive backend restarts
+    app.extensions['disk_parse_cache'] = None
+    if app.config.get('PARSE_CACHE_DIR'):
+        try:
+            app.extensions['disk_parse_cache'] = DiskParseCache(
+                app.config['PARSE_CACHE_DIR'], app.config.get('PARSE_CACHE_DISK_MAX_BYTES', 0)
+            )
+        except OSError as e:
+            logging.getLogger(__name__).warning(f"Persistent parse cache disabled: {e}")
+    
+    # Uploads are parsed in warm worker processes killed when the request's
+    # deadline (REQUEST_TIMEOUT after it arrived) passes; workers are spawned
+    # on the first parse
+    app.extensions['parse_pool'] = None
+    if app.config.get('PARSE_WORKERS', 0) > 0:
+        app.extensions['parse_pool'] = ParseWorkerPool(
+            app.config['PARSE_WORKERS'], app.config.get('REQUEST_TIMEOUT', 30)
+        )
+    
+    # Arrangement strategies run side by side in warm worker processes, also
+    # spawned on first use and kept across requests
+    app.extensions['strategy_pool'] = None
+    if app.config.get('STRATEGY_WORKERS', 0) > 0:
+        app.extensions['strategy_pool'] = StrategyWorkerPool(
+            app.config['STRATEGY_WORKERS'], app.config.get('REQUEST_TIMEOUT', 30)
+        )
+    
     # Register blueprints
     from app.routes import api_bp
     app.register_blueprint(api_bp, url_prefix='/api')
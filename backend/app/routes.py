@@ -4,12 +4,18 @@ from werkzeug.utils import secure_filename
 import os
 import json
 import logging
+import time
 from io import BytesIO
 from datetime import datetime
 from app.services.file_handler import FileHandler
 from app.services.music_parser import MusicParser
 from app.services.arrangement_generator import ArrangementGenerator
+from app.services.bell_ids import BellIds
 from app.services.export_formatter import ExportFormatter
+from app.services.parse_limits import ParseLimitExceeded, ParseLimits
+from app.services.parse_worker_pool import ParseTimeout
+from app.services.strategy_worker_pool import StrategyTimeout
+from app.services.track_selection import TrackSelection
 
 # Set up logging
 logging.basicConfig(level=logging.INFO)
@@ -24,77 +30,68 @@ class APIError(Exception):
         self.code = code
         self.status_code = status_code
 
+def _name_bells(arrangements):
+    """Replace the integer bell IDs in each arrangement's assignments with note names"""
+    for arrangement in arrangements:
+        if isinstance(arrangement, dict) and 'assignments' in arrangement:
+            arrangement['assignments'] = BellIds.to_names(arrangement['assignments'])
+    return arrangements
+
 @api_bp.route('/health', methods=['GET'])
 def health():
     """Health check endpoint"""
     return jsonify({'status': 'healthy'}), 200
 
+@api_bp.route('/parse-cache', methods=['GET'])
+def parse_cache_stats():
+    """Report parse cache hit/miss/eviction counters"""
+    cache = current_app.extensions.get('parse_cache')
+    disk_cache = current_app.extensions.get('disk_parse_cache')
+    if cache is None:
+        response = {'enabled': False}
+    else:
+        response = {'enabled': cache.max_bytes > 0, **cache.stats()}
+    response['disk'] = {'enabled': True, **disk_cache.stats()} if disk_cache else {'enabled': False}
+    return jsonify(response), 200
+
 @api_bp.route('/generate-arrangements', methods=['POST'])
 def generate_arrangements():
     """Generate bell arrangements from music file and player config"""
-    filepath = None
+    deadline = _request_deadline()
     try:
-        # Validate file presence
-        if 'file' not in request.files:
-            raise APIError('No file provided', 'ERR_NO_FILE', 400)
-        
-        file = request.files['file']
-        
-        if file.filename == '':
-            raise APIError('No file selected', 'ERR_NO_FILE_SELECTED', 400)
+        # A cache_key from /api/analyze stands in for the file
+        cache_key = request.form.get('cache_key')
+        file = _uploaded_file() if not cache_key or 'file' in request.files else None
         
         # Validate players config
         if 'players' not in request.form:
             raise APIError('No player configuration provided', 'ERR_NO_PLAYERS', 400)
+        players = _parse_players()
         
-        # Parse and validate players JSON
-        try:
-            players = json.loads(request.form.get('players', '[]'))
-        except json.JSONDecodeError:
-            raise APIError('Invalid player configuration JSON', 'ERR_INVALID_JSON', 400)
-        
-        if not isinstance(players, list):
-            raise APIError('Players must be an array', 'ERR_INVALID_PLAYERS', 400)
-        
-        if len(players) < current_app.config.get('MIN_PLAYERS', 1):
-            raise APIError(f"Minimum {current_app.config.get('MIN_PLAYERS', 1)} player(s) required", 'ERR_TOO_FEW_PLAYERS', 400)
-        
-        if len(players) > current_app.config.get('MAX_PLAYERS', 20):
-            raise APIError(f"Maximum {current_app.config.get('MAX_PLAYERS', 20)} players allowed", 'ERR_TOO_MANY_PLAYERS', 400)
-        
-        # Validate player names
-        for player in players:
-            if not isinstance(player, dict):
-                raise APIError('Each player must be an object', 'ERR_INVALID_PLAYER_FORMAT', 400)
-            if 'name' not in player or not player['name']:
-                raise APIError('Each player must have a name', 'ERR_PLAYER_NO_NAME', 400)
-        
-        # Save uploaded file with UUID
-        filepath = FileHandler.save_file(file, current_app.config['UPLOAD_FOLDER'])
-        logger.info(f"File saved: {filepath}")
-        
-        # Parse music file
-        music_parser = MusicParser()
-        music_data = music_parser.parse(filepath)
+        # Parse music file (or reuse the analyzed score)
+        music_data, cache_key = _load_score(file, cache_key, deadline)
         logger.info(f"Parsed music: {music_data['note_count']} unique notes")
         
         # Generate arrangements
-        arrangement_gen = ArrangementGenerator()
-        result = arrangement_gen.generate(music_data, players)
+        arrangement_gen = ArrangementGenerator(pool=current_app.extensions.get('strategy_pool'))
+        result = arrangement_gen.generate(music_data, players, deadline=deadline)
         
         # Handle both old (list) and new (dict) return structures
         if isinstance(result, dict) and 'arrangements' in result:
-            arrangements = result['arrangements']
+            arrangements = _name_bells(result['arrangements'])
             logger.info(f"Generated {len(arrangements)} arrangements")
             
             response_data = {
                 'success': True,
                 'arrangements': arrangements,
+                'cache_key': cache_key,
                 'note_count': music_data['note_count'],
                 'melody_count': len(music_data.get('melody_pitches', [])),
                 'harmony_count': len(music_data.get('harmony_pitches', [])),
                 'best_arrangement': arrangements[0] if arrangements else None
             }
+            if 'doublings' in music_data:
+                response_data['doublings'] = music_data['doublings']
             
             # Add expansion info if applicable
             if result.get('expanded'):
@@ -109,7 +106,7 @@ def generate_arrangements():
             return jsonify(response_data), 200
         else:
             # Fallback for old return structure (just list)
-            arrangements = result if isinstance(result, list) else [result]
+            arrangements = _name_bells(result if isinstance(result, list) else [result])
             logger.info(f"Generated {len(arrangements)} arrangements")
             
             return jsonify({
@@ -121,6 +118,12 @@ def generate_arrangements():
                 'best_arrangement': arrangements[0] if arrangements else None
             }), 200
     
+    except APIError:
+        raise
+    except ParseLimitExceeded as e:
+        raise APIError(str(e), e.code, 413)
+    except (ParseTimeout, StrategyTimeout) as e:
+        raise APIError(str(e), e.code, 504)
     except ValueError as e:
         raise APIError(str(e), 'ERR_VALIDATION', 400)
     except Exception as e:
@@ -133,11 +136,114 @@ def generate_arrangements():
             raise APIError(error_msg, 'ERR_FILE_SAVE', 400)
         else:
             raise APIError('Failed to generate arrangements', 'ERR_GENERATION_FAILED', 500)
+
+@api_bp.route('/analyze', methods=['POST'])
+def analyze():
+    """Parse a score and report its metadata without generating arrangements"""
+    deadline = _request_deadline()
+    try:
+        cache_key = request.form.get('cache_key')
+        file = _uploaded_file() if not cache_key or 'file' in request.files else None
+        
+        # Players are optional; when given they refine the minimum player estimate
+        players = _parse_players(minimum=0) if 'players' in request.form else []
+        
+        music_data, cache_key = _load_score(file, cache_key, deadline)
+        
+        return jsonify({
+            'success': True,
+            'cache_key': cache_key,
+            **ArrangementGenerator.analyze(music_data, players),
+        }), 200
+    
+    except APIError:
+        raise
+    except ParseLimitExceeded as e:
+        raise APIError(str(e), e.code, 413)
+    except ParseTimeout as e:
+        raise APIError(str(e), e.code, 504)
+    except ValueError as e:
+        raise APIError(str(e), 'ERR_VALIDATION', 400)
+    except Exception as e:
+        logger.error(f"Unexpected error in analyze: {str(e)}", exc_info=True)
+        raise APIError('Failed to analyze music file', 'ERR_MUSIC_PARSE', 400)
+
+def _request_deadline():
+    """time.monotonic() by which the current request must finish (REQUEST_TIMEOUT from now)"""
+    return time.monotonic() + current_app.config.get('REQUEST_TIMEOUT', 30)
+
+def _uploaded_file():
+    """The request's uploaded score file"""
+    if 'file' not in request.files:
+        raise APIError('No file provided', 'ERR_NO_FILE', 400)
+    
+    file = request.files['file']
+    
+    if file.filename == '':
+        raise APIError('No file selected', 'ERR_NO_FILE_SELECTED', 400)
+    return file
+
+def _parse_players(minimum=None):
+    """Parse and validate the request's players JSON"""
+    try:
+        players = json.loads(request.form.get('players', '[]'))
+    except json.JSONDecodeError:
+        raise APIError('Invalid player configuration JSON', 'ERR_INVALID_JSON', 400)
+    
+    if not isinstance(players, list):
+        raise APIError('Players must be an array', 'ERR_INVALID_PLAYERS', 400)
+    
+    if minimum is None:
+        minimum = current_app.config.get('MIN_PLAYERS', 1)
+    if len(players) < minimum:
+        raise APIError(f"Minimum {minimum} player(s) required", 'ERR_TOO_FEW_PLAYERS', 400)
+    
+    if len(players) > current_app.config.get('MAX_PLAYERS', 20):
+        raise APIError(f"Maximum {current_app.config.get('MAX_PLAYERS', 20)} players allowed", 'ERR_TOO_MANY_PLAYERS', 400)
+    
+    # Validate player names
+    for player in players:
+        if not isinstance(player, dict):
+            raise APIError('Each player must be an object', 'ERR_INVALID_PLAYER_FORMAT', 400)
+        if 'name' not in player or not player['name']:
+            raise APIError('Each player must have a name', 'ERR_PLAYER_NO_NAME', 400)
+    return players
+
+def _load_score(file, cache_key=None, deadline=None):
+    """
+    Parse the request's score, or load it from the parse cache by cache_key.
+    
+    An evicted cache_key falls back to the uploaded file when there is one.
+    MIDI track/channel selection comes from the form (see TrackSelection.from_form).
+    A parse in the worker pool gets whatever is left until deadline.
+    
+    Returns:
+        (music_data, cache_key) where cache_key can be sent instead of the file later
+    """
+    music_parser = MusicParser(
+        cache=current_app.extensions.get('parse_cache'),
+        disk_cache=current_app.extensions.get('disk_parse_cache'),
+        onset_tolerance_ms=current_app.config.get('MELODY_ONSET_TOLERANCE_MS', 0),
+        limits=ParseLimits.from_config(current_app.config),
+        pool=current_app.extensions.get('parse_pool'),
+        selection=TrackSelection.from_form(request.form),
+        deadline=deadline,
+    )
+    
+    if cache_key:
+        music_data = music_parser.load_cached(cache_key)
+        if music_data is not None:
+            logger.info(f"Reusing cached score {cache_key[:24]}")
+            return music_data, cache_key
+        if file is None:
+            raise APIError('Score is no longer cached; upload the file again', 'ERR_CACHE_MISS', 404)
+    
+    # Read upload into memory; the parser consumes the bytes directly
+    filename, file_data = FileHandler.read_file(file)
+    logger.info(f"File received: {filename} ({len(file_data)} bytes)")
     
-    finally:
-        # Clean up uploaded file
-        if filepath:
-            FileHandler.delete_file(filepath)
+    music_data = music_parser.parse(filename, data=file_data)
+    return music_data, music_parser.cache_key(filename, file_data)
 
 @api_bp.errorhandler(APIError)
 def handle_api_error(error):
@@ -0,0 +1,352 @@
+"""
+Arrangement Annealer
+Simulated-annealing local search that improves a finished arrangement.
+
+The greedy strategies place each bell once and never revisit the choice.
+The annealer starts from an arrangement (the generator passes the best
+greedy one) and keeps applying random moves until its time budget runs out:
+
+    move  - a bell goes to another player's hand
+    swap  - two players exchange a bell (each takes the other's hand slot)
+    flip  - a bell changes hands within its player
+
+Moves respect the experience caps (MAX_BELLS_PER_EXPERIENCE) and the
+swap-gap feasibility used during assignment (MIN_SWAP_GAP_MS): a changed
+hand must keep every pair of its pitches that far apart, or at least not get
+tighter than it already was.  Players always keep at least one bell, and a
+player with two or more bells keeps at least one in each hand.
+
+Each move is scored with ArrangementValidator's quality objective (the
+playability, bell-fairness and fatigue-fairness components), maintained
+incrementally: a hand's swap, pressure and impossible-swap counts depend only
+on the set of pitches it holds, so they are computed once per pitch set and
+reused, and a move only re-reads the hands it touches.  Impossible swaps
+make the validator's score 0; the search sees them as a large penalty per
+swap instead, so it can climb out of a hard-failing start.
+
+The run stops after max_moves, with the cooling schedule following the move
+count, so a seeded run is repeatable.  The wall-clock budget is a safety
+limit on top; with max_moves=0 it is the only limit and the schedule follows
+the clock, so results then vary with machine load.
+"""
+
+import logging
+import math
+import random
+import time
+
+from config import Config
+from app.services.bell_ids import BellIds
+from app.services.pitch_index import PitchIndex
+
+logger = logging.getLogger(__name__)
+
+_HANDS = ('left_hand', 'right_hand')
+_IMPOSSIBLE_PENALTY = 1000  # per impossible swap; keeps any hard fail below every passing score
+_START_TEMPERATURE = 2.0
+_END_TEMPERATURE = 0.02
+
+
+class ArrangementAnnealer:
+    """Improve an arrangement by simulated annealing on the validator's quality objective"""
+
+    @staticmethod
+    def anneal(assignment, music_data, players, config=None, budget_ms=2000, max_moves=4000, seed=0):
+        """
+        Search for a better arrangement near assignment.
+
+        Args:
+            assignment: Dict mapping player names to {'bells', 'left_hand', 'right_hand'};
+                        not modified
+            music_data: Dict with parsed music info (its pitch_index is reused)
+            players: Player dicts with 'name' and 'experience' (unknown names count
+                     as intermediate, like virtual players)
+            config: Optional dict with MAX_BELLS_PER_EXPERIENCE and MIN_SWAP_GAP_MS
+            budget_ms: Wall-clock limit on the search
+            max_moves: Number of moves to make (0 to search until budget_ms runs out)
+            seed: Random seed for the move sequence
+
+        Returns:
+            Dict with 'assignment' (the best arrangement found), 'score' (its
+            objective), 'start_score', 'moves' and 'accepted'
+        """
+        index = PitchIndex.for_music_data(music_data)
+        state = _AnnealState(assignment, index, players, config or {})
+        start_score = best_score = current = state.objective()
+        best = state.snapshot()
+
+        rng = random.Random(seed)
+        budget_s = budget_ms / 1000.0
+        started = time.perf_counter()
+        moves = accepted = 0
+        temperature = _START_TEMPERATURE
+        cooling = math.log(_END_TEMPERATURE / _START_TEMPERATURE)
+
+        while state.movable() and (not max_moves or moves < max_moves):
+            if moves % 32 == 0:
+                elapsed = time.perf_counter() - started
+                if elapsed >= budget_s:
+                    if max_moves:
+                        logger.warning(f"Anneal hit its {budget_ms} ms budget after {moves} of {max_moves} moves; "
+                                       f"the result depends on machine speed")
+                    break
+                # With a move limit the schedule follows the move count, so the
+                # run is repeatable whenever the clock is not what stops it
+                progress = moves / max_moves if max_moves else elapsed / budget_s
+                temperature = _START_TEMPERATURE * math.exp(cooling * progress)
+            moves += 1
+
+            undo = state.random_move(rng)
+            if undo is None:
+                continue
+            score = state.objective()
+            if score >= current or rng.random() < math.exp((score - current) / temperature):
+                current = score
+                accepted += 1
+                if score > best_score:
+                    best_score = score
+                    best = state.snapshot()
+            else:
+                state.apply(undo)
+
+        logger.info(f"Anneal: {moves} moves ({accepted} accepted) in {(time.perf_counter() - started) * 1000:.0f} ms, "
+                    f"objective {start_score:.2f} -> {best_score:.2f}")
+        return {
+            'assignment': state.to_assignment(best),
+            'score': best_score,
+            'start_score': start_score,
+            'moves': moves,
+            'accepted': accepted,
+        }
+
+
+class _AnnealState:
+    """Mutable arrangement with incrementally maintained quality components"""
+
+    def __init__(self, assignment, index, players, config):
+        self.index = index
+        self.names = list(assignment)
+        self.extra = [
+            {k: v for k, v in data.items() if k not in ('bells',) + _HANDS}
+            for data in assignment.values()
+        ]
+        experience = {p['name']: p.get('experience', 'intermediate') for p in players}
+        caps = config.get('MAX_BELLS_PER_EXPERIENCE', Config.MAX_BELLS_PER_EXPERIENCE)
+        gaps = config.get('MIN_SWAP_GAP_MS', Config.MIN_SWAP_GAP_MS)
+        levels = [experience.get(name, 'intermediate') for name in self.names]
+        self.caps = [caps.get(level, 2) for level in levels]
+        self.min_gaps = [gaps.get(level, 1000) if isinstance(gaps, dict) else int(gaps) for level in levels]
+
+        fatigue = index.profile().fatigue if len(index) else [0.0] * 256
+        self._fatigue = fatigue
+        self._stats_cache = {}
+
+        # bells[i]: player i's bells in output order; hands[i][h]: bells on hand h
+        self.bells = []
+        self.hands = []
+        self.where = {}  # bell -> (player, hand)
+        for i, data in enumerate(assignment.values()):
+            bells = list(data.get('bells', []))
+            hand_of = {}
+            for h, key in enumerate(_HANDS):
+                for bell in data.get(key, []):
+                    hand_of[bell] = h
+            hands = ([], [])
+            for position, bell in enumerate(bells):
+                h = hand_of.get(bell, position % 2)  # the validator's parity fallback
+                hands[h].append(bell)
+                self.where[bell] = (i, h)
+            self.bells.append(bells)
+            self.hands.append(hands)
+        self.all_bells = list(self.where)
+
+        self.counts = [len(b) for b in self.bells]
+        self.player_fatigue = [self._bells_fatigue(b) for b in self.bells]
+        self.hand_stats = [[self._stats(hands[0]), self._stats(hands[1])] for hands in self.hands]
+        self.swaps = [s[0][0] + s[1][0] for s in self.hand_stats]
+        self.pressure = sum(s[h][1] for s in self.hand_stats for h in (0, 1))
+        self.impossible = sum(s[h][2] for s in self.hand_stats for h in (0, 1))
+        self.over_swaps = sum(max(0, s - 5) * 4 for s in self.swaps)
+
+    # -- scoring -----------------------------------------------------------
+
+    def _pitch(self, bell):
+        pitch = BellIds.normalize(bell)
+        return pitch if isinstance(pitch, int) and self.index.count(pitch) else None
+
+    def _bells_fatigue(self, bells):
+        pitches = {self._pitch(b) for b in bells}
+        pitches.discard(None)
+        return sum(self._fatigue[p] for p in pitches)
+
+    def _stats(self, hand):
+        """(swaps, pressure events, impossible swaps, tightest pair gap) of a hand's pitch set"""
+        pitches = frozenset(p for p in map(self._pitch, hand) if p is not None)
+        stats = self._stats_cache.get(pitches)
+        if stats is None:
+            stats = self._stats_cache[pitches] = self._compute_stats(pitches)
+        return stats
+
+    def _compute_stats(self, pitches):
+        """Same per-hand counts as ArrangementValidator._calculate_playability_score"""
+        swaps = pressure = impossible = 0
+        min_gap = float('inf')
+        if len(pitches) > 1:
+            idx = self.index.note_indices(pitches)
+            notes = self.index.notes
+            sequence = notes.pitch[idx]
+            changed = sequence[1:] != sequence[:-1]
+            swap_gaps = notes.start_ms[idx[1:]][changed] - notes.end_ms[idx[:-1]][changed]
+            swaps = int(changed.sum())
+            pressure = int((swap_gaps < 1000).sum())
+            impossible = int((swap_gaps < Config.IMPOSSIBLE_SWAP_GAP_MS).sum())
+            ordered = sorted(pitches)
+            for i, a in enumerate(ordered):
+                for b in ordered[i + 1:]:
+                    min_gap = min(min_gap, self.index.min_gap_ms(a, b))
+        return swaps, pressure, impossible, min_gap
+
+    def objective(self):
+        """The validator's final score before rounding, with impossible swaps as a penalty"""
+        counts = self.counts
+        below_two = sum(1 for c in counts if c < 2)
+        spread = max(counts) - min(counts) if counts else 0
+        bell_fairness = max(0, 30 - min(20, below_two * 8) - (0 if spread <= 1 else min(18, (spread - 1) * 6)))
+
+        if self.impossible:
+            return bell_fairness + self._fatigue_fairness() - _IMPOSSIBLE_PENALTY * self.impossible
+        playability = max(0, 50 - min(24, self.over_swaps) - min(20, self.pressure * 1.5))
+        return playability + bell_fairness + self._fatigue_fairness()
+
+    def _fatigue_fairness(self):
+        values = self.player_fatigue
+        if not values or max(values) == 0:
+            return 20
+        n = len(values)
+        mean = sum(values) / n
+        if mean <= 0:
+            return 20
+        cv = math.sqrt(sum((v - mean) ** 2 for v in values) / n) / mean
+        score = 20 * max(0, 1 - min(cv, 1.0))
+        ordered = sorted(values)
+        median = ordered[n // 2] if n % 2 else (ordered[n // 2 - 1] + ordered[n // 2]) / 2
+        if median > 0:
+            ratio = ordered[-1] / median
+            if ratio > 2.0:
+                score -= min(8, (ratio - 2.0) * 4)
+        return max(0, min(20, score))
+
+    # -- moves -------------------------------------------------------------
+
+    def movable(self):
+        return len(self.all_bells) > 0 and len(self.names) > 0
+
+    def random_move(self, rng):
+        """Apply one random feasible move; returns its undo, or None if none was applied"""
+        kind = rng.random()
+        bell = rng.choice(self.all_bells)
+        player, hand = self.where[bell]
+
+        if kind < 1 / 3:  # flip
+            changes = [(bell, player, 1 - hand)]
+        elif kind < 2 / 3:  # move
+            if len(self.names) < 2 or self.counts[player] < 2:
+                return None
+            target = rng.randrange(len(self.names) - 1)
+            target += target >= player
+            if self.counts[target] >= self.caps[target]:
+                return None
+            changes = [(bell, target, rng.randrange(2))]
+        else:  # swap
+            other = rng.choice(self.all_bells)
+            other_player, other_hand = self.where[other]
+            if other_player == player:
+                return None
+            changes = [(bell, other_player, other_hand), (other, player, hand)]
+
+        if not self._feasible(changes):
+            return None
+        return self.apply(changes)
+
+    def _feasible(self, changes):
+        """
+        True if every hand the changes touch stays swap-gap feasible (or gets no
+        tighter), and no player with more than one bell is left with an empty
+        hand unless they already had one (the validator warns about those).
+        """
+        hands = {}
+        for bell, player, hand in changes:
+            src = self.where[bell]
+            hands.setdefault(src, list(self.hands[src[0]][src[1]])).remove(bell)
+            hands.setdefault((player, hand), list(self.hands[player][hand])).append(bell)
+        for (player, hand), bells in hands.items():
+            gap = self._stats(bells)[3]
+            if gap < self.min_gaps[player] and gap < self.hand_stats[player][hand][3]:
+                return False
+        for player in {p for p, _ in hands}:
+            sizes = [len(hands[(player, h)]) if (player, h) in hands else len(self.hands[player][h]) for h in (0, 1)]
+            if sum(sizes) > 1 and 0 in sizes and self._balanced(player):
+                return False
+        return True
+
+    def _balanced(self, player):
+        """True if the player holds at most one bell or has bells in both hands"""
+        left, right = self.hands[player]
+        return len(left) + len(right) <= 1 or bool(left and right)
+
+    def apply(self, changes):
+        """
+        Move bells into place and return the changes that undo it.
+
+        Each change is (bell, player, hand), optionally with the positions to
+        insert at in the player's bells and the hand; undo changes carry the
+        positions the bells came from, so undoing restores the exact order.
+        """
+        undo = []
+        touched = set()
+        for bell, player, hand, *positions in changes:
+            bell_pos, hand_pos = positions or (None, None)
+            src_player, src_hand = self.where[bell]
+            src_list = self.hands[src_player][src_hand]
+            src_hand_pos = src_list.index(bell)
+            del src_list[src_hand_pos]
+            src_bell_pos = None
+            if src_player != player:
+                src_bell_pos = self.bells[src_player].index(bell)
+                del self.bells[src_player][src_bell_pos]
+                self.bells[player].insert(len(self.bells[player]) if bell_pos is None else bell_pos, bell)
+                self.counts[src_player] -= 1
+                self.counts[player] += 1
+            hand_list = self.hands[player][hand]
+            hand_list.insert(len(hand_list) if hand_pos is None else hand_pos, bell)
+            self.where[bell] = (player, hand)
+            undo.append((bell, src_player, src_hand, src_bell_pos, src_hand_pos))
+            touched.add((src_player, src_hand))
+            touched.add((player, hand))
+
+        players = {p for p, _ in touched}
+        for player in players:
+            self.player_fatigue[player] = self._bells_fatigue(self.bells[player])
+        for player, hand in touched:
+            old = self.hand_stats[player][hand]
+            new = self.hand_stats[player][hand] = self._stats(self.hands[player][hand])
+            self.pressure += new[1] - old[1]
+            self.impossible += new[2] - old[2]
+        for player in players:
+            old_over = max(0, self.swaps[player] - 5) * 4
+            stats = self.hand_stats[player]
+            self.swaps[player] = stats[0][0] + stats[1][0]
+            self.over_swaps += max(0, self.swaps[player] - 5) * 4 - old_over
+        undo.reverse()
+        return undo
+
+    # -- output ------------------------------------------------------------
+
+    def snapshot(self):
+        return [(list(bells), list(hands[0]), list(hands[1])) for bells, hands in zip(self.bells, self.hands)]
+
+    def to_assignment(self, snapshot):
+        return {
+            name: {**extra, 'bells': bells, 'left_hand': left, 'right_hand': right}
+            for name, extra, (bells, left, right) in zip(self.names, self.extra, snapshot)
+        }
@@ -1,29 +1,45 @@
 from app.services.bell_assignment import BellAssignmentAlgorithm
-from app.services.music_parser import MusicParser
+from app.services.bell_ids import BellIds
 from app.services.conflict_resolver import ConflictResolver
 from app.services.arrangement_validator import ArrangementValidator
+from app.services.arrangement_annealer import ArrangementAnnealer
 from app.services.swap_counter import SwapCounter
+from app.services.pitch_index import PitchIndex
 from app.services.simulation_builder import SimulationBuilder
+from app.services.strategy_worker_pool import StrategyTimeout
 from flask import current_app
 import logging
+import time
 
 logger = logging.getLogger(__name__)
 
 class ArrangementGenerator:
     """Generate bell arrangements based on music data and player configuration"""
     
-    def generate(self, music_data, players):
+    def __init__(self, pool=None):
+        """
+        Args:
+            pool: Optional StrategyWorkerPool; the strategies then run side by side
+                  in its worker processes instead of one after another here
+        """
+        self.pool = pool
+
+    def generate(self, music_data, players, deadline=None):
         """Generate multiple arrangement options with validation
         
         Args:
             music_data: Dict with parsed music info including melody/harmony
             players: List of player dicts with 'name' and 'experience'
+            deadline: Optional time.monotonic() at which the request gives up; the
+                      strategies get what is left, and the anneal pass is skipped
+                      when less than ANNEAL_BUDGET_MS remains
             
         Returns:
             Dict with 'arrangements' list, 'expanded' flag, and 'minimum_players' recommendation
             
         Raises:
             ValueError: If validation fails
+            StrategyTimeout: If the strategies do not finish before the deadline
         """
         
         if not music_data or 'unique_notes' not in music_data:
@@ -35,13 +51,13 @@ class ArrangementGenerator:
         if not music_data['unique_notes']:
             raise ValueError("No notes found in music file")
         
-        # Convert MIDI pitches to note names
-        unique_notes = [MusicParser.pitch_to_note_name(p) for p in music_data['unique_notes']]
+        # Bells are identified by MIDI pitch throughout; routes.py names them for the response
+        unique_notes = list(music_data['unique_notes'])
         
         # Prioritize melody notes if available
         melody_notes = []
         if music_data.get('melody_pitches'):
-            melody_notes = [MusicParser.pitch_to_note_name(p) for p in music_data['melody_pitches']]
+            melody_notes = list(music_data['melody_pitches'])
         
         logger.info(f"Generating arrangements for {len(unique_notes)} unique notes with {len(players)} players")
         
@@ -58,6 +74,28 @@ class ArrangementGenerator:
             players_expanded = True
             logger.info(f"Expanded to {len(expanded_players)} total players (added {len(expanded_players) - len(players)} virtual players)")
         
+        # Pitch index over the note timings, its per-pitch profile and the
+        # strategy config are computed once and shared by every strategy
+        pitch_index = PitchIndex.for_music_data(music_data)
+        note_frequencies = self._note_frequencies(pitch_index)
+        config = {
+            'MAX_BELLS_PER_PLAYER': current_app.config.get('MAX_BELLS_PER_PLAYER', 8),
+            'MAX_BELLS_PER_EXPERIENCE': current_app.config.get('MAX_BELLS_PER_EXPERIENCE', {
+                'experienced': 5,
+                'intermediate': 3,
+                'beginner': 2
+            }),
+            'MIN_SWAP_GAP_MS': current_app.config.get('MIN_SWAP_GAP_MS', {
+                'experienced': 500,
+                'intermediate': 1000,
+                'beginner': 2000,
+            }),
+            'TEMPO_BPM': music_data.get('tempo', 120),
+            'TICKS_PER_BEAT': music_data.get('ticks_per_beat', 480),
+            'MUSIC_FORMAT': music_data.get('format', 'midi'),
+            'TEMPO_MAP': music_data.get('tempo_map'),
+        }
+        
         # Generate multiple arrangements with different strategies
         arrangements = []
         strategies = [
@@ -68,100 +106,76 @@ class ArrangementGenerator:
             ('activity_snake', 'Balance active play time with snake distribution'),
         ]
         
-        for strategy, description in strategies:
-            try:
-                # Build config dict from Flask config
-                config = {
-                    'MAX_BELLS_PER_PLAYER': current_app.config.get('MAX_BELLS_PER_PLAYER', 8),
-                    'MAX_BELLS_PER_EXPERIENCE': current_app.config.get('MAX_BELLS_PER_EXPERIENCE', {
-                        'experienced': 5,
-                        'intermediate': 3,
-                        'beginner': 2
-                    }),
-                    'MIN_SWAP_GAP_MS': current_app.config.get('MIN_SWAP_GAP_MS', {
-                        'experienced': 500,
-                        'intermediate': 1000,
-                        'beginner': 2000,
-                    }),
-                    'TEMPO_BPM': music_data.get('tempo', 120),
-                    'TICKS_PER_BEAT': music_data.get('ticks_per_beat', 480),
-                    'MUSIC_FORMAT': music_data.get('format', 'midi'),
-                }
-                
-                # Build frequency map from note data
-                note_frequencies = {}
-                if music_data.get('notes'):
-                    for note in music_data['notes']:
-                        note_pitch = note.get('pitch')
-                        if note_pitch:
-                            note_name = MusicParser.pitch_to_note_name(note_pitch)
-                            note_frequencies[note_name] = note_frequencies.get(note_name, 0) + 1
-                
-                assignment = BellAssignmentAlgorithm.assign_bells(
-                    unique_notes, 
-                    expanded_players,  # Use expanded players if needed
-                    strategy=strategy,
-                    priority_notes=melody_notes,
-                    config=config,
-                    note_timings=music_data.get('notes'),  # Pass note timing data
-                    note_frequencies=note_frequencies  # Pass frequency data
-                )
-                
-                # Resolve any conflicts
-                assignment = ConflictResolver.resolve_duplicates(assignment)
-                assignment = ConflictResolver.balance_assignments(assignment)
-                assignment = ConflictResolver.optimize_for_experience(assignment, expanded_players)
-
-                # Trim players with 0 bells and cap players with fewer than 2 bells to at most 1
-                assignment, trimmed_original_count = self._trim_players(assignment, players)
-                arrangement_player_count = len(assignment)
-
-                # Recompute expansion signals based on the post-trim assignment size.
-                # This avoids incorrectly marking the result as expanded when swap-gap
-                # fallback virtual players were added but later trimmed away.
-                if arrangement_player_count > len(players):
-                    players_expanded = True
-                    if minimum_required_players is None or arrangement_player_count > minimum_required_players:
-                        minimum_required_players = arrangement_player_count
-
-                # Validate arrangement (including hand constraints)
-                validation = ArrangementValidator.validate(assignment)
-                sustainability = ArrangementValidator.sustainability_check(assignment, music_data)
-                quality_breakdown = ArrangementValidator.calculate_quality_breakdown(assignment, music_data)
-                quality_score = quality_breakdown.get('final_score', 0)
-                
-                # Calculate actual swaps for each player based on note sequence
-                swap_counts = SwapCounter.calculate_swaps_for_arrangement(assignment, music_data)
-
+        # Everything a strategy reads; a pool sends it to each of its workers once
+        context = {
+            'music_data': music_data,
+            'players': players,
+            'expanded_players': expanded_players,
+            'unique_notes': unique_notes,
+            'melody_notes': melody_notes,
+            'config': config,
+            'pitch_index': pitch_index,
+            'note_frequencies': note_frequencies,
+        }
+        if self.pool is not None:
+            results = self.pool.run(context, strategies, deadline=deadline)
+        else:
+            results = []
+            for strategy, description in strategies:
+                # A strategy running here cannot be interrupted, so check between them
+                if deadline is not None and time.monotonic() >= deadline:
+                    raise StrategyTimeout("Generating arrangements did not finish before the request deadline")
                 try:
-                    simulation = SimulationBuilder.build(music_data, assignment)
-                except Exception as sim_err:
-                    logger.warning(f"Failed to build simulation for {strategy}: {sim_err}")
-                    simulation = None
+                    results.append(('ok', self.run_strategy(context, strategy, description)))
+                except Exception as e:
+                    results.append(('error', e))
+        
+        for (strategy, _), (status, result) in zip(strategies, results):
+            if status == 'error':
+                logger.warning(f"Failed to generate {strategy} arrangement: {str(result)}")
+                continue
+            arrangement = result
+            arrangement_player_count = arrangement['players']
 
-                arrangements.append({
-                    'strategy': strategy,
-                    'description': description,
-                    'assignments': assignment,
-                    'swaps': swap_counts,  # New: actual swap counts per player
-                    'simulation': simulation,
-                    'validation': validation,
-                    'sustainability': sustainability,
-                    'quality_score': quality_score,
-                    'quality_breakdown': quality_breakdown,
-                    'note_count': len(unique_notes),
-                    'melody_count': len(melody_notes),
-                    'players': arrangement_player_count,
-                    'trimmed_count': trimmed_original_count,
-                })
-                
-                logger.info(f"✓ Generated {strategy} arrangement (score: {quality_score:.0f})")
-                
-            except Exception as e:
-                logger.warning(f"Failed to generate {strategy} arrangement: {str(e)}")
+            # Recompute expansion signals based on the post-trim assignment size.
+            # This avoids incorrectly marking the result as expanded when swap-gap
+            # fallback virtual players were added but later trimmed away.
+            if arrangement_player_count > len(players):
+                players_expanded = True
+                if minimum_required_players is None or arrangement_player_count > minimum_required_players:
+                    minimum_required_players = arrangement_player_count
+
+            arrangements.append(arrangement)
+            logger.info(f"✓ Generated {strategy} arrangement (score: {arrangement['quality_score']:.0f})")
         
         if not arrangements:
             raise Exception("Failed to generate any arrangements")
+
+        # Local search from the best greedy arrangement: a fixed number of seeded moves,
+        # with a wall-clock budget as a safety limit.  Skipped rather than cut short when
+        # the request has less than the budget left, so its result stays repeatable
+        budget_ms = current_app.config.get('ANNEAL_BUDGET_MS', 0)
+        if budget_ms > 0 and deadline is not None and (deadline - time.monotonic()) * 1000 < budget_ms:
+            logger.info(f"Skipping anneal pass: less than {budget_ms} ms left before the request deadline")
+            budget_ms = 0
+        if budget_ms > 0:
+            start = max(arrangements, key=lambda a: a['quality_score'])
+            try:
+                result = ArrangementAnnealer.anneal(
+                    start['assignments'], music_data, expanded_players, config,
+                    budget_ms=budget_ms,
+                    max_moves=current_app.config.get('ANNEAL_MAX_MOVES', 4000),
+                )
+                arrangement = self._finish_arrangement(
+                    'anneal', f"Local search from the {start['strategy']} arrangement (simulated annealing)",
+                    result['assignment'], music_data,
+                    len(unique_notes), len(melody_notes), start['trimmed_count'],
+                )
+                arrangements.append(arrangement)
+                logger.info(f"✓ Generated anneal arrangement (score: {arrangement['quality_score']:.0f}, "
+                            f"{result['moves']} moves)")
+            except Exception as e:
+                logger.warning(f"Failed to generate anneal arrangement: {str(e)}")
         
         # Sort by quality score (descending)
         arrangements.sort(key=lambda a: a['quality_score'], reverse=True)
@@ -176,6 +190,142 @@ class ArrangementGenerator:
             'final_player_count': arrangements[0]['players']
         }
     
+    @staticmethod
+    def run_strategy(context, strategy, description):
+        """
+        Run one strategy's pipeline: assignment, conflict resolution, trimming and scoring.
+
+        Args:
+            context: Dict built once per generate() call with music_data, players,
+                     expanded_players, unique_notes, melody_notes, config, pitch_index
+                     and note_frequencies
+            strategy: Strategy name for BellAssignmentAlgorithm.assign_bells
+            description: Description shown with the arrangement
+
+        Returns:
+            Arrangement dict (its 'players' is the post-trim player count)
+        """
+        assignment = BellAssignmentAlgorithm.assign_bells(
+            context['unique_notes'],
+            context['expanded_players'],  # Use expanded players if needed
+            strategy=strategy,
+            priority_notes=context['melody_notes'],
+            config=context['config'],
+            pitch_index=context['pitch_index'],  # Pass note timing data
+            note_frequencies=context['note_frequencies']  # Pass frequency data
+        )
+
+        # Resolve any conflicts
+        assignment = ConflictResolver.resolve_duplicates(assignment)
+        assignment = ConflictResolver.balance_assignments(assignment)
+        assignment = ConflictResolver.optimize_for_experience(assignment, context['expanded_players'])
+
+        # Trim players with 0 bells and cap players with fewer than 2 bells to at most 1
+        assignment, trimmed_original_count = ArrangementGenerator._trim_players(assignment, context['players'])
+
+        return ArrangementGenerator._finish_arrangement(
+            strategy, description, assignment, context['music_data'],
+            len(context['unique_notes']), len(context['melody_notes']), trimmed_original_count,
+        )
+
+    @staticmethod
+    def _finish_arrangement(strategy, description, assignment, music_data, note_count, melody_count, trimmed_count):
+        """Validate and score a final assignment and build its arrangement entry"""
+        # Validate arrangement (including hand constraints)
+        validation = ArrangementValidator.validate(assignment)
+        sustainability = ArrangementValidator.sustainability_check(assignment, music_data)
+        quality_breakdown = ArrangementValidator.calculate_quality_breakdown(assignment, music_data)
+        quality_score = quality_breakdown.get('final_score', 0)
+
+        # Calculate actual swaps for each player based on note sequence
+        swap_counts = SwapCounter.calculate_swaps_for_arrangement(assignment, music_data)
+
+        try:
+            simulation = SimulationBuilder.build(music_data, assignment)
+        except Exception as sim_err:
+            logger.warning(f"Failed to build simulation for {strategy}: {sim_err}")
+            simulation = None
+
+        return {
+            'strategy': strategy,
+            'description': description,
+            'assignments': assignment,
+            'swaps': swap_counts,  # New: actual swap counts per player
+            'simulation': simulation,
+            'validation': validation,
+            'sustainability': sustainability,
+            'quality_score': quality_score,
+            'quality_breakdown': quality_breakdown,
+            'note_count': note_count,
+            'melody_count': melody_count,
+            'players': len(assignment),
+            'trimmed_count': trimmed_count,
+        }
+
+    @staticmethod
+    def analyze(music_data, players=None):
+        """Summarize a parsed score without generating arrangements
+        
+        Covers what the UI needs to size the player list: the score's pitches
+        and range, its length, and the minimum player count for those pitches.
+        
+        Args:
+            music_data: Dict with parsed music info
+            players: Optional list of player dicts; the minimum player estimate
+                     builds on them (virtual intermediate players fill the gap)
+            
+        Returns:
+            Dict of score metadata and per-pitch statistics from the MusicProfile
+        """
+        players = players or []
+        pitch_index = PitchIndex.for_music_data(music_data)
+        profile = pitch_index.profile()
+        unique_notes = sorted(music_data.get('unique_notes') or [])
+        
+        pitch_range = None
+        if unique_notes:
+            lowest, highest = min(unique_notes), max(unique_notes)
+            pitch_range = {
+                'lowest': lowest,
+                'highest': highest,
+                'lowest_name': BellIds.name(lowest),
+                'highest_name': BellIds.name(highest),
+                'semitones': highest - lowest,
+            }
+        
+        notes = pitch_index.notes
+        summary = {
+            'format': music_data.get('format', 'midi'),
+            'tempo': music_data.get('tempo', 120),
+            'unique_pitches': unique_notes,
+            'unique_notes': [BellIds.name(p) for p in unique_notes],
+            'note_count': len(unique_notes),
+            'range': pitch_range,
+            'duration_ms': int(round(float(notes.end_ms.max()))) if len(notes) else 0,
+            'event_count': music_data.get('total_note_events', len(notes)),
+            'melody_count': len(music_data.get('melody_pitches', [])),
+            'harmony_count': len(music_data.get('harmony_pitches', [])),
+            'player_capacity': ArrangementGenerator._calculate_total_capacity(players),
+            'minimum_players': ArrangementGenerator._calculate_minimum_players_needed(unique_notes, players),
+            'pitches': [
+                {'pitch': p, 'name': BellIds.name(p), **profile.stats(p)}
+                for p in profile.pitches
+            ],
+        }
+        if 'doublings' in music_data:
+            summary['doublings'] = music_data['doublings']
+        return summary
+    
+    @staticmethod
+    def _note_frequencies(pitch_index):
+        """Map pitches to how often they are played (from the score's profile)"""
+        counts = pitch_index.profile().count
+        return {
+            pitch: counts[pitch]
+            for pitch in pitch_index.pitches
+            if pitch
+        }
+    
     @staticmethod
     def _calculate_total_capacity(players):
         """Calculate total bell capacity based on player experience levels.
@@ -7,6 +7,8 @@ import logging
 import statistics
 
 from config import Config
+from app.services.bell_ids import BellIds
+from app.services.pitch_index import PitchIndex
 
 logger = logging.getLogger(__name__)
 
@@ -70,7 +72,7 @@ class ArrangementValidator:
             seen.add(bell)
         
         if duplicates:
-            issues.append(f"Duplicate bells assigned: {', '.join(set(duplicates))}")
+            issues.append(f"Duplicate bells assigned: {', '.join(BellIds.name(b) for b in set(duplicates))}")
         
         # Calculate utilization
         total_bells = sum(len(player_data.get('bells', [])) for player_data in arrangement.values())
@@ -209,25 +211,16 @@ class ArrangementValidator:
         if not expected:
             return 0
 
-        from app.services.music_parser import MusicParser
-
-        expected_names = set()
-        for note in expected:
-            if isinstance(note, int):
-                expected_names.add(MusicParser.pitch_to_note_name(note))
-            else:
-                expected_names.add(str(note))
-
-        if not expected_names:
-            return 0
+        # Compare bell IDs so pitches and note names match each other
+        expected_ids = {BellIds.normalize(note) for note in expected}
 
         assigned = {
-            bell
+            BellIds.normalize(bell)
             for player_data in arrangement.values()
             for bell in player_data.get('bells', [])
         }
 
-        return len(expected_names - assigned)
+        return len(expected_ids - assigned)
 
     @staticmethod
     def _calculate_bell_fairness_score(arrangement):
@@ -268,46 +261,23 @@ class ArrangementValidator:
                 'hand_load_pressure_events': 0, 'over_swap_penalty': 0, 'hand_pressure_penalty': 0
             }
 
-        from app.services.music_parser import MusicParser
-
-        notes = music_data.get('notes', [])
-        if not notes:
+        index = PitchIndex.for_music_data(music_data)
+        notes = index.notes
+        if not len(notes):
             return {
                 'score': 50, 'impossible_swaps': 0, 'players_over_five_swaps': [],
                 'hand_load_pressure_events': 0, 'over_swap_penalty': 0, 'hand_pressure_penalty': 0
             }
 
-        def to_ms(raw):
-            fmt = music_data.get('format', 'midi')
-            tempo = max(music_data.get('tempo', 120), 1)
-            ticks_per_beat = max(music_data.get('ticks_per_beat', 480), 1)
-            if fmt == 'midi':
-                return raw / ticks_per_beat * (60000.0 / tempo)
-            return raw * (60000.0 / tempo)
-
         total_pressure_events = 0
         impossible_swaps = 0
         swap_counts = []
         players_over_five_swaps = []
 
-        # Pre-index note timing data by note name once (O(notes)) to avoid an
-        # O(players × notes) inner loop.  Hand assignment is applied per-player
-        # below because each player has a different hand map.
-        notes_by_name = {}
-        for n in notes:
-            pitch = n.get('pitch')
-            if pitch is None:
-                continue
-            note_name = MusicParser.pitch_to_note_name(pitch)
-            start_ms = to_ms(n.get('time', n.get('offset', 0)))
-            dur_ms = to_ms(n.get('duration', 0))
-            if note_name not in notes_by_name:
-                notes_by_name[note_name] = []
-            notes_by_name[note_name].append({
-                'start_ms': start_ms,
-                'end_ms': start_ms + dur_ms,
-                'bell': note_name,
-            })
+        # Per player the notes come from the shared pitch index, merged back
+        # into time order.
+        start_ms = notes.start_ms
+        end_ms = notes.end_ms
 
         for player_name, player_data in arrangement.items():
             bells = player_data.get('bells', [])
@@ -323,27 +293,24 @@ class ArrangementValidator:
                 if bell not in hand_map:
                     hand_map[bell] = 'left' if idx % 2 == 0 else 'right'
 
-            player_events = []
+            hand_pitches = {'left': [], 'right': []}
             for bell in set(bells):
-                hand = hand_map.get(bell, 'left')
-                for ev in notes_by_name.get(bell, []):
-                    player_events.append({**ev, 'hand': hand})
+                pitch = BellIds.normalize(bell)
+                if isinstance(pitch, int) and index.count(pitch):
+                    hand_pitches[hand_map.get(bell, 'left')].append(pitch)
 
-            player_events.sort(key=lambda e: e['start_ms'])
-            last_by_hand = {'left': None, 'right': None}
+            # Consecutive notes on the same hand with different bells are swaps
             player_bell_swaps = 0
-
-            for ev in player_events:
-                prev = last_by_hand[ev['hand']]
-                if prev is not None:
-                    if ev['bell'] != prev['bell']:
-                        player_bell_swaps += 1
-                        swap_gap = ev['start_ms'] - prev['end_ms']
-                        if swap_gap < pressure_gap_ms:
-                            total_pressure_events += 1
-                        if swap_gap < Config.IMPOSSIBLE_SWAP_GAP_MS:
-                            impossible_swaps += 1
-                last_by_hand[ev['hand']] = ev
+            for pitches in hand_pitches.values():
+                idx = index.note_indices(pitches)
+                if len(idx) < 2:
+                    continue
+                hand_sequence = notes.pitch[idx]
+                changed = hand_sequence[1:] != hand_sequence[:-1]
+                swap_gaps = start_ms[idx[1:]][changed] - end_ms[idx[:-1]][changed]
+                player_bell_swaps += int(changed.sum())
+                total_pressure_events += int((swap_gaps < pressure_gap_ms).sum())
+                impossible_swaps += int((swap_gaps < Config.IMPOSSIBLE_SWAP_GAP_MS).sum())
 
             swap_counts.append(player_bell_swaps)
             if player_bell_swaps > 5:
@@ -383,34 +350,14 @@ class ArrangementValidator:
         if not music_data or not music_data.get('notes'):
             return {'score': 20, 'cv': 0.0, 'max_to_median_ratio': 1.0, 'ratio_penalty': 0.0}
 
-        from app.services.music_parser import MusicParser
-        from app.services.simulation_builder import SimulationBuilder
-
-        notes = music_data.get('notes', [])
-        if not notes:
+        index = PitchIndex.for_music_data(music_data)
+        if not len(index):
             return {'score': 20, 'cv': 0.0, 'max_to_median_ratio': 1.0, 'ratio_penalty': 0.0}
 
-        def to_ms(raw):
-            fmt = music_data.get('format', 'midi')
-            tempo = max(music_data.get('tempo', 120), 1)
-            ticks_per_beat = max(music_data.get('ticks_per_beat', 480), 1)
-            if fmt == 'midi':
-                return raw / ticks_per_beat * (60000.0 / tempo)
-            return raw * (60000.0 / tempo)
-
-        # Pre-index fatigue contribution per note name (duration_ms * weight_oz, summed across all occurrences).
-        # This avoids an O(players × notes) loop by scanning notes only once.
-        pitch_to_weight_oz = {}  # pitch -> wt_oz (cached)
-        note_fatigue = {}   # note_name -> cumulative (dur_ms * wt_oz)
-        for n in notes:
-            pitch = n.get('pitch')
-            if pitch is None:
-                continue
-            note_name = MusicParser.pitch_to_note_name(pitch)
-            if pitch not in pitch_to_weight_oz:
-                pitch_to_weight_oz[pitch] = SimulationBuilder.get_bell_weight_oz(pitch)
-            dur_ms = to_ms(n.get('duration', 0))
-            note_fatigue[note_name] = note_fatigue.get(note_name, 0.0) + dur_ms * pitch_to_weight_oz[pitch]
+        # Fatigue contribution per pitch (duration_ms * weight_oz, summed across all
+        # occurrences) from the score's shared profile
+        per_pitch = index.profile().fatigue
+        note_fatigue = {pitch: per_pitch[pitch] for pitch in index.pitches}
 
         fatigue_values = []
         for player_data in arrangement.values():
@@ -419,7 +366,7 @@ class ArrangementValidator:
                 fatigue_values.append(0.0)
                 continue
             unique_bells = set(bells)
-            fatigue_values.append(sum(note_fatigue.get(bell, 0.0) for bell in unique_bells))
+            fatigue_values.append(sum(note_fatigue.get(BellIds.normalize(bell), 0.0) for bell in unique_bells))
 
         if not fatigue_values or max(fatigue_values) == 0:
             return {'score': 20, 'cv': 0.0, 'max_to_median_ratio': 1.0, 'ratio_penalty': 0.0}
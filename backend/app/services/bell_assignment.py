@@ -1,5 +1,8 @@
 import logging
-from app.services.music_parser import MusicParser
+from app.services.bell_ids import BellIds
+from app.services.hand_state import HandState
+from app.services.note_table import NoteTable
+from app.services.pitch_index import PitchIndex
 
 logger = logging.getLogger(__name__)
 
@@ -7,19 +10,25 @@ class BellAssignmentAlgorithm:
     """Implements the bell assignment algorithm with multi-bell support"""
     
     @staticmethod
-    def assign_bells(notes, players, strategy='experienced_first', priority_notes=None, config=None, note_timings=None, note_frequencies=None):
+    def assign_bells(notes, players, strategy='experienced_first', priority_notes=None, config=None, note_timings=None, note_frequencies=None, pitch_index=None):
         """
         Assign bells to players based on strategy, supporting multiple bells per player.
         
         Args:
-            notes: List of unique note names (e.g., ['C4', 'D4', 'E4'])
+            notes: List of unique bells as MIDI pitches (e.g., [60, 62, 64]) or note names
+                   (e.g., ['C4', 'D4', 'E4'])
             players: List of player dicts with 'name' and 'experience'
             strategy: Assignment strategy ('experienced_first', 'balanced', 'min_transitions', 'fatigue_snake', 'activity_snake')
             priority_notes: Optional list of notes to prioritize (e.g., melody notes)
             config: Optional config dict with MAX_BELLS_PER_PLAYER, MIN_SWAP_GAP_MS,
-                    TEMPO_BPM, TICKS_PER_BEAT, MUSIC_FORMAT
-            note_timings: Optional list of full note dicts with timing info (for swap cost optimization)
+                    TEMPO_BPM, TICKS_PER_BEAT, MUSIC_FORMAT, TEMPO_MAP
+            note_timings: Optional NoteTable (or list of note dicts) with timing info (for swap cost optimization)
             note_frequencies: Optional dict mapping notes to frequency counts (for assignment ordering)
+            
+        Bells are handled internally as integer IDs (MIDI pitches, see BellIds).
+        Assignments use the same form the notes were given in.
+            pitch_index: Optional shared PitchIndex for the score (music_data['pitch_index']);
+                         built from note_timings when omitted
         
         Returns:
             Dict mapping player names to assignment dicts with 'bells', 'left_hand', 'right_hand'
@@ -50,18 +59,36 @@ class BellAssignmentAlgorithm:
             'beginner': 2
         }
 
+        # Work on integer bell IDs; note names are mapped back on return
+        ids, spellings = BellIds.encode(list(notes) + list(priority_notes or []))
+        notes = [ids[n] for n in notes]
+        if priority_notes:
+            priority_notes = [ids[n] for n in priority_notes]
+        if note_frequencies:
+            note_frequencies = {ids.get(n, n): count for n, count in note_frequencies.items()}
+
+        # Parsed scores come with a shared PitchIndex over their time-ordered
+        # NoteTable; hand-built note dicts are converted and indexed once here
+        if pitch_index is None and note_timings:
+            pitch_index = PitchIndex(NoteTable.from_music_data({
+                'notes': note_timings,
+                'format': (config or {}).get('MUSIC_FORMAT', 'midi'),
+                'tempo': (config or {}).get('TEMPO_BPM', 120),
+                'ticks_per_beat': (config or {}).get('TICKS_PER_BEAT', 480),
+                'tempo_map': (config or {}).get('TEMPO_MAP'),
+            }))
+        if pitch_index is not None and not len(pitch_index):
+            pitch_index = None
+
         # Build timing config for swap-gap feasibility checks
         timing_config = None
-        if config and note_timings:
+        if config and pitch_index:
             timing_config = {
                 'min_gap_ms': config.get('MIN_SWAP_GAP_MS', {
                     'experienced': 500,
                     'intermediate': 1000,
                     'beginner': 2000,
                 }),
-                'tempo_bpm': config.get('TEMPO_BPM', 120),
-                'ticks_per_beat': config.get('TICKS_PER_BEAT', 480),
-                'fmt': config.get('MUSIC_FORMAT', 'midi'),
             }
         
         # Initialize assignments with hand tracking
@@ -82,27 +109,27 @@ class BellAssignmentAlgorithm:
         if strategy == 'experienced_first':
             assignments = BellAssignmentAlgorithm._assign_experienced_first(
                 notes, sorted_players, assignments, player_bell_counts, priority_notes, max_bells_per_player, note_frequencies,
-                note_timings=note_timings, timing_config=timing_config
+                pitch_index=pitch_index, timing_config=timing_config
             )
         elif strategy == 'balanced':
             assignments = BellAssignmentAlgorithm._assign_balanced(
                 notes, sorted_players, assignments, player_bell_counts, priority_notes, max_bells_per_player, note_frequencies,
-                note_timings=note_timings, timing_config=timing_config
+                pitch_index=pitch_index, timing_config=timing_config
             )
         elif strategy == 'min_transitions':
             assignments = BellAssignmentAlgorithm._assign_min_transitions(
-                notes, sorted_players, assignments, player_bell_counts, priority_notes, max_bells_per_player, note_timings, note_frequencies,
+                notes, sorted_players, assignments, player_bell_counts, priority_notes, max_bells_per_player, pitch_index, note_frequencies,
                 timing_config=timing_config
             )
         elif strategy == 'fatigue_snake':
             assignments = BellAssignmentAlgorithm._assign_snake(
                 notes, sorted_players, assignments, player_bell_counts, max_bells_per_player,
-                note_timings=note_timings, timing_config=timing_config, metric='fatigue'
+                pitch_index=pitch_index, timing_config=timing_config, metric='fatigue'
             )
         elif strategy == 'activity_snake':
             assignments = BellAssignmentAlgorithm._assign_snake(
                 notes, sorted_players, assignments, player_bell_counts, max_bells_per_player,
-                note_timings=note_timings, timing_config=timing_config, metric='activity'
+                pitch_index=pitch_index, timing_config=timing_config, metric='activity'
             )
         else:
             raise ValueError(f"Unknown strategy: {strategy}")
@@ -135,214 +162,146 @@ class BellAssignmentAlgorithm:
 
         # Assign bells to specific hands
         assignments = BellAssignmentAlgorithm._assign_hands(assignments)
+
+        if any(bell_id != bell for bell_id, bell in spellings.items()):
+            assignments = BellIds.map_arrangement(assignments, spellings.__getitem__)
         
         return assignments
     
     @staticmethod
-    def _check_swap_gap_for_hand(existing_hand_names, new_bell_name, note_timings, timing_config, experience):
-        """Return True if adding new_bell_name to a hand is timing-feasible.
-
-        Checks every swap between new_bell_name and any bell already on the hand has a
-        gap (end of prev note → start of next) >= the min_gap_ms for this experience level.
-        Returns True if timing data is unavailable.
-        """
-        if not timing_config or not note_timings or not existing_hand_names:
-            return True
-
+    def _min_swap_gap(timing_config, experience):
+        """Minimum swap gap (ms) for an experience level; 0 when there is no timing data"""
+        if not timing_config:
+            return 0
         gap_map = timing_config.get('min_gap_ms', {})
-        min_gap = gap_map.get(experience, 1000) if isinstance(gap_map, dict) else int(gap_map)
-        if min_gap <= 0:
-            return True
-
-        existing_pitches = set()
-        for bn in existing_hand_names:
-            try:
-                existing_pitches.add(MusicParser.note_name_to_pitch(bn))
-            except (ValueError, KeyError):
-                pass
-
-        try:
-            new_pitch = MusicParser.note_name_to_pitch(new_bell_name)
-        except (ValueError, KeyError):
-            return True
-
-        fmt = timing_config.get('fmt', 'midi')
-        tpb = max(timing_config.get('ticks_per_beat', 480), 1)
-        bpm = max(timing_config.get('tempo_bpm', 120), 1)
+        return gap_map.get(experience, 1000) if isinstance(gap_map, dict) else int(gap_map)
 
-        def to_ms(t):
-            return t / tpb * (60000.0 / bpm) if fmt == 'midi' else t * (60000.0 / bpm)
+    @staticmethod
+    def _check_swap_gap_for_hand(existing_hand, new_bell, pitch_index, timing_config, experience):
+        """Return True if adding new_bell to a hand is timing-feasible.
 
-        # Build or reuse a cached per-pitch event map to avoid O(N^2) rescanning.
-        pitch_events = timing_config.get('_pitch_events_ms')
-        if pitch_events is None:
-            pitch_events = {}
-            for n in note_timings:
-                p = n.get('pitch')
-                if p is None:
-                    continue
-                t_raw = n.get('time', n.get('offset', 0))
-                d_raw = n.get('duration', 0)
-                start_ms = to_ms(t_raw)
-                end_ms = start_ms + to_ms(d_raw)
-                pitch_events.setdefault(p, []).append((start_ms, end_ms, p))
-            timing_config['_pitch_events_ms'] = pitch_events
-
-        if not pitch_events:
+        Checks every swap between new_bell and any bell already on the hand has a
+        gap (end of prev note → start of next) >= the min_gap_ms for this experience level.
+        Returns True if timing data is unavailable.  Bells are IDs from BellIds.encode;
+        IDs that are not pitches have no timing and never conflict.
+        """
+        if not timing_config or not pitch_index or not existing_hand:
             return True
 
-        hand_events = []
-        for p in existing_pitches:
-            hand_events.extend(pitch_events.get(p, ()))
-        new_events = list(pitch_events.get(new_pitch, ()))
+        min_gap = BellAssignmentAlgorithm._min_swap_gap(timing_config, experience)
+        return HandState(pitch_index, existing_hand).allows((new_bell,), min_gap)
 
-        if not new_events:
-            return True  # New bell never played; safe to assign
+    @staticmethod
+    def _hand_states(assignment, pitch_index):
+        """The player's left/right HandStates, brought up to date with assignment['bells'].
 
-        all_events = sorted(hand_events + new_events, key=lambda e: e[0])
-        for i in range(1, len(all_events)):
-            prev, curr = all_events[i - 1], all_events[i]
-            if prev[2] != curr[2] and curr[0] - prev[1] < min_gap:
-                return False
+        Bells appended directly to 'bells' (the first two per player, virtual
+        players) go to the hand recorded in '_hand_map', else by index parity,
+        as _assign_hands will place them.
+        """
+        hands = assignment.get('_hands')
+        if hands is None:
+            hands = assignment['_hands'] = {'left': HandState(pitch_index), 'right': HandState(pitch_index)}
+        bells = assignment['bells']
+        hand_map = assignment.get('_hand_map', {})
+        for idx in range(len(hands['left']) + len(hands['right']), len(bells)):
+            bell = bells[idx]
+            hands[hand_map.get(bell, 'left' if idx % 2 == 0 else 'right')].add(bell)
+        return hands
 
-        return True
+    @staticmethod
+    def _place_on_hand(assignment, hands, target_hand, bells):
+        """Record bells on a player's hand (their HandState, bells and _hand_map)"""
+        hand_map = assignment.setdefault('_hand_map', {})
+        for bell in bells:
+            hands[target_hand].add(bell)
+            assignment['bells'].append(bell)
+            hand_map[bell] = target_hand
 
     @staticmethod
-    def _try_extra_bell(assignment, bell_name, note_timings, timing_config, experience):
-        """Try to add bell_name as an extra bell to a player, trying both hands.
+    def _try_extra_bell(assignment, bell, pitch_index, timing_config, experience):
+        """Try to add bell as an extra bell to a player, trying both hands.
 
         Tries the less-loaded hand first for balance. If that hand's swap gap is too
         tight, tries the other hand. If both fail, returns False without modifying
         the assignment. On success, updates assignment['bells'] and records the chosen
         hand in assignment['_hand_map'].
         """
-        hand_map = assignment.get('_hand_map', {})
-        left_bells, right_bells = [], []
-        for idx, b in enumerate(assignment['bells']):
-            hand = hand_map.get(b, 'left' if idx % 2 == 0 else 'right')
-            (left_bells if hand == 'left' else right_bells).append(b)
+        hands = BellAssignmentAlgorithm._hand_states(assignment, pitch_index)
+        min_gap = BellAssignmentAlgorithm._min_swap_gap(timing_config, experience)
 
         # Try less-loaded hand first for balance
-        if len(left_bells) <= len(right_bells):
-            hand_order = [('left', left_bells), ('right', right_bells)]
-        else:
-            hand_order = [('right', right_bells), ('left', left_bells)]
+        hand_order = ('left', 'right') if len(hands['left']) <= len(hands['right']) else ('right', 'left')
 
-        for target_hand, hand_bells in hand_order:
-            if BellAssignmentAlgorithm._check_swap_gap_for_hand(
-                    hand_bells, bell_name, note_timings, timing_config, experience):
-                assignment['bells'].append(bell_name)
-                assignment.setdefault('_hand_map', {})[bell_name] = target_hand
+        for target_hand in hand_order:
+            if hands[target_hand].allows((bell,), min_gap):
+                BellAssignmentAlgorithm._place_on_hand(assignment, hands, target_hand, (bell,))
                 return True
 
         return False
 
     @staticmethod
-    def _try_assign_pair_same_hand(assignment, bell_a, bell_b, note_timings, timing_config, experience):
+    def _try_assign_pair_same_hand(assignment, bell_a, bell_b, pitch_index, timing_config, experience):
         """Try to assign a bell pair to the same hand for a player."""
-        hand_map = assignment.get('_hand_map', {})
-        left_bells, right_bells = [], []
-        for idx, b in enumerate(assignment['bells']):
-            hand = hand_map.get(b, 'left' if idx % 2 == 0 else 'right')
-            (left_bells if hand == 'left' else right_bells).append(b)
-
-        hand_order = [('left', left_bells), ('right', right_bells)]
-        if len(right_bells) < len(left_bells):
-            hand_order = [('right', right_bells), ('left', left_bells)]
-
-        for target_hand, hand_bells in hand_order:
-            if not BellAssignmentAlgorithm._check_swap_gap_for_hand(
-                    hand_bells, bell_a, note_timings, timing_config, experience):
-                continue
-            if not BellAssignmentAlgorithm._check_swap_gap_for_hand(
-                    hand_bells + [bell_a], bell_b, note_timings, timing_config, experience):
-                continue
-            assignment['bells'].append(bell_a)
-            assignment['bells'].append(bell_b)
-            assignment.setdefault('_hand_map', {})[bell_a] = target_hand
-            assignment.setdefault('_hand_map', {})[bell_b] = target_hand
-            return True
-        return False
+        hands = BellAssignmentAlgorithm._hand_states(assignment, pitch_index)
+        min_gap = BellAssignmentAlgorithm._min_swap_gap(timing_config, experience)
 
-    @staticmethod
-    def _get_note_ms(note, timing_config):
-        """Convert note timing fields to (start_ms, end_ms)."""
-        if not timing_config:
-            t = note.get('time', note.get('offset', 0))
-            d = note.get('duration', 0)
-            return float(t), float(t + d)
-        fmt = timing_config.get('fmt', 'midi')
-        tpb = max(timing_config.get('ticks_per_beat', 480), 1)
-        bpm = max(timing_config.get('tempo_bpm', 120), 1)
-
-        def to_ms(raw):
-            return raw / tpb * (60000.0 / bpm) if fmt == 'midi' else raw * (60000.0 / bpm)
+        hand_order = ('right', 'left') if len(hands['right']) < len(hands['left']) else ('left', 'right')
 
-        t_raw = note.get('time', note.get('offset', 0))
-        d_raw = note.get('duration', 0)
-        start_ms = to_ms(t_raw)
-        return start_ms, start_ms + to_ms(d_raw)
+        for target_hand in hand_order:
+            if hands[target_hand].allows((bell_a, bell_b), min_gap):
+                BellAssignmentAlgorithm._place_on_hand(assignment, hands, target_hand, (bell_a, bell_b))
+                return True
+        return False
 
     @staticmethod
-    def _build_pair_costs(notes, note_timings, timing_config):
+    def _build_pair_costs(notes, pitch_index, timing_config):
         """Build pair cost list sorted by lowest swap transitions then largest avg gap."""
         from app.services.swap_cost_calculator import SwapCostCalculator
-        # Pre-index events by pitch once (O(N_events)), then sort each pitch's list
-        # by start time once so calculate_pair_swap_cost_indexed can merge in
-        # O(|events_a| + |events_b|) per pair rather than sorting per call.
-        pitch_index = {}
-        for n in (note_timings or []):
-            p = n.get('pitch')
-            if p is None:
-                continue
-            start = n.get('time', n.get('offset', 0))  # 'time' for MIDI, 'offset' for MusicXML
-            dur = n.get('duration', 0)
-            pitch_index.setdefault(p, []).append((start, start + dur, p))
-        for events in pitch_index.values():
-            events.sort(key=lambda e: e[0])
+        # Transition counts and average gaps for all pairs come from one NumPy
+        # pass over the score (pair_swap_cost_matrices); this is the list view of
+        # those matrices.  Score units: ticks for MIDI, quarter lengths for MusicXML.
+        pitches = []
+        for n in notes:
+            if isinstance(n, int) and n not in pitches:
+                pitches.append(n)
+        transitions, avg_gap = SwapCostCalculator.pair_swap_cost_matrices(pitch_index, pitches)
+        transitions, avg_gap = transitions.tolist(), avg_gap.tolist()
+        row = {p: i for i, p in enumerate(pitches)}
+
         costs = []
         for i in range(len(notes)):
             for j in range(i + 1, len(notes)):
                 a = notes[i]
                 b = notes[j]
-                try:
-                    pa = MusicParser.note_name_to_pitch(a)
-                    pb = MusicParser.note_name_to_pitch(b)
-                except (ValueError, KeyError):
+                if not (isinstance(a, int) and isinstance(b, int)):
                     continue
-                pair = SwapCostCalculator.calculate_pair_swap_cost_indexed(pa, pb, pitch_index)
                 costs.append({
                     'pair': (a, b),
-                    'transitions': pair['transitions'],
-                    'avg_gap': pair['avg_gap'],
+                    'transitions': transitions[row[a]][row[b]],
+                    'avg_gap': avg_gap[row[a]][row[b]],
                 })
         costs.sort(key=lambda x: (x['transitions'], -x['avg_gap']))
         return costs
 
     @staticmethod
-    def _assign_snake(notes, players, assignments, counts, max_bells_per_player, note_timings=None, timing_config=None, metric='fatigue'):
+    def _assign_snake(notes, players, assignments, counts, max_bells_per_player, pitch_index=None, timing_config=None, metric='fatigue'):
         """Assign bells in snake order, ranked by either fatigue or activity contribution."""
-        from app.services.simulation_builder import SimulationBuilder
-
         if not notes:
             return assignments
 
         score_by_note = {n: 0.0 for n in notes}
-        if note_timings:
-            for ev in note_timings:
-                p = ev.get('pitch')
-                if p is None:
-                    continue
-                note_name = MusicParser.pitch_to_note_name(p)
-                if note_name not in score_by_note:
-                    continue
-                start_ms, end_ms = BellAssignmentAlgorithm._get_note_ms(ev, timing_config)
-                dur_ms = max(0.0, end_ms - start_ms)
-                if metric == 'fatigue':
-                    _, wt_oz, _ = SimulationBuilder._get_bell_data(p)
-                    score_by_note[note_name] += dur_ms * wt_oz
-                else:
-                    score_by_note[note_name] += dur_ms
+        if pitch_index:
+            # Per-pitch totals from the score's shared profile
+            # (raw score units when there is no timing config)
+            profile = pitch_index.profile()
+            if metric == 'fatigue':
+                per_pitch = profile.weighted_fatigue(timed=bool(timing_config))
+            else:
+                per_pitch = profile.activity(timed=bool(timing_config))
+            for p in profile.pitches:
+                if p in score_by_note:
+                    score_by_note[p] += per_pitch[p]
 
         ordered_notes = sorted(notes, key=lambda n: score_by_note.get(n, 0.0), reverse=True)
         if len(players) == 1:
@@ -365,7 +324,7 @@ class BellAssignmentAlgorithm:
                 max_for_exp = max_bells_per_player.get(exp, 2)
                 if counts[pname] >= max_for_exp:
                     continue
-                if BellAssignmentAlgorithm._try_extra_bell(assignments[pname], note, note_timings, timing_config, exp):
+                if BellAssignmentAlgorithm._try_extra_bell(assignments[pname], note, pitch_index, timing_config, exp):
                     counts[pname] += 1
                     assigned = True
                     ptr = (ptr + 1) % len(snake_idx)
@@ -375,7 +334,7 @@ class BellAssignmentAlgorithm:
         return assignments
 
     @staticmethod
-    def _assign_experienced_first(notes, players, assignments, counts, priority_notes=None, max_bells_per_player=None, note_frequencies=None, note_timings=None, timing_config=None):
+    def _assign_experienced_first(notes, players, assignments, counts, priority_notes=None, max_bells_per_player=None, note_frequencies=None, pitch_index=None, timing_config=None):
         """Assign bells ensuring every player gets at least 2, then extras to experienced/intermediate players.
         
         Experience-level constraints:
@@ -430,7 +389,7 @@ class BellAssignmentAlgorithm:
                     max_for_exp = max_bells_per_player.get(experience, 2)
                     if counts[player['name']] < max_for_exp:
                         if BellAssignmentAlgorithm._try_extra_bell(
-                                assignments[player['name']], note, note_timings, timing_config, experience):
+                                assignments[player['name']], note, pitch_index, timing_config, experience):
                             counts[player['name']] += 1
                             assigned_notes.add(note)
                             break
@@ -446,7 +405,7 @@ class BellAssignmentAlgorithm:
                     max_for_exp = max_bells_per_player.get(experience, 2)
                     if counts[player['name']] < max_for_exp:
                         if BellAssignmentAlgorithm._try_extra_bell(
-                                assignments[player['name']], note, note_timings, timing_config, experience):
+                                assignments[player['name']], note, pitch_index, timing_config, experience):
                             counts[player['name']] += 1
                             assigned_notes.add(note)
                             break
@@ -458,7 +417,7 @@ class BellAssignmentAlgorithm:
         return assignments
     
     @staticmethod
-    def _assign_balanced(notes, players, assignments, counts, priority_notes=None, max_bells_per_player=None, note_frequencies=None, note_timings=None, timing_config=None):
+    def _assign_balanced(notes, players, assignments, counts, priority_notes=None, max_bells_per_player=None, note_frequencies=None, pitch_index=None, timing_config=None):
         """Distribute notes evenly: ensure each player gets 2 bells first, then distribute extras.
         
         Experience-level constraints:
@@ -507,7 +466,7 @@ class BellAssignmentAlgorithm:
                     max_for_exp = max_bells_per_player.get(experience, 2)
                     if counts[player['name']] < max_for_exp:
                         if BellAssignmentAlgorithm._try_extra_bell(
-                                assignments[player['name']], note, note_timings, timing_config, experience):
+                                assignments[player['name']], note, pitch_index, timing_config, experience):
                             counts[player['name']] += 1
                             # Advance round-robin past the player that accepted
                             cap_start = (cap_start + i + 1) % len(capable_players)
@@ -524,7 +483,7 @@ class BellAssignmentAlgorithm:
         return assignments
     
     @staticmethod
-    def _assign_min_transitions(notes, players, assignments, counts, priority_notes=None, max_bells_per_player=None, note_timings=None, note_frequencies=None, timing_config=None):
+    def _assign_min_transitions(notes, players, assignments, counts, priority_notes=None, max_bells_per_player=None, pitch_index=None, note_frequencies=None, timing_config=None):
         """Pair-first min transitions: preselect low-cost bell pairs, then assign remaining notes."""
 
         if max_bells_per_player is None:
@@ -541,7 +500,7 @@ class BellAssignmentAlgorithm:
         extra_bells_needed = max(0, len(all_notes) - (len(players) * 2))
         pair_count_needed = extra_bells_needed
 
-        pair_costs = BellAssignmentAlgorithm._build_pair_costs(all_notes, note_timings, timing_config)
+        pair_costs = BellAssignmentAlgorithm._build_pair_costs(all_notes, pitch_index, timing_config)
         selected_pairs = []
         used_bells = set()
         for info in pair_costs:
@@ -583,7 +542,7 @@ class BellAssignmentAlgorithm:
                     if a in assigned_notes or b in assigned_notes:
                         continue
                     if BellAssignmentAlgorithm._try_assign_pair_same_hand(
-                            assignments[pname], a, b, note_timings, timing_config, exp):
+                            assignments[pname], a, b, pitch_index, timing_config, exp):
                         chosen_idx = idx
                         break
                 if chosen_idx is not None:
@@ -621,7 +580,7 @@ class BellAssignmentAlgorithm:
                 if counts[pname] >= max_for_exp:
                     continue
                 if BellAssignmentAlgorithm._try_extra_bell(
-                        assignments[pname], note, note_timings, timing_config, exp):
+                        assignments[pname], note, pitch_index, timing_config, exp):
                     counts[pname] += 1
                     assigned_notes.add(note)
                     break
@@ -634,9 +593,10 @@ class BellAssignmentAlgorithm:
 
         Bells assigned during Phase 2/3 have their hand recorded in '_hand_map'.
         Phase 1 bells (first 2 per player) fall back to the index-parity rule.
-        Clears '_hand_map' from the assignment before returning.
+        Clears '_hand_map' and the '_hands' HandStates from the assignment before returning.
         """
         for player_name, player_data in assignments.items():
+            player_data.pop('_hands', None)
             hand_map = player_data.pop('_hand_map', {})
             player_data['left_hand'] = []
             player_data['right_hand'] = []
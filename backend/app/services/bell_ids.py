@@ -0,0 +1,106 @@
+"""
+Bell IDs
+Integer bell identifiers for the arrangement pipeline.
+
+A bell is identified by its MIDI pitch.  The assignment strategies, conflict
+resolution, validation, swap counting and the simulation all carry int
+pitches, so nothing in the pipeline parses note names; names ("C#4") are
+produced only where an arrangement leaves the API (routes.py) or is exported
+(ExportFormatter).  Services still accept arrangements whose bells are note
+names, since the frontend sends them back for export and callers may build
+them by hand.
+"""
+
+from functools import lru_cache
+
+from app.services.music_parser import MusicParser
+
+_NAMES = [MusicParser.pitch_to_note_name(p) for p in range(128)]
+
+_HAND_KEYS = ('bells', 'left_hand', 'right_hand')
+
+
+@lru_cache(maxsize=512)
+def _parse_name(name):
+    try:
+        return MusicParser.note_name_to_pitch(name)
+    except (ValueError, KeyError, IndexError, TypeError):
+        raise ValueError(f"Invalid note name: {name}")
+
+
+class BellIds:
+    """Conversions between bell IDs (MIDI pitches) and note names"""
+
+    @staticmethod
+    def pitch(bell):
+        """
+        MIDI pitch of a bell given as an int or a note name.
+
+        Raises:
+            ValueError: If bell is a string that is not a note name
+        """
+        if isinstance(bell, str):
+            return _parse_name(bell)
+        return int(bell)
+
+    @staticmethod
+    def normalize(bell):
+        """Pitch of bell when it is an int or a valid note name, otherwise bell unchanged"""
+        try:
+            return BellIds.pitch(bell)
+        except ValueError:
+            return bell
+
+    @staticmethod
+    def name(bell):
+        """Note name of a bell; names pass through unchanged"""
+        if isinstance(bell, str):
+            return bell
+        pitch = int(bell)
+        if 0 <= pitch < len(_NAMES):
+            return _NAMES[pitch]
+        return MusicParser.pitch_to_note_name(pitch)
+
+    @staticmethod
+    def encode(bells):
+        """
+        Assign an ID to each distinct bell.
+
+        A bell's ID is its pitch.  Bells that are not note names, and later
+        spellings of a pitch already seen ("Db4" after "C#4"), keep themselves
+        as their ID so they stay distinct bells.
+
+        Args:
+            bells: Iterable of ints and/or note names
+
+        Returns:
+            (ids, spellings): ids maps each input bell to its ID, spellings maps
+            each ID back to the bell it was given as
+        """
+        ids = {}
+        spellings = {}
+        for bell in bells:
+            if bell in ids:
+                continue
+            bell_id = BellIds.normalize(bell)
+            if bell_id in spellings:
+                bell_id = bell
+            ids[bell] = bell_id
+            spellings[bell_id] = bell
+        return ids, spellings
+
+    @staticmethod
+    def map_arrangement(arrangement, convert):
+        """Copy of an arrangement with convert applied to every bell in its hand lists"""
+        return {
+            player_name: {
+                **player_data,
+                **{key: [convert(b) for b in player_data[key]] for key in _HAND_KEYS if key in player_data},
+            }
+            for player_name, player_data in arrangement.items()
+        }
+
+    @staticmethod
+    def to_names(arrangement):
+        """Copy of an arrangement with every bell given as a note name"""
+        return BellIds.map_arrangement(arrangement, BellIds.name)
@@ -0,0 +1,236 @@
+"""
+Disk Parse Cache
+Persistent content-addressed cache of parsed music data.
+
+The desktop app starts a fresh backend on every launch, so the in-memory
+ParseCache is always cold.  This cache keeps parsed scores on disk in a
+compact columnar binary file that is memory-mapped on read:
+
+    header   '<4sBBHII'  magic, version, byte order, reserved, note count, meta length
+    meta     UTF-8 JSON  (scalar fields and ordered pitch lists), padded to 8 bytes
+    notes    n rows of the NoteTable structured dtype, as laid out in memory
+
+The PitchIndex is rebuilt from the rows on load rather than stored.  The
+loaded NoteTable's rows are a read-only view straight into the mapping, which
+stays open for as long as the table (or anything sliced from it) is alive, so
+a hit only pages in the rows it touches; NoteTable.set copies them before the
+first write.  Replacing or evicting the file is safe meanwhile because the
+mapping keeps the old inode.  Windows cannot delete or replace a mapped file,
+so there the rows are copied out and the mapping is closed straight away.
+
+The directory is capped at a byte budget; the least recently used files
+(oldest modification time, refreshed on every hit) are evicted first.
+"""
+
+import json
+import logging
+import mmap
+import os
+import struct
+import sys
+import threading
+import uuid
+from fractions import Fraction
+
+from app.services.note_table import NoteTable, note_dtype
+from app.services.pitch_index import PitchIndex
+
+logger = logging.getLogger(__name__)
+
+_MAGIC = b'VBPC'
+_VERSION = 4  # 4: MIDI percussion is dropped by default
+_HEADER = struct.Struct('<4sBBHII')
+_BYTE_ORDER = 0 if sys.byteorder == 'little' else 1
+_SUFFIX = '.vbc'
+_COPY_ROWS = sys.platform == 'win32'  # mapped files there block os.replace / os.remove
+
+
+def _json_default(value):
+    """Serialize music21 Fraction offsets/durations as floats"""
+    if isinstance(value, Fraction):
+        return float(value)
+    raise TypeError(f"Object of type {type(value).__name__} is not JSON serializable")
+
+
+class DiskParseCache:
+    """Size-capped on-disk cache of parsed music_data, keyed by content hash"""
+
+    def __init__(self, directory, max_bytes):
+        self.directory = directory
+        self.max_bytes = max(0, int(max_bytes or 0))
+        self._lock = threading.Lock()
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+        os.makedirs(directory, exist_ok=True)
+
+    def _path(self, key):
+        # Keys look like "midi:<sha256>"; ':' is not allowed in Windows filenames
+        return os.path.join(self.directory, key.replace(':', '_') + _SUFFIX)
+
+    def get(self, key):
+        """Load music_data for key from disk, or None on miss"""
+        path = self._path(key)
+        try:
+            music_data = DiskParseCache._read(path)
+        except FileNotFoundError:
+            music_data = None
+        except Exception as e:
+            logger.warning(f"Discarding unreadable parse cache file {path}: {e}")
+            self._remove(path)
+            music_data = None
+
+        with self._lock:
+            if music_data is None:
+                self.misses += 1
+                return None
+            self.hits += 1
+
+        try:
+            os.utime(path)  # refresh recency for oldest-first eviction
+        except OSError:
+            pass
+        return music_data
+
+    def put(self, key, music_data):
+        """Write music_data to disk and evict the oldest files beyond the byte budget"""
+        if self.max_bytes <= 0:
+            return False
+
+        try:
+            payload = DiskParseCache._encode(music_data)
+        except Exception as e:
+            logger.warning(f"Could not encode music data for parse cache: {e}")
+            return False
+
+        if len(payload) > self.max_bytes:
+            return False
+
+        path = self._path(key)
+        tmp_path = f"{path}.{uuid.uuid4().hex}.tmp"
+        try:
+            with open(tmp_path, 'wb') as f:
+                f.write(payload)
+            os.replace(tmp_path, path)
+        except OSError as e:
+            logger.warning(f"Could not write parse cache file {path}: {e}")
+            self._remove(tmp_path)
+            return False
+
+        self._evict(keep=path)
+        return True
+
+    def stats(self):
+        """Return cache counters and occupancy"""
+        entries = self._list_entries()
+        with self._lock:
+            return {
+                'hits': self.hits,
+                'misses': self.misses,
+                'evictions': self.evictions,
+                'entries': len(entries),
+                'bytes': sum(size for _, size, _ in entries),
+                'max_bytes': self.max_bytes,
+                'directory': self.directory,
+            }
+
+    def _list_entries(self):
+        """Return [(path, size, mtime)] for every cache file"""
+        entries = []
+        try:
+            names = os.listdir(self.directory)
+        except OSError:
+            return entries
+        for name in names:
+            if not name.endswith(_SUFFIX):
+                continue
+            path = os.path.join(self.directory, name)
+            try:
+                st = os.stat(path)
+            except OSError:
+                continue
+            entries.append((path, st.st_size, st.st_mtime))
+        return entries
+
+    def _evict(self, keep=None):
+        """Remove oldest files until the directory fits within max_bytes"""
+        entries = self._list_entries()
+        total = sum(size for _, size, _ in entries)
+        if total <= self.max_bytes:
+            return
+        entries.sort(key=lambda e: e[2])
+        for path, size, _ in entries:
+            if total <= self.max_bytes:
+                break
+            if path == keep:
+                continue
+            if self._remove(path):
+                total -= size
+                with self._lock:
+                    self.evictions += 1
+
+    @staticmethod
+    def _remove(path):
+        try:
+            os.remove(path)
+            return True
+        except OSError:
+            return False
+
+    @staticmethod
+    def _encode(music_data):
+        """Serialize music_data into the columnar binary layout"""
+        notes = NoteTable.from_music_data(music_data)
+        fmt = music_data.get('format', 'midi')
+
+        meta = {k: v for k, v in music_data.items() if k not in ('notes', 'pitch_index', 'frequencies')}
+        meta['format'] = fmt
+        meta['frequencies'] = [[p, c] for p, c in music_data.get('frequencies', {}).items()]
+        meta_bytes = json.dumps(meta, default=_json_default).encode('utf-8')
+        meta_bytes += b' ' * (-len(meta_bytes) % 8)  # keep the note rows 8-byte aligned
+
+        header = _HEADER.pack(_MAGIC, _VERSION, _BYTE_ORDER, 0, len(notes), len(meta_bytes))
+        return b''.join([header, meta_bytes, notes.data.tobytes()])
+
+    @staticmethod
+    def _read(path):
+        """Memory-map a cache file and rebuild the music_data dict"""
+        with open(path, 'rb') as f:
+            mm = mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ)
+        view = memoryview(mm)
+        try:
+            # Not closed on success: the note rows are a view into the mapping,
+            # which is released when the last array referencing it is collected
+            return DiskParseCache._decode(view)
+        except Exception:
+            view.release()
+            mm.close()
+            raise
+
+    @staticmethod
+    def _decode(view):
+        import numpy as np
+
+        magic, version, byte_order, _, n, meta_len = _HEADER.unpack_from(view, 0)
+        if magic != _MAGIC or version != _VERSION or byte_order != _BYTE_ORDER:
+            raise ValueError('incompatible cache file')
+
+        pos = _HEADER.size
+        meta = json.loads(bytes(view[pos:pos + meta_len]).decode('utf-8'))
+        pos += meta_len
+
+        dtype = note_dtype()
+        if len(view) != pos + n * dtype.itemsize:
+            raise ValueError('truncated cache file')
+
+        rows = np.frombuffer(view, dtype=dtype, count=n, offset=pos)  # read-only view
+        if _COPY_ROWS:
+            rows, mm = rows.copy(), view.obj
+            view.release()
+            mm.close()
+
+        music_data = dict(meta)
+        music_data['notes'] = NoteTable(rows, meta['format'])
+        music_data['pitch_index'] = PitchIndex(music_data['notes'])
+        music_data['frequencies'] = {p: c for p, c in meta['frequencies']}
+        return music_data
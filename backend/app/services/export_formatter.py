@@ -8,6 +8,8 @@ import io
 from datetime import datetime
 import logging
 
+from app.services.bell_ids import BellIds
+
 logger = logging.getLogger(__name__)
 
 
@@ -20,7 +22,8 @@ class ExportFormatter:
         Format arrangement into CSV text.
         
         Args:
-            arrangement: Dict mapping player names to assignment dicts
+            arrangement: Dict mapping player names to assignment dicts (bells as
+                         note names or MIDI pitches)
             players: List of player configs with name and experience
             filename: Original uploaded filename
             strategy: Strategy used (e.g., 'balanced', 'experienced_first')
@@ -29,6 +32,7 @@ class ExportFormatter:
         Returns:
             CSV text content as string
         """
+        arrangement = BellIds.to_names(arrangement)
         output = io.StringIO()
         writer = csv.writer(output)
         
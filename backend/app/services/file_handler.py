@@ -5,7 +5,7 @@ from werkzeug.utils import secure_filename
 class FileHandler:
     """Handle file operations"""
     
-    ALLOWED_EXTENSIONS = {'mid', 'midi', 'musicxml', 'xml'}
+    ALLOWED_EXTENSIONS = {'mid', 'midi', 'musicxml', 'xml', 'mxl'}
     
     @staticmethod
     def get_file_type(filename):
@@ -15,13 +15,14 @@ class FileHandler:
             raise ValueError("File has no extension")
         if ext in {'mid', 'midi'}:
             return 'midi'
-        elif ext in {'musicxml', 'xml'}:
+        elif ext in {'musicxml', 'xml', 'mxl'}:
+            # .mxl archives are unpacked by MusicXMLParser
             return 'musicxml'
         raise ValueError(f"Unknown file type: {ext}")
     
     @staticmethod
-    def save_file(file, upload_folder):
-        """Save uploaded file securely with UUID"""
+    def validate_upload(file):
+        """Validate an uploaded file and return its sanitized filename"""
         if not file or file.filename == '':
             raise ValueError('No file provided')
         
@@ -35,6 +36,32 @@ class FileHandler:
         if ext not in FileHandler.ALLOWED_EXTENSIONS:
             raise ValueError(f'File type not allowed. Supported: {", ".join(FileHandler.ALLOWED_EXTENSIONS)}')
         
+        return filename
+    
+    @staticmethod
+    def read_file(file):
+        """Read uploaded file into memory without touching disk.
+        
+        Returns:
+            Tuple of (sanitized filename, file contents as bytes)
+        """
+        filename = FileHandler.validate_upload(file)
+        
+        try:
+            data = file.read()
+        except Exception as e:
+            raise Exception(f"Failed to read file: {str(e)}")
+        
+        if not data:
+            raise ValueError('Uploaded file is empty')
+        
+        return filename, data
+    
+    @staticmethod
+    def save_file(file, upload_folder):
+        """Save uploaded file securely with UUID"""
+        filename = FileHandler.validate_upload(file)
+        
         # Generate unique filename with UUID to prevent collisions
         unique_filename = f"{uuid.uuid4()}_{filename}"
         filepath = os.path.join(upload_folder, unique_filename)
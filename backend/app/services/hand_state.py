@@ -0,0 +1,71 @@
+"""
+Hand State
+Incremental swap-gap state for one hand of one player during bell assignment.
+
+The assignment strategies probe the same hands over and over ("could this
+player take bell X in the left hand?").  A HandState holds the bells already
+on a hand, the played pitches among them, and the tightest swap between any
+two of those pitches.  Because a hand's merged timeline has a too-short swap
+exactly when some pair of its pitches does (see PitchIndex.gap_matrix_ms),
+adding a bell only has to look up its gaps to the pitches already there, and
+a what-if probe does the same lookups without touching the state.
+"""
+
+_INF = float('inf')
+
+
+class HandState:
+    """Bells on one hand and the smallest swap gap (ms) between any two of them"""
+
+    __slots__ = ('pitch_index', 'bells', 'pitches', 'min_gap_ms')
+
+    def __init__(self, pitch_index=None, bells=()):
+        """
+        Args:
+            pitch_index: The score's PitchIndex (None when there is no timing data)
+            bells: Bell IDs already on the hand
+        """
+        self.pitch_index = pitch_index
+        self.bells = []
+        self.pitches = []       # played pitches on the hand, in the order added
+        self.min_gap_ms = _INF  # tightest swap between two of them
+        for bell in bells:
+            self.add(bell)
+
+    def played(self, bell):
+        """True if bell is a pitch with notes in the score (only those have swaps)"""
+        return isinstance(bell, int) and self.pitch_index is not None and self.pitch_index.count(bell) > 0
+
+    def gap_with(self, bells):
+        """Smallest swap gap the hand would have with bells added; the state is unchanged"""
+        gap = self.min_gap_ms
+        pitches = list(self.pitches)
+        for bell in bells:
+            if self.played(bell) and bell not in pitches:
+                for pitch in pitches:
+                    gap = min(gap, self.pitch_index.min_gap_ms(bell, pitch))
+                pitches.append(bell)
+        return gap
+
+    def allows(self, bells, min_gap):
+        """
+        True if adding bells keeps every swap on the hand at least min_gap ms apart.
+
+        Unplayed bells never conflict, so adding only those is always allowed.
+        """
+        if min_gap <= 0 or not any(self.played(bell) for bell in bells):
+            return True
+        return self.gap_with(bells) >= min_gap
+
+    def add(self, bell):
+        """Put bell on the hand, updating the minimum gap from its lookups only"""
+        self.min_gap_ms = self.gap_with((bell,))
+        self.bells.append(bell)
+        if self.played(bell) and bell not in self.pitches:
+            self.pitches.append(bell)
+
+    def __len__(self):
+        return len(self.bells)
+
+    def __repr__(self):
+        return f"HandState({self.bells!r}, min_gap_ms={self.min_gap_ms})"
@@ -3,6 +3,11 @@ Melody and Harmony Extraction Service
 
 Identifies melody notes (primary notes) vs harmony notes (supporting notes)
 based on timing, frequency, and pitch patterns.
+
+The parse pipeline uses extract_masks, which works on the NoteTable columns
+in one NumPy pass and can merge onsets a few ticks or ms apart (humanized
+performances) into one chord.  extract and get_note_frequencies remain for
+lists of note dicts.
 """
 
 class MelodyHarmonyExtractor:
@@ -63,6 +68,65 @@ class MelodyHarmonyExtractor:
             'harmony_pitches': list(set([n['pitch'] for n in harmony]))
         }
     
+    @staticmethod
+    def extract_masks(notes, onset_tolerance=0, tolerance_unit='ticks'):
+        """
+        Split a NoteTable into melody and harmony in one vectorized pass.
+        
+        Notes are grouped by onset: a new group starts wherever the gap to the
+        previous onset exceeds onset_tolerance (0 groups exact onsets only, as
+        extract does).  A lexsort over (group, -pitch) puts each group's highest
+        note first; ties keep score order.
+        
+        Args:
+            notes: NoteTable in score order
+            onset_tolerance: Largest onset gap still treated as simultaneous
+            tolerance_unit: 'ticks' (score units: ticks for MIDI, quarter
+                            lengths for MusicXML) or 'ms'
+            
+        Returns:
+            Dict with boolean 'melody' and 'harmony' masks over the notes,
+            'melody_pitches', 'harmony_pitches', and 'frequencies' (pitch -> count)
+        """
+        import numpy as np
+        
+        count = len(notes)
+        pitches = notes.pitch
+        if not count:
+            empty = np.zeros(0, dtype=bool)
+            return {'melody': empty, 'harmony': empty.copy(), 'melody_pitches': [],
+                    'harmony_pitches': [], 'frequencies': {}}
+        
+        if tolerance_unit == 'ms':
+            onsets = notes.start_ms
+        elif tolerance_unit == 'ticks':
+            onsets = notes.time
+        else:
+            raise ValueError(f"Unknown onset tolerance unit: {tolerance_unit}")
+        
+        # Onset group of each note (onsets are non-decreasing in score order)
+        groups = np.zeros(count, dtype=np.intp)
+        np.cumsum(np.diff(onsets) > onset_tolerance, out=groups[1:])
+        
+        # Highest pitch first within each group; the first row of a group is its melody note
+        order = np.lexsort((-pitches.astype(np.int16), groups))
+        sorted_groups = groups[order]
+        leads = np.ones(count, dtype=bool)
+        leads[1:] = sorted_groups[1:] != sorted_groups[:-1]
+        
+        melody = np.zeros(count, dtype=bool)
+        melody[order[leads]] = True
+        
+        counts = np.bincount(pitches, minlength=128).tolist()
+        return {
+            'melody': melody,
+            'harmony': ~melody,
+            # Pitch sets are built in group order, as extract builds them
+            'melody_pitches': list(set(pitches[order[leads]].tolist())),
+            'harmony_pitches': list(set(pitches[order[~leads]].tolist())),
+            'frequencies': {pitch: c for pitch, c in enumerate(counts) if pitch and c},
+        }
+    
     @staticmethod
     def get_note_frequencies(notes):
         """Get frequency count for each note"""
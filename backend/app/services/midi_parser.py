@@ -3,105 +3,192 @@ MIDI File Parser
 Extracts notes, timing, and structure from MIDI files.
 """
 
-import mido
 import logging
+from io import BytesIO
+
+from app.services.note_table import NoteTable
+from app.services.parse_limits import UNLIMITED, ParseLimitExceeded
+from app.services.smf_decoder import SMFDecoder, UnsupportedSMF
+from app.services.tempo_map import TempoMap
+from app.services.track_selection import ALL_NOTES, DEFAULT_SELECTION
 
 logger = logging.getLogger(__name__)
 
 class MIDIParser:
-    """Parse MIDI files using mido"""
+    """Parse MIDI files with the raw SMF decoder, falling back to mido"""
     
     @staticmethod
-    def parse(filepath):
+    def parse(source, limits=UNLIMITED, selection=DEFAULT_SELECTION):
         """
         Parse MIDI file and extract notes with timing information.
         
         Args:
-            filepath: Path to MIDI file
+            source: Path to MIDI file, raw MIDI bytes, or a binary file-like object
+            limits: ParseLimits enforced while the tracks are decoded
+            selection: TrackSelection of the tracks and channels to keep; the
+                       default drops General MIDI percussion (channel 10).  With
+                       merge_doublings set, lines doubled across tracks become
+                       single notes.
             
         Returns:
-            Dict with notes list and metadata
+            Dict with a NoteTable of notes (merged across tracks, ordered by onset) and metadata;
+            'doublings' reports the event reduction when doublings were merged
             
         Raises:
+            ParseLimitExceeded: If the file is over a limit
             Exception: If file cannot be parsed
         """
         try:
-            mid = mido.MidiFile(filepath)
-            
-            notes = []
-            tempo_microseconds = 500000  # Default: 120 BPM
-            ticks_per_beat = mid.ticks_per_beat
+            data = MIDIParser._read_bytes(source)
+            try:
+                decoded = SMFDecoder.decode(data, limits, selection)
+            except UnsupportedSMF as e:
+                logger.debug(f"SMF decoder declined ({e}), using mido")
+                decoded = MIDIParser._decode_with_mido(data, limits, selection)
+            limits.check_unique_pitches(len(set(decoded['pitch'])))
             
-            # First pass: extract tempo and collect all note events
-            note_on_events = {}  # {(track_idx, pitch): (velocity, tick)}
-            
-            for track_idx, track in enumerate(mid.tracks):
-                current_tick = 0
-                
-                for msg in track:
-                    current_tick += msg.time
-                    
-                    # Extract tempo
-                    if msg.type == 'set_tempo':
-                        tempo_microseconds = msg.tempo
-                    
-                    # Collect note on events
-                    elif msg.type == 'note_on' and msg.velocity > 0:
-                        key = (track_idx, msg.note)
-                        note_on_events[key] = (msg.velocity, current_tick)
-                    
-                    # Process note off events or note_on with velocity 0
-                    elif msg.type == 'note_off' or (msg.type == 'note_on' and msg.velocity == 0):
-                        key = (track_idx, msg.note)
-                        if key in note_on_events:
-                            velocity, tick_on = note_on_events[key]
-                            duration = current_tick - tick_on
-                            notes.append({
-                                'pitch': msg.note,
-                                'velocity': velocity,
-                                'time': tick_on,
-                                'offset': tick_on,
-                                'duration': max(1, duration)  # Minimum 1 tick
-                            })
-                            del note_on_events[key]
+            ticks_per_beat = decoded['ticks_per_beat']
+            tempo_changes = decoded['tempo_changes']  # [(tick, microseconds per beat)] from every track
+            # Columns arrive merged across tracks in onset order; the NoteTable
+            # keeps that order so consumers can filter instead of re-sorting.
+            notes = NoteTable.from_columns(
+                'midi',
+                pitch=decoded['pitch'],
+                velocity=decoded['velocity'],
+                track=decoded['track'],
+                time=decoded['time'],
+                duration=decoded['duration'],
+            )
             
-            # Handle any remaining note_on events without matching note_off
-            for (track_idx, pitch), (velocity, tick_on) in note_on_events.items():
-                notes.append({
-                    'pitch': pitch,
-                    'velocity': velocity,
-                    'time': tick_on,
-                    'offset': tick_on,
-                    'duration': 1  # Default if no note_off
-                })
-            
-            if not notes:
+            if not len(notes):
+                if selection != ALL_NOTES:
+                    raise ValueError("No notes found in the selected MIDI tracks and channels")
                 raise ValueError("No notes found in MIDI file")
             
+            doublings = None
+            if selection.merge_doublings:
+                decoded_count = len(notes)
+                notes = notes.merge_doublings()
+                doublings = {
+                    'events_before': decoded_count,
+                    'events_after': len(notes),
+                    'reduction_ratio': round(1 - len(notes) / decoded_count, 4),
+                }
+            
             # Convert microseconds per beat to BPM
             # BPM = 60,000,000 / microseconds per beat
-            tempo_bpm = 60000000 / tempo_microseconds if tempo_microseconds > 0 else 120
+            # Sort by tick (stable, so track order breaks ties); MIDI defaults to 120 BPM
+            # until the first set_tempo, and the first change is the nominal tempo.
+            tempo_changes.sort(key=lambda change: change[0])
+            bpm_changes = [(tick, 60000000 / us) for tick, us in tempo_changes if us > 0]
+            tempo_map = TempoMap(bpm_changes, units_per_beat=ticks_per_beat, initial_bpm=120)
+            tempo_bpm = tempo_map.bpm_at(bpm_changes[0][0]) if bpm_changes else 120
+            
+            # Fill start_ms/end_ms for every note once
+            notes.annotate(tempo_map)
             
             # Calculate unique notes
-            pitches = [n['pitch'] for n in notes]
-            unique_pitches = list(set(pitches))
+            unique_pitches = list(set(notes.column('pitch')))
             
-            logger.info(f"MIDI parse: {len(unique_pitches)} unique notes, {len(notes)} events, tempo {tempo_bpm:.1f} BPM, ticks_per_beat {ticks_per_beat}")
+            logger.info(f"MIDI parse: {len(unique_pitches)} unique notes, {len(notes)} events, tempo {tempo_bpm:.1f} BPM ({len(tempo_map.positions)} tempo segments), ticks_per_beat {ticks_per_beat}")
             
-            return {
+            data = {
                 'notes': notes,
                 'unique_notes': unique_pitches,
                 'note_count': len(unique_pitches),
                 'total_note_events': len(notes),
                 'format': 'midi',
-                'tempo': int(tempo_bpm),
+                'tempo': int(round(tempo_bpm)),
+                'tempo_map': tempo_map.to_list(),
                 'ticks_per_beat': ticks_per_beat
             }
+            if doublings is not None:
+                data['doublings'] = doublings
+            return data
             
+        except ParseLimitExceeded:
+            raise
         except Exception as e:
             logger.error(f"Failed to parse MIDI file: {str(e)}", exc_info=True)
             raise Exception(f"Failed to parse MIDI file: {str(e)}")
     
+    @staticmethod
+    def _read_bytes(source):
+        """Return the raw bytes of a path, bytes, or file-like object"""
+        if isinstance(source, (bytes, bytearray, memoryview)):
+            return bytes(source)
+        if hasattr(source, 'read'):
+            return source.read()
+        with open(source, 'rb') as f:
+            return f.read()
+    
+    @staticmethod
+    def _decode_with_mido(data, limits=UNLIMITED, selection=ALL_NOTES):
+        """Fallback decoder: same columns as SMFDecoder.decode, built from mido messages.
+        
+        Reads the file the way mido.MidiFile does, but one track chunk at a time,
+        so only a single track's Message objects are alive at once.
+        """
+        from mido.midifiles.meta import meta_charset
+        from mido.midifiles.midifiles import read_file_header, read_track
+        
+        infile = BytesIO(data)
+        with meta_charset('latin1'):
+            _, num_tracks, ticks_per_beat = read_file_header(infile)
+        
+        tempo_changes = []
+        tracks = []
+        note_count = 0
+        
+        for track_idx in range(num_tracks):
+            with meta_charset('latin1'):
+                track = read_track(infile)
+            channels = selection.channels_for_track(track_idx)
+            current_tick = 0
+            track_notes = []  # (tick_on, pitch, velocity, duration, track) in note-on order
+            note_on_events = {}  # {pitch: index into track_notes}
+            replaced = 0
+            
+            for msg in track:
+                current_tick += msg.time
+                
+                # Extract tempo changes
+                if msg.type == 'set_tempo':
+                    tempo_changes.append((current_tick, msg.tempo))
+                
+                # Deselected tracks and channels neither start nor end notes
+                elif msg.type in ('note_on', 'note_off') and not channels[msg.channel]:
+                    continue
+                
+                # Collect note on events; a repeated note on replaces the pending one
+                elif msg.type == 'note_on' and msg.velocity > 0:
+                    if msg.note in note_on_events:
+                        track_notes[note_on_events[msg.note]] = None
+                        replaced += 1
+                    limits.check_note_events(note_count + len(track_notes) - replaced + 1)
+                    note_on_events[msg.note] = len(track_notes)
+                    track_notes.append((current_tick, msg.note, msg.velocity, 0, track_idx))
+                
+                # Process note off events or note_on with velocity 0
+                elif msg.type == 'note_off' or (msg.type == 'note_on' and msg.velocity == 0):
+                    if msg.note in note_on_events:
+                        idx = note_on_events.pop(msg.note)
+                        tick_on, pitch, velocity, _, _ = track_notes[idx]
+                        track_notes[idx] = (tick_on, pitch, velocity, max(1, current_tick - tick_on), track_idx)  # Minimum 1 tick
+            
+            # Handle any remaining note_on events without matching note_off
+            for idx in note_on_events.values():
+                tick_on, pitch, velocity, _, _ = track_notes[idx]
+                track_notes[idx] = (tick_on, pitch, velocity, 1, track_idx)  # Default if no note_off
+            tracks.append([n for n in track_notes if n is not None])
+            note_count += len(tracks[-1])
+            del track
+        
+        columns = SMFDecoder.merge_tracks(tracks)
+        columns['ticks_per_beat'] = ticks_per_beat
+        columns['tempo_changes'] = tempo_changes
+        return columns
+    
     @staticmethod
     def pitch_to_note_name(pitch):
         """Convert MIDI pitch number to note name (e.g., 60 -> C4)"""
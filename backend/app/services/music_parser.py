@@ -7,76 +7,188 @@ from app.services.file_handler import FileHandler
 from app.services.midi_parser import MIDIParser
 from app.services.musicxml_parser import MusicXMLParser
 from app.services.melody_harmony_extractor import MelodyHarmonyExtractor
+from app.services.parse_cache import ParseCache
+from app.services.parse_limits import UNLIMITED, ParseLimitExceeded
+from app.services.pitch_index import PitchIndex
+from app.services.track_selection import DEFAULT_SELECTION
+import logging
+
+logger = logging.getLogger(__name__)
 
 class MusicParser:
     """Parse MIDI and MusicXML files to extract notes and structure"""
     
-    def parse(self, filepath):
-        """Parse music file and extract notes with melody/harmony separation"""
+    def __init__(self, cache=None, disk_cache=None, onset_tolerance_ms=0, limits=None, pool=None, selection=None,
+                 deadline=None):
+        """
+        Args:
+            cache: Optional ParseCache; in-memory uploads are looked up by content
+                   hash before parsing and stored after a successful parse.
+            disk_cache: Optional DiskParseCache consulted after an in-memory miss,
+                        so parsed scores survive backend restarts.
+            onset_tolerance_ms: Notes starting within this many ms of each other
+                                count as one chord for melody extraction
+            limits: Optional ParseLimits; files over a limit raise ParseLimitExceeded
+                    while they are being decoded
+            pool: Optional ParseWorkerPool; in-memory uploads that miss the caches
+                  are parsed in its worker processes under its deadline
+            selection: Optional TrackSelection of the MIDI tracks and channels to
+                       keep (default: everything except percussion)
+            deadline: Optional time.monotonic() at which the request gives up;
+                      bounds the wait for the pool (in-thread parses are not bounded)
+        """
+        self.cache = cache
+        self.disk_cache = disk_cache
+        self.onset_tolerance_ms = onset_tolerance_ms
+        self.limits = limits or UNLIMITED
+        self.pool = pool
+        self.selection = selection or DEFAULT_SELECTION
+        self.deadline = deadline
+    
+    def parse(self, filepath, data=None):
+        """Parse music file and extract notes with melody/harmony separation
+        
+        Args:
+            filepath: Path to the music file, or just its filename when ``data`` is given
+            data: Optional in-memory file contents (bytes or file-like). When provided
+                  the file is parsed directly from memory and ``filepath`` is only used
+                  to determine the file type.
+        """
         try:
             file_type = FileHandler.get_file_type(filepath)
         except ValueError as e:
             raise ValueError(f"Invalid file: {str(e)}")
         
-        if file_type == 'midi':
-            return self._parse_midi(filepath)
+        if data is not None and hasattr(data, 'read'):
+            data = data.read()
+        
+        cache_key = None
+        if data is not None and (self.cache is not None or self.disk_cache is not None):
+            cache_key = self.cache_key(filepath, data)
+            cached = self.load_cached(cache_key)
+            if cached is not None:
+                logger.info(f"Parse cache hit for {filepath} ({cache_key[:24]})")
+                return cached
+        
+        source = data if data is not None else filepath
+        
+        if self.pool is not None and data is not None:
+            music_data = self.pool.parse(filepath, data, self.onset_tolerance_ms, self.limits, self.selection,
+                                         deadline=self.deadline)
+        elif file_type == 'midi':
+            music_data = self._parse_midi(source)
         elif file_type == 'musicxml':
-            return self._parse_musicxml(filepath)
+            music_data = self._parse_musicxml(source)
         else:
             raise ValueError(f"Unknown file type: {file_type}")
+        
+        if cache_key is not None:
+            if self.cache is not None:
+                self.cache.put(cache_key, music_data)
+            if self.disk_cache is not None:
+                self.disk_cache.put(cache_key, music_data)
+        
+        return music_data
     
-    def _parse_midi(self, filepath):
+    def cache_key(self, filepath, data):
+        """Cache key of file contents (bytes) under this parser's options"""
+        file_type = FileHandler.get_file_type(filepath)
+        tracks = self.selection.key() if file_type == 'midi' else ''
+        return ParseCache.make_key(data, file_type, onset=self.onset_tolerance_ms, tracks=tracks)
+
+    def load_cached(self, cache_key):
+        """
+        Return the music_data cached under a key from cache_key(), or None.
+
+        Lets a later request reuse a score parsed by an earlier one without
+        sending the file again.  Raises ParseLimitExceeded if the entry is over
+        the current limits (entries may predate a lower limit).
+        """
+        cached = self._get_cached(cache_key)
+        if cached is not None:
+            self.limits.check_note_events(cached['total_note_events'])
+            self.limits.check_unique_pitches(cached['note_count'])
+        return cached
+
+    def _get_cached(self, cache_key):
+        """Look up parsed data in memory first, then on disk (promoting disk hits)"""
+        if self.cache is not None:
+            cached = self.cache.get(cache_key)
+            if cached is not None:
+                return cached
+        if self.disk_cache is not None:
+            cached = self.disk_cache.get(cache_key)
+            if cached is not None:
+                if self.cache is not None:
+                    self.cache.put(cache_key, cached)
+                return cached
+        return None
+    
+    def _parse_midi(self, source):
         """Parse MIDI file and extract notes"""
         try:
-            data = MIDIParser.parse(filepath)
-            
-            # Extract melody and harmony
-            melody_harmony = MelodyHarmonyExtractor.extract(data['notes'])
+            data = MIDIParser.parse(source, self.limits, self.selection)
             
-            # Get frequencies
-            frequencies = MelodyHarmonyExtractor.get_note_frequencies(data['notes'])
+            # Extract melody and harmony, and note frequencies, in one pass
+            melody_harmony = self._extract_melody(data['notes'])
             
-            return {
+            music_data = {
                 'notes': data['notes'],
+                'pitch_index': PitchIndex(data['notes']),
                 'unique_notes': data['unique_notes'],
                 'note_count': data['note_count'],
                 'total_note_events': data['total_note_events'],
                 'melody_pitches': melody_harmony['melody_pitches'],
                 'harmony_pitches': melody_harmony['harmony_pitches'],
-                'frequencies': frequencies,
+                'frequencies': melody_harmony['frequencies'],
                 'format': 'midi',
                 'tempo': data.get('tempo', 120),
+                'tempo_map': data.get('tempo_map', []),
                 'ticks_per_beat': data.get('ticks_per_beat', 480)
             }
+            if 'doublings' in data:
+                music_data['doublings'] = data['doublings']
+            return music_data
+        except ParseLimitExceeded:
+            raise
         except Exception as e:
             raise Exception(f"Error parsing MIDI file: {str(e)}")
     
-    def _parse_musicxml(self, filepath):
+    def _parse_musicxml(self, source):
         """Parse MusicXML file and extract notes"""
         try:
-            data = MusicXMLParser.parse(filepath)
-            
-            # Extract melody and harmony
-            melody_harmony = MelodyHarmonyExtractor.extract(data['notes'])
+            data = MusicXMLParser.parse(source, self.limits)
             
-            # Get frequencies
-            frequencies = MelodyHarmonyExtractor.get_note_frequencies(data['notes'])
+            # Extract melody and harmony, and note frequencies, in one pass
+            melody_harmony = self._extract_melody(data['notes'])
             
             return {
                 'notes': data['notes'],
+                'pitch_index': PitchIndex(data['notes']),
                 'unique_notes': data['unique_notes'],
                 'note_count': data['note_count'],
                 'total_note_events': data['total_note_events'],
                 'melody_pitches': melody_harmony['melody_pitches'],
                 'harmony_pitches': melody_harmony['harmony_pitches'],
-                'frequencies': frequencies,
+                'frequencies': melody_harmony['frequencies'],
                 'chords': data.get('chords', []),
                 'format': 'musicxml',
-                'tempo': data.get('tempo', 120)
+                'tempo': data.get('tempo', 120),
+                'tempo_map': data.get('tempo_map', [])
             }
+        except ParseLimitExceeded:
+            raise
         except Exception as e:
             raise Exception(f"Error parsing MusicXML file: {str(e)}")
     
+    def _extract_melody(self, notes):
+        """Split melody from harmony and store the result as the NoteTable melody column"""
+        melody_harmony = MelodyHarmonyExtractor.extract_masks(
+            notes, onset_tolerance=self.onset_tolerance_ms, tolerance_unit='ms'
+        )
+        notes.set('melody', melody_harmony['melody'])
+        return melody_harmony
+    
     @staticmethod
     def pitch_to_note_name(pitch):
         """Convert MIDI pitch number to note name"""
@@ -0,0 +1,88 @@
+"""
+Music Profile
+Per-pitch statistics of a score, computed in one pass and shared by every strategy.
+
+The strategies and scorers all ask the same questions about each pitch: how
+often it is played, how long it rings, how much work it is for the player
+holding it.  MusicProfile answers them once per score from the PitchIndex
+columns (a few bincounts and reductions over the pitch groups) instead of
+every strategy and every scored arrangement walking the notes again.
+PitchIndex.profile() builds it on first use and keeps it with the index, so
+it lives as long as the parsed score does.
+
+Every statistic is a list indexed by MIDI pitch (0-255); pitches absent from
+the score have zeros.  Durations are clipped at zero.
+"""
+
+
+class MusicProfile:
+    """Per-pitch note statistics over a PitchIndex"""
+
+    def __init__(self, pitch_index):
+        """
+        Args:
+            pitch_index: PitchIndex of the score
+        """
+        import numpy as np
+        from app.services.simulation_builder import SimulationBuilder
+
+        notes = pitch_index.notes
+        self.pitches = list(pitch_index.pitches)
+
+        weight_by_pitch = np.zeros(256)
+        for pitch in self.pitches:
+            weight_by_pitch[pitch] = SimulationBuilder.get_bell_weight_oz(pitch)
+        self.weight_oz = weight_by_pitch.tolist()
+
+        # Totals are bincounts over the score-order columns, so each pitch's
+        # notes are summed in time order
+        pitches = notes.pitch
+        ring_ms = np.maximum(notes.end_ms - notes.start_ms, 0.0)
+        ring_units = np.maximum(notes.duration, 0.0)
+        weights = weight_by_pitch[pitches]
+
+        self.count = np.bincount(pitches, minlength=256).tolist()
+        self.ring_ms = np.bincount(pitches, weights=ring_ms, minlength=256).tolist()
+        self.ring_units = np.bincount(pitches, weights=ring_units, minlength=256).tolist()
+        self.fatigue = np.bincount(pitches, weights=ring_ms * weights, minlength=256).tolist()
+        self.fatigue_units = np.bincount(pitches, weights=ring_units * weights, minlength=256).tolist()
+        melody_counts = np.bincount(pitches, weights=notes.melody, minlength=256)
+
+        # Onset statistics from the index's time-ordered pitch groups
+        first_onset = np.zeros(256)
+        last_onset = np.zeros(256)
+        mean_gap = np.zeros(256)
+        melody_share = np.zeros(256)
+        bounds = pitch_index.bounds
+        starts = pitch_index.start_ms
+        for pitch in self.pitches:
+            lo, hi = bounds[pitch], bounds[pitch + 1]
+            first_onset[pitch] = starts[lo]
+            last_onset[pitch] = starts[hi - 1]
+            if hi - lo > 1:
+                mean_gap[pitch] = (starts[hi - 1] - starts[lo]) / (hi - lo - 1)
+            melody_share[pitch] = melody_counts[pitch] / (hi - lo)
+        self.first_onset_ms = first_onset.tolist()
+        self.last_onset_ms = last_onset.tolist()
+        self.mean_gap_ms = mean_gap.tolist()
+        self.melody_share = melody_share.tolist()
+
+    def activity(self, timed=True):
+        """Per-pitch total ring time: ms when timed, raw score units otherwise"""
+        return self.ring_ms if timed else self.ring_units
+
+    def weighted_fatigue(self, timed=True):
+        """Per-pitch ring time × bell weight (oz): ms-based when timed, score units otherwise"""
+        return self.fatigue if timed else self.fatigue_units
+
+    def stats(self, pitch):
+        """Every statistic for one pitch as a dict"""
+        return {
+            'count': self.count[pitch],
+            'ring_ms': self.ring_ms[pitch],
+            'fatigue': self.fatigue[pitch],
+            'first_onset_ms': self.first_onset_ms[pitch],
+            'last_onset_ms': self.last_onset_ms[pitch],
+            'mean_gap_ms': self.mean_gap_ms[pitch],
+            'melody_share': self.melody_share[pitch],
+        }
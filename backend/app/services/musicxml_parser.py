@@ -1,94 +1,153 @@
 """
 MusicXML File Parser
 Extracts notes, timing, chords, and structure from MusicXML files.
+
+music21 is imported on first use: its import and environment setup are the
+slowest part of backend startup, and most uploads never need it.
 """
 
-from music21 import converter, note, chord
+import logging
+import xml.etree.ElementTree as ET
+
+from app.services.musicxml_stream_parser import MusicXMLStreamParser, TieChains, UnsupportedMusicXML
+from app.services.mxl_container import MXLContainer
+from app.services.note_table import NoteTable
+from app.services.parse_limits import UNLIMITED, ParseLimitExceeded
+from app.services.tempo_map import TempoMap
+
+logger = logging.getLogger(__name__)
 
 class MusicXMLParser:
     """Parse MusicXML files"""
     
     @staticmethod
-    def parse(filepath):
+    def parse(source, limits=UNLIMITED):
         """
         Parse MusicXML file and extract notes with timing and chord information.
         
+        Common partwise scores are read by the streaming MusicXMLStreamParser;
+        anything it does not model falls back to the full music21 parser.
+        Compressed (.mxl) archives are recognised by content and their root
+        score is decompressed as it is parsed.
+        
         Args:
-            filepath: Path to MusicXML file
+            source: Path to a MusicXML or .mxl file, its raw bytes, or a file-like object
+            limits: ParseLimits enforced while notes are collected
             
         Returns:
-            Dict with notes list and metadata
+            Dict with a NoteTable of notes (in offset order) and metadata
             
         Raises:
+            ParseLimitExceeded: If the score is over a limit
             Exception: If file cannot be parsed
         """
         try:
-            score = converter.parse(filepath)
+            if hasattr(source, 'read'):
+                source = source.read()
             
-            notes = []
-            chords_info = []
+            compressed = MXLContainer.is_container(source)
+            stream = MXLContainer.open_score(source) if compressed else source
+            try:
+                data = MusicXMLStreamParser.parse(stream, limits)
+            except (UnsupportedMusicXML, ET.ParseError) as e:
+                logger.debug(f"MusicXML fast path declined ({e}), using music21")
+                score = MXLContainer.read_score(source) if compressed else source
+                data = MusicXMLParser._parse_with_music21(score, limits)
+            finally:
+                if compressed:
+                    stream.close()
+            
+            # Store notes as a NoteTable (already in offset order) with start_ms/end_ms
+            # filled once, following metronome changes
+            tempo_map = TempoMap(data.pop('tempo_changes', ()), units_per_beat=1, initial_bpm=data['tempo'])
+            data['notes'] = NoteTable.from_dicts(data['notes'], 'musicxml').annotate(tempo_map)
+            data['tempo_map'] = tempo_map.to_list()
+            return data
             
-            # Extract all note elements
-            for element in score.flatten().notesAndRests:
-                if isinstance(element, chord.Chord):
-                    # Handle chords
-                    chord_pitches = [p.midi for p in element.pitches]
-                    chord_entry = {
-                        'pitches': chord_pitches,
+        except ParseLimitExceeded:
+            raise
+        except Exception as e:
+            raise Exception(f"Failed to parse MusicXML file: {str(e)}")
+    
+    @staticmethod
+    def _parse_with_music21(source, limits=UNLIMITED):
+        """Parse MusicXML (path or bytes) through the full music21 object model"""
+        from music21 import converter, note, chord
+        from music21 import tempo as tempo_module
+        
+        if isinstance(source, (bytes, bytearray, memoryview)):
+            score = converter.parseData(bytes(source), format='musicxml')
+        else:
+            score = converter.parse(source)
+        
+        notes = []
+        chords_info = []
+        chains = TieChains()
+        # Tie chains are per part; the flattened stream keeps the same note objects
+        part_of = {id(n): i for i, part in enumerate(score.parts) for n in part.recurse().notes}
+        
+        # Extract all note elements, merging tied segments into one event
+        for element in score.flatten().notesAndRests:
+            part = part_of.get(id(element), 0)
+            if isinstance(element, chord.Chord):
+                # Handle chords
+                struck = []
+                for member in element.notes:
+                    tie = member.tie.type if member.tie is not None else None
+                    if chains.add(notes, part, member.pitch.midi, element.offset,
+                                  element.duration.quarterLength, tie, True):
+                        struck.append(member.pitch.midi)
+                if struck:
+                    chords_info.append({
+                        'pitches': struck,
                         'duration': element.duration.quarterLength,
                         'offset': element.offset,
                         'type': 'chord'
-                    }
-                    chords_info.append(chord_entry)
-                    
-                    # Add individual notes from chord
-                    for pitch in element.pitches:
-                        notes.append({
-                            'pitch': pitch.midi,
-                            'duration': element.duration.quarterLength,
-                            'offset': element.offset,
-                            'is_chord_member': True
-                        })
-                
-                elif isinstance(element, note.Note):
-                    # Handle single notes
-                    notes.append({
-                        'pitch': element.pitch.midi,
-                        'duration': element.duration.quarterLength,
-                        'offset': element.offset,
-                        'is_chord_member': False
                     })
             
-            if not notes:
-                raise ValueError("No notes found in MusicXML file")
+            elif isinstance(element, note.Note):
+                # Handle single notes
+                tie = element.tie.type if element.tie is not None else None
+                chains.add(notes, part, element.pitch.midi, element.offset,
+                           element.duration.quarterLength, tie, False)
             
-            # Calculate unique notes
-            pitches = [n['pitch'] for n in notes]
-            unique_pitches = list(set(pitches))
-            
-            # Get tempo info - search for MetronomeMark elements
-            tempo = 120  # Default tempo in BPM
-            try:
-                from music21 import tempo as tempo_module
-                metronome_marks = score.flatten().getElementsByClass(tempo_module.MetronomeMark)
-                if metronome_marks:
-                    tempo = int(metronome_marks[0].number)
-            except Exception:
-                # If MetronomeMark extraction fails, keep default
-                pass
-            
-            return {
-                'notes': notes,
-                'unique_notes': unique_pitches,
-                'note_count': len(unique_pitches),
-                'total_note_events': len(notes),
-                'chords': chords_info,
-                'format': 'musicxml',
-                'tempo': tempo
-            }
-            
-        except Exception as e:
-            raise Exception(f"Failed to parse MusicXML file: {str(e)}")
+            limits.check_note_events(len(notes))
+        
+        if not notes:
+            raise ValueError("No notes found in MusicXML file")
+        
+        # Calculate unique notes
+        pitches = [n['pitch'] for n in notes]
+        unique_pitches = list(set(pitches))
+        limits.check_unique_pitches(len(unique_pitches))
+        
+        # Get tempo info - search for MetronomeMark elements
+        tempo = 120  # Default tempo in BPM
+        tempo_changes = []  # [(offset, bpm)], first mark per offset
+        metronome_marks = []
+        try:
+            metronome_marks = score.flatten().getElementsByClass(tempo_module.MetronomeMark)
+            if metronome_marks:
+                tempo = int(metronome_marks[0].number or metronome_marks[0].numberSounding)
+        except Exception:
+            # If MetronomeMark extraction fails, keep default
+            pass
+        for mark in metronome_marks:
+            number = mark.number or mark.numberSounding
+            offset = float(mark.offset)
+            if number and (not tempo_changes or tempo_changes[-1][0] != offset):
+                tempo_changes.append((offset, float(number)))
+        
+        return {
+            'notes': notes,
+            'unique_notes': unique_pitches,
+            'note_count': len(unique_pitches),
+            'total_note_events': len(notes),
+            'chords': chords_info,
+            'format': 'musicxml',
+            'tempo': tempo,
+            'tempo_changes': tempo_changes
+        }
     
     @staticmethod
     def pitch_to_note_name(pitch):
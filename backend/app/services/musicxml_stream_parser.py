@@ -0,0 +1,448 @@
+"""
+Streaming MusicXML Parser
+Fast path that extracts notes, chords and tempo from partwise MusicXML with
+ElementTree.iterparse instead of building a full music21 object model.
+
+Each <measure> is processed when its end tag is seen and then discarded, so
+memory stays flat regardless of score length; note events and distinct
+pitches are checked against ParseLimits after every measure.  Offsets, durations and note
+order follow music21's conventions (quarter lengths, flattened score order)
+so results are interchangeable with MusicXMLParser's music21 path.
+
+Tied segments (<tie> start/stop) are merged into a single event spanning the
+whole chain, in both paths, via TieChains: a sustained note across a barline
+is rung once, not once per measure.
+
+Files using constructs this parser does not model (grace/cue notes, chord
+symbols, unpitched percussion, microtones, timewise scores, ...) raise
+UnsupportedMusicXML so the caller can fall back to music21.
+"""
+
+import xml.etree.ElementTree as ET
+from fractions import Fraction
+from io import BytesIO
+
+from app.services.parse_limits import UNLIMITED
+
+_STEP_SEMITONES = {'C': 0, 'D': 2, 'E': 4, 'F': 5, 'G': 7, 'A': 9, 'B': 11}
+
+# Displayed accidentals and the alteration they imply; music21 honours <accidental>
+# when it disagrees with <alter>, so such notes are left to the music21 path.
+_ACCIDENTAL_ALTER = {
+    'sharp': 1, 'natural': 0, 'flat': -1,
+    'double-sharp': 2, 'sharp-sharp': 2, 'flat-flat': -2, 'double-flat': -2,
+}
+
+# Elements that change what music21 reports as notes, or how offsets are derived
+_UNSUPPORTED_MEASURE_CHILDREN = {'harmony', 'figured-bass'}
+
+
+class UnsupportedMusicXML(Exception):
+    """Raised when a file needs the full music21 parser"""
+
+
+def _local(tag):
+    """Strip an XML namespace from a tag name"""
+    return tag.rsplit('}', 1)[-1] if '}' in tag else tag
+
+
+def _op_frac(value):
+    """Mirror music21's opFrac: float when exactly representable, else Fraction"""
+    denominator = value.denominator
+    if denominator & (denominator - 1) == 0:
+        return float(value)
+    return value
+
+
+def _number(text, what):
+    if text is None or not text.strip():
+        raise UnsupportedMusicXML(f"missing {what}")
+    try:
+        return Fraction(text.strip())
+    except ValueError:
+        raise UnsupportedMusicXML(f"non-numeric {what}: {text!r}")
+
+
+class TieChains:
+    """
+    Merge tie chains into single note events.
+
+    Segments must be added in offset order.  A chain is keyed by part and
+    pitch; a 'stop' or 'continue' segment that starts exactly where its
+    chain ends lengthens the chain's first note instead of adding a note.
+    Segments that continue nothing (a dangling tie) are kept as notes.
+    """
+
+    _STARTS = ('start', 'continue')
+
+    def __init__(self):
+        self._open = {}  # (part, pitch) -> (note dict, end offset as Fraction)
+
+    def add(self, notes, part, pitch, offset, duration, tie, is_chord_member):
+        """
+        Append one segment to notes, or merge it into the chain it continues.
+
+        Args:
+            notes: Note dict list being built
+            part: Part index
+            pitch: MIDI pitch
+            offset: Onset in quarter lengths (Fraction or float)
+            duration: Length in quarter lengths (Fraction or float)
+            tie: 'start', 'continue', 'stop' or None
+            is_chord_member: Whether the segment belongs to a chord
+
+        Returns:
+            True if a new note was appended, False if the segment was merged
+        """
+        key = (part, pitch)
+        offset = Fraction(offset)
+        end = offset + Fraction(duration)
+        chain = self._open.pop(key, None)
+        if chain is not None and tie in ('stop', 'continue') and chain[1] == offset:
+            head = chain[0]
+            head['duration'] = _op_frac(end - Fraction(head['offset']))
+            if tie == 'continue':
+                self._open[key] = (head, end)
+            return False
+
+        note = {
+            'pitch': pitch,
+            'duration': _op_frac(Fraction(duration)),
+            'offset': _op_frac(offset),
+            'is_chord_member': is_chord_member
+        }
+        notes.append(note)
+        if tie in self._STARTS:
+            self._open[key] = (note, end)
+        return True
+
+
+def _tie_type(note_elem):
+    """Tie role of a <note> from its <tie> elements (<tied> is notation only)"""
+    types = {tie.get('type') for tie in note_elem.findall('tie')}
+    if 'start' in types:
+        return 'continue' if 'stop' in types else 'start'
+    return 'stop' if 'stop' in types else None
+
+
+class MusicXMLStreamParser:
+    """Parse common partwise MusicXML without music21"""
+
+    @staticmethod
+    def parse(source, limits=UNLIMITED):
+        """
+        Parse MusicXML from a path, bytes, or file-like object.
+
+        Args:
+            source: Path, bytes, or binary file-like object
+            limits: ParseLimits checked after each measure
+
+        Returns:
+            Dict with the same shape as MusicXMLParser.parse
+
+        Raises:
+            ParseLimitExceeded: As soon as the score is over a limit
+            UnsupportedMusicXML: If the file needs the music21 parser
+            xml.etree.ElementTree.ParseError: If the XML is malformed
+            ValueError: If the score contains no notes
+        """
+        if isinstance(source, (bytes, bytearray, memoryview)):
+            source = BytesIO(bytes(source))
+
+        elements = []   # (sort_key, onset, duration, pitches, is_chord, ties)
+        tempos = []     # (sort_key, number)
+        part_idx = -1
+        part_elem = None
+        state = None
+        doc_idx = 0
+        note_count = 0
+        seen_pitches = set()
+
+        for event, elem in ET.iterparse(source, events=('start', 'end')):
+            tag = _local(elem.tag)
+
+            if event == 'start':
+                if doc_idx == 0 and tag != 'score-partwise':
+                    raise UnsupportedMusicXML(f"unsupported root element <{tag}>")
+                doc_idx += 1
+                if tag == 'part':
+                    part_idx += 1
+                    part_elem = elem
+                    state = {
+                        'divisions': None,
+                        'bar_length': Fraction(4),
+                        'measure_offset': Fraction(0),
+                        'measure_idx': 0,
+                    }
+                continue
+
+            if tag == 'measure' and state is not None:
+                first = len(elements)
+                MusicXMLStreamParser._parse_measure(elem, part_idx, state, elements, tempos)
+                for i in range(first, len(elements)):
+                    note_count += len(elements[i][3])
+                    seen_pitches.update(elements[i][3])
+                limits.check_note_events(note_count)
+                limits.check_unique_pitches(len(seen_pitches))
+                elem.clear()
+                if part_elem is not None:
+                    part_elem.remove(elem)
+            elif tag == 'part':
+                elem.clear()
+                part_elem = None
+                state = None
+
+        if not elements:
+            raise ValueError("No notes found in MusicXML file")
+
+        elements.sort(key=lambda e: e[0])
+
+        notes = []
+        chords_info = []
+        chains = TieChains()
+        for key, onset, dur, pitches, is_chord, ties in elements:
+            struck = [
+                p for p, tie in zip(pitches, ties)
+                if chains.add(notes, key[1], p, onset, dur, tie, is_chord)
+            ]
+            if is_chord and struck:
+                chords_info.append({
+                    'pitches': struck,
+                    'duration': _op_frac(dur),
+                    'offset': _op_frac(onset),
+                    'type': 'chord'
+                })
+
+        tempos.sort(key=lambda t: t[0])
+        tempo = 120  # Default tempo in BPM
+        if tempos and tempos[0][1] is not None:
+            tempo = int(tempos[0][1])
+
+        # One tempo per offset (the first in score order), for the tempo map
+        tempo_changes = []
+        for key, number in tempos:
+            if number is None:
+                continue
+            offset = float(key[0])
+            if not tempo_changes or tempo_changes[-1][0] != offset:
+                tempo_changes.append((offset, number))
+
+        pitches = [n['pitch'] for n in notes]
+        unique_pitches = list(set(pitches))
+
+        return {
+            'notes': notes,
+            'unique_notes': unique_pitches,
+            'note_count': len(unique_pitches),
+            'total_note_events': len(notes),
+            'chords': chords_info,
+            'format': 'musicxml',
+            'tempo': tempo,
+            'tempo_changes': tempo_changes
+        }
+
+    @staticmethod
+    def _parse_measure(measure, part_idx, state, elements, tempos):
+        """Collect notes and tempo marks from one <measure> and advance the part offset"""
+        children = list(measure)
+
+        voices = set()
+        for child in children:
+            if _local(child.tag) in ('note', 'forward'):
+                voice = child.find('voice')
+                if voice is not None and voice.text and voice.text.strip():
+                    voices.add(voice.text.strip())
+        # music21 only creates Voice streams when a measure has more than one voice
+        voice_rank = {v: i for i, v in enumerate(sorted(voices))} if len(voices) > 1 else None
+
+        cursor = Fraction(0)
+        highest = Fraction(0)
+        last_direction = Fraction(0)
+        has_notes_or_rests = False
+        group = None  # current note/chord being built: [onset, dur, pitches, staff, voice, doc, ties]
+        measure_groups = []
+        doc = 0
+
+        def close_group():
+            nonlocal group
+            if group is not None:
+                measure_groups.append(group)
+                group = None
+
+        for child in children:
+            doc += 1
+            tag = _local(child.tag)
+
+            if tag in _UNSUPPORTED_MEASURE_CHILDREN:
+                raise UnsupportedMusicXML(f"<{tag}> elements")
+
+            if tag == 'attributes':
+                MusicXMLStreamParser._parse_attributes(child, state)
+
+            elif tag == 'note':
+                if child.find('grace') is not None or child.find('cue') is not None:
+                    raise UnsupportedMusicXML("grace or cue notes")
+                if child.find('unpitched') is not None:
+                    raise UnsupportedMusicXML("unpitched notes")
+                if state['divisions'] is None:
+                    raise UnsupportedMusicXML("note before <divisions>")
+
+                dur = _number(child.findtext('duration'), 'note duration') / state['divisions']
+                if dur == 0:
+                    raise UnsupportedMusicXML("zero-length note")
+                is_rest = child.find('rest') is not None
+                in_chord = child.find('chord') is not None
+                has_notes_or_rests = True
+
+                voice_text = (child.findtext('voice') or '').strip()
+                if voice_rank is not None and voice_text not in voice_rank:
+                    raise UnsupportedMusicXML("note without voice in multi-voice measure")
+                rank = voice_rank[voice_text] if voice_rank is not None else 0
+                staff = int(_number(child.findtext('staff') or '1', 'staff'))
+
+                if in_chord:
+                    if group is None or is_rest:
+                        raise UnsupportedMusicXML("chord continuation without a pitched note")
+                    group[2].append(MusicXMLStreamParser._midi_pitch(child))
+                    group[6].append(_tie_type(child))
+                    continue
+
+                close_group()
+                onset = cursor
+                cursor += dur
+                highest = max(highest, cursor)
+                if is_rest:
+                    continue
+                group = [onset, dur, [MusicXMLStreamParser._midi_pitch(child)], staff, rank, doc,
+                         [_tie_type(child)]]
+
+            elif tag in ('backup', 'forward') and state['divisions'] is None:
+                raise UnsupportedMusicXML(f"<{tag}> before <divisions>")
+
+            elif tag == 'backup':
+                close_group()
+                cursor = max(Fraction(0), cursor - _number(child.findtext('duration'), 'backup duration') / state['divisions'])
+
+            elif tag == 'forward':
+                close_group()
+                # music21 inserts a hidden spacer rest, which counts toward the measure length
+                step = _number(child.findtext('duration'), 'forward duration')
+                if step == 0:
+                    raise UnsupportedMusicXML("zero-length forward")  # music21 reads it as a quarter rest
+                cursor += step / state['divisions']
+                highest = max(highest, cursor)
+                has_notes_or_rests = True
+
+            elif tag == 'direction':
+                close_group()
+                position = MusicXMLStreamParser._parse_direction(child, part_idx, state, cursor, doc, tempos)
+                last_direction = max(last_direction, position)
+
+            elif tag == 'sound':
+                close_group()
+                if 'tempo' in child.attrib:
+                    key = (state['measure_offset'] + cursor, part_idx, 1, state['measure_idx'], doc)
+                    tempos.append((key, float(_number(child.get('tempo'), 'sound tempo'))))
+
+            else:
+                close_group()
+
+        close_group()
+
+        if last_direction > highest:
+            # Offset directions past the last note lengthen the measure in music21
+            raise UnsupportedMusicXML("direction placed beyond measure content")
+
+        measure_offset = state['measure_offset']
+        for onset, dur, pitches, staff, rank, gdoc, ties in measure_groups:
+            absolute = measure_offset + onset
+            key = (absolute, part_idx, staff, state['measure_idx'], rank, gdoc)
+            elements.append((key, absolute, dur, pitches, len(pitches) > 1, ties))
+
+        state['measure_offset'] = measure_offset + MusicXMLStreamParser._measure_shift(
+            highest, state['bar_length'], has_notes_or_rests
+        )
+        state['measure_idx'] += 1
+
+    @staticmethod
+    def _measure_shift(highest, bar_length, has_notes_or_rests):
+        """Length by which a measure advances the part, following music21's importer"""
+        if highest == bar_length:
+            return highest
+        if highest > bar_length:
+            diff = highest - bar_length
+            if diff > Fraction(1, 2) or (diff * 16).denominator == 1 or (diff * 12).denominator == 1:
+                return highest
+            return bar_length
+        if highest == 0 and not has_notes_or_rests:
+            return bar_length  # empty measure is read as a full-bar rest
+        return highest
+
+    @staticmethod
+    def _parse_attributes(attributes, state):
+        divisions = attributes.findtext('divisions')
+        if divisions is not None:
+            value = _number(divisions, 'divisions')
+            if value <= 0:
+                raise UnsupportedMusicXML("non-positive divisions")
+            state['divisions'] = value
+
+        time = attributes.find('time')
+        if time is not None:
+            if time.find('senza-misura') is not None:
+                raise UnsupportedMusicXML("senza-misura time")
+            beats = time.findtext('beats')
+            beat_type = time.findtext('beat-type')
+            if beats is None or beat_type is None or '+' in beats or '+' in beat_type:
+                raise UnsupportedMusicXML("composite time signature")
+            state['bar_length'] = _number(beats, 'beats') * 4 / _number(beat_type, 'beat-type')
+
+    @staticmethod
+    def _parse_direction(direction, part_idx, state, cursor, doc, tempos):
+        """Record metronome marks / sound tempo and return the direction's measure position"""
+        offset = cursor
+        offset_text = direction.findtext('offset')
+        if offset_text is not None and state['divisions'] is not None:
+            offset += _number(offset_text, 'direction offset') / state['divisions']
+        staff = int(_number(direction.findtext('staff') or '1', 'staff'))
+        key = (state['measure_offset'] + offset, part_idx, staff, state['measure_idx'], doc)
+
+        metronome_found = False
+        for direction_type in direction.findall('direction-type'):
+            for metronome in direction_type.findall('metronome'):
+                metronome_found = True
+                if len(metronome.findall('beat-unit')) > 1:
+                    raise UnsupportedMusicXML("metric modulation")
+                per_minute = metronome.findtext('per-minute')
+                number = None
+                if per_minute is not None and per_minute.strip():
+                    try:
+                        number = float(per_minute)
+                    except ValueError:
+                        number = None
+                tempos.append((key, number))
+
+        if not metronome_found:
+            for sound in direction.findall('sound'):
+                if 'tempo' in sound.attrib:
+                    tempos.append((key, float(_number(sound.get('tempo'), 'sound tempo'))))
+                    break
+
+        return offset
+
+    @staticmethod
+    def _midi_pitch(note_elem):
+        pitch = note_elem.find('pitch')
+        if pitch is None:
+            raise UnsupportedMusicXML("note without pitch")
+        step = (pitch.findtext('step') or '').strip().upper()
+        if step not in _STEP_SEMITONES:
+            raise UnsupportedMusicXML(f"invalid step {step!r}")
+        alter = _number(pitch.findtext('alter') or '0', 'alter')
+        if alter.denominator != 1:
+            raise UnsupportedMusicXML("microtonal alter")
+        accidental = (note_elem.findtext('accidental') or '').strip()
+        if accidental and _ACCIDENTAL_ALTER.get(accidental) != alter:
+            raise UnsupportedMusicXML(f"accidental {accidental!r} disagrees with alter")
+        octave = int(_number(pitch.findtext('octave'), 'octave'))
+        return (octave + 1) * 12 + _STEP_SEMITONES[step] + int(alter)
@@ -0,0 +1,116 @@
+"""
+MXL Container
+Reads the root score out of compressed MusicXML (.mxl) archives.
+
+An .mxl file is a zip archive whose META-INF/container.xml names the root
+score; the first <rootfile> is the score itself (later ones may be alternate
+renderings such as PDFs).  The score member is decompressed as a stream
+straight into the MusicXML parser, so nothing is extracted to disk and the
+streaming parser never holds the whole document.  Archives without a
+container fall back to the first MusicXML member outside META-INF.
+
+Decompressed size is capped: an .mxl that fits under MAX_CONTENT_LENGTH can
+inflate to far more than any real score.
+"""
+
+import xml.etree.ElementTree as ET
+import zipfile
+from io import BytesIO
+
+_ZIP_MAGIC = b'PK\x03\x04'
+_CONTAINER = 'META-INF/container.xml'
+_MUSICXML_TYPES = {'application/vnd.recordare.musicxml+xml', 'application/vnd.recordare.musicxml'}
+_MAX_SCORE_BYTES = 200 * 1024 * 1024
+
+
+class InvalidMXL(ValueError):
+    """Raised when an .mxl archive has no readable MusicXML score"""
+
+
+class _BoundedReader:
+    """File-like wrapper that fails once more than limit bytes have been read"""
+
+    def __init__(self, stream, limit):
+        self._stream = stream
+        self._remaining = limit
+
+    def read(self, size=-1):
+        data = self._stream.read(size)
+        self._remaining -= len(data)
+        if self._remaining < 0:
+            raise InvalidMXL("Compressed score expands beyond the supported size")
+        return data
+
+    def close(self):
+        self._stream.close()
+
+
+class MXLContainer:
+    """Locate and stream the root MusicXML score of an .mxl archive"""
+
+    @staticmethod
+    def is_container(source):
+        """True if source (bytes, or a path) is a zip archive rather than plain XML"""
+        if isinstance(source, (bytes, bytearray, memoryview)):
+            return bytes(source[:4]) == _ZIP_MAGIC
+        if isinstance(source, str):
+            with open(source, 'rb') as f:
+                return f.read(4) == _ZIP_MAGIC
+        return False
+
+    @staticmethod
+    def open_score(source, max_bytes=_MAX_SCORE_BYTES):
+        """
+        Open the root score of an .mxl archive for streaming.
+
+        Args:
+            source: Archive bytes or path
+            max_bytes: Largest decompressed score accepted
+
+        Returns:
+            Binary file-like object yielding the score's MusicXML as it inflates
+
+        Raises:
+            InvalidMXL: If the archive is corrupt, has no score, or the score is too large
+        """
+        if isinstance(source, (bytes, bytearray, memoryview)):
+            source = BytesIO(bytes(source))
+        try:
+            archive = zipfile.ZipFile(source)
+            info = archive.getinfo(MXLContainer._root_path(archive))
+        except (zipfile.BadZipFile, KeyError) as e:
+            raise InvalidMXL(f"Invalid .mxl archive: {e}")
+        if info.file_size > max_bytes:
+            raise InvalidMXL("Compressed score expands beyond the supported size")
+        return _BoundedReader(archive.open(info), max_bytes)
+
+    @staticmethod
+    def read_score(source, max_bytes=_MAX_SCORE_BYTES):
+        """The root score's MusicXML bytes, fully decompressed"""
+        stream = MXLContainer.open_score(source, max_bytes)
+        try:
+            return stream.read()
+        finally:
+            stream.close()
+
+    @staticmethod
+    def _root_path(archive):
+        """Archive path of the root score, from container.xml when present"""
+        names = archive.namelist()
+        if _CONTAINER in names:
+            try:
+                root = ET.fromstring(archive.read(_CONTAINER))
+            except ET.ParseError as e:
+                raise InvalidMXL(f"Unreadable {_CONTAINER}: {e}")
+            for elem in root.iter():
+                if elem.tag.rsplit('}', 1)[-1] != 'rootfile':
+                    continue
+                media_type = elem.get('media-type')
+                if elem.get('full-path') and (media_type is None or media_type in _MUSICXML_TYPES):
+                    return elem.get('full-path')
+            raise InvalidMXL(f"{_CONTAINER} names no MusicXML rootfile")
+
+        for name in names:
+            if not name.startswith('META-INF/') and name.lower().endswith(('.xml', '.musicxml')):
+                return name
+        raise InvalidMXL("Archive contains no MusicXML score")
@@ -0,0 +1,316 @@
+"""
+Note Table
+Columnar storage for the notes of a parsed score.
+
+music_data['notes'] is a NoteTable: one NumPy structured array with a row per
+note, in score order (ascending position, ties in parser order).  Fields:
+
+    pitch     uint8    MIDI pitch
+    velocity  uint8    MIDI velocity (0 when the source has none)
+    track     uint16   MIDI track index (0 for MusicXML)
+    melody    bool     highest note of its onset group (MelodyHarmonyExtractor)
+    chord     bool     MusicXML chord member
+    time      float64  start position (ticks for MIDI, quarter lengths for MusicXML)
+    duration  float64  length in the same units
+    start_ms  float64  start time from the tempo map
+    end_ms    float64  end time from the tempo map
+
+That is 38 bytes per note, against several hundred for a dict.  Services
+read the columns directly; iterating or indexing the table still yields
+read-only dict-like rows with the legacy keys, so code written against the
+list-of-dicts form keeps working.
+"""
+
+from collections.abc import Mapping
+from numbers import Integral
+
+from app.services.tempo_map import TempoMap
+
+_FIELDS = (
+    ('pitch', 'u1'),
+    ('velocity', 'u1'),
+    ('track', 'u2'),
+    ('melody', '?'),
+    ('chord', '?'),
+    ('time', 'f8'),
+    ('duration', 'f8'),
+    ('start_ms', 'f8'),
+    ('end_ms', 'f8'),
+)
+
+# Legacy dict keys per format -> (field, Python type of the value)
+_LEGACY_KEYS = {
+    'midi': {
+        'pitch': ('pitch', int),
+        'velocity': ('velocity', int),
+        'time': ('time', int),
+        'offset': ('time', int),
+        'duration': ('duration', int),
+        'start_ms': ('start_ms', float),
+        'end_ms': ('end_ms', float),
+    },
+    'musicxml': {
+        'pitch': ('pitch', int),
+        'duration': ('duration', float),
+        'offset': ('time', float),
+        'is_chord_member': ('chord', bool),
+        'start_ms': ('start_ms', float),
+        'end_ms': ('end_ms', float),
+    },
+}
+
+_dtype = None
+
+
+def note_dtype():
+    """The structured dtype of a NoteTable row (numpy is imported on first use)"""
+    global _dtype
+    if _dtype is None:
+        import numpy as np
+        _dtype = np.dtype(list(_FIELDS))
+    return _dtype
+
+
+class NoteRow(Mapping):
+    """Read-only dict view of one NoteTable row"""
+
+    __slots__ = ('_table', 'index')
+
+    def __init__(self, table, index):
+        self._table = table
+        self.index = index
+
+    def __getitem__(self, key):
+        return self._table.legacy_values(key)[self.index]
+
+    def __iter__(self):
+        return iter(self._table.legacy_keys)
+
+    def __len__(self):
+        return len(self._table.legacy_keys)
+
+    def __contains__(self, key):
+        return key in self._table.legacy_keys
+
+    def __repr__(self):
+        return repr(dict(self))
+
+
+class NoteTable:
+    """Score notes as NumPy columns with a dict-compatible row view"""
+
+    def __init__(self, data, fmt='midi'):
+        """
+        Args:
+            data: Structured array of note_dtype(), already in score order
+            fmt: 'midi' or 'musicxml'; selects the legacy row keys
+        """
+        self.data = data
+        self.format = fmt if fmt in _LEGACY_KEYS else 'midi'
+        self.legacy_keys = _LEGACY_KEYS[self.format]
+        self._lists = {}
+
+    @staticmethod
+    def from_columns(fmt='midi', **columns):
+        """Build a table from equal-length column sequences; omitted fields are zero"""
+        import numpy as np
+
+        count = len(next(iter(columns.values()))) if columns else 0
+        data = np.zeros(count, dtype=note_dtype())
+        for name, values in columns.items():
+            data[name] = values
+        return NoteTable(data, fmt)
+
+    @staticmethod
+    def from_dicts(notes, fmt='midi'):
+        """Build a table from legacy note dicts, stable-sorted by position.
+
+        Notes without a pitch are dropped, as every consumer skipped them.
+        Missing start_ms/end_ms are left at zero; see from_music_data.
+        """
+        notes = TempoMap.ensure_time_order([n for n in notes if n.get('pitch') is not None])
+        return NoteTable.from_columns(
+            fmt,
+            pitch=[n['pitch'] for n in notes],
+            velocity=[n.get('velocity', 0) for n in notes],
+            track=[n.get('track', 0) for n in notes],
+            melody=[bool(n.get('melody', False)) for n in notes],
+            chord=[bool(n.get('is_chord_member', False)) for n in notes],
+            time=[float(n.get('time', n.get('offset', 0))) for n in notes],
+            duration=[float(n.get('duration', 0)) for n in notes],
+            start_ms=[float(n.get('start_ms', 0.0)) for n in notes],
+            end_ms=[float(n.get('end_ms', 0.0)) for n in notes],
+        )
+
+    @staticmethod
+    def from_music_data(music_data):
+        """
+        Return music_data['notes'] as a NoteTable.
+
+        Parsed scores already hold one and it is returned as is.  Hand-built
+        music_data (tests, callers outside the parse pipeline) with a list of
+        dicts is converted, with ms times from its tempo map when any are missing.
+        """
+        notes = music_data.get('notes') or []
+        if isinstance(notes, NoteTable):
+            return notes
+        fmt = music_data.get('format', 'midi')
+        table = NoteTable.from_dicts(notes, fmt)
+        if any('start_ms' not in n for n in notes):
+            table.annotate(TempoMap.from_music_data(music_data))
+        return table
+
+    def annotate(self, tempo_map):
+        """Fill start_ms/end_ms from a TempoMap"""
+        start_ms, end_ms = tempo_map.convert(self.data['time'], self.data['duration'])
+        self.set('start_ms', start_ms)
+        self.set('end_ms', end_ms)
+        return self
+
+    def set(self, name, values):
+        """Overwrite a column (use this rather than writing self.data, so row views stay current)"""
+        if not self.data.flags.writeable:
+            self.data = self.data.copy()  # rows mapped from the disk cache are read-only
+        self.data[name] = values
+        self._lists.clear()
+
+    def column(self, name):
+        """Column as a cached Python list, for loops that walk notes one by one"""
+        values = self._lists.get(name)
+        if values is None:
+            values = self._lists[name] = self.data[name].tolist()
+        return values
+
+    def legacy_values(self, key):
+        """Values of a legacy row key for every note, typed as the old dicts were"""
+        values = self._lists.get(('legacy', key))
+        if values is None:
+            field, kind = self.legacy_keys[key]
+            values = self.column(field)
+            if kind is int and field in ('time', 'duration'):
+                values = [int(v) for v in values]
+            self._lists[('legacy', key)] = values
+        return values
+
+    def pitch_mask(self, pitches):
+        """Boolean mask of notes whose pitch is in pitches"""
+        import numpy as np
+
+        lookup = np.zeros(256, dtype=bool)
+        lookup[[p for p in pitches if 0 <= p < 256]] = True
+        return lookup[self.data['pitch']]
+
+    def merge_doublings(self):
+        """
+        Collapse same-pitch notes whose spans overlap into one note.
+
+        A doubled line (the same pitch on an organ manual and a vocal track)
+        sounds as one ring.  Each group of overlapping same-pitch notes keeps
+        its earliest row, in score order, stretched to the union span with
+        the loudest velocity.  Notes that only touch end to end stay separate.
+        Works on the time/duration columns, so annotate afterwards.
+
+        Returns:
+            New NoteTable, in the same score order
+        """
+        import numpy as np
+
+        data = self.data
+        if len(data) < 2:
+            return NoteTable(data.copy(), self.format)
+
+        order = np.lexsort((data['time'], data['pitch']))  # stable: equal onsets keep score order
+        pitch = data['pitch'][order].astype(np.int64)
+        start = data['time'][order]
+        end = start + data['duration'][order]
+
+        # Running furthest end within each pitch: shift each pitch into its own band
+        # so one cumulative max never crosses from one pitch to the next
+        low = float(start.min())
+        band = float(end.max()) - low + 1.0
+        reach = np.maximum.accumulate(end - low + pitch * band) - pitch * band + low
+
+        begins = np.empty(len(order), dtype=bool)
+        begins[0] = True
+        begins[1:] = (pitch[1:] != pitch[:-1]) | (start[1:] >= reach[:-1])
+        heads = np.flatnonzero(begins)
+
+        merged = data[order[heads]]
+        merged['duration'] = np.maximum.reduceat(end, heads) - merged['time']
+        merged['velocity'] = np.maximum.reduceat(data['velocity'][order], heads)
+        return NoteTable(merged[np.argsort(order[heads], kind='stable')], self.format)
+
+    def to_dicts(self):
+        """Plain list-of-dicts form"""
+        return [dict(row) for row in self]
+
+    @property
+    def pitch(self):
+        return self.data['pitch']
+
+    @property
+    def velocity(self):
+        return self.data['velocity']
+
+    @property
+    def track(self):
+        return self.data['track']
+
+    @property
+    def melody(self):
+        return self.data['melody']
+
+    @property
+    def time(self):
+        return self.data['time']
+
+    @property
+    def duration(self):
+        return self.data['duration']
+
+    @property
+    def start_ms(self):
+        return self.data['start_ms']
+
+    @property
+    def end_ms(self):
+        return self.data['end_ms']
+
+    @property
+    def nbytes(self):
+        return self.data.nbytes
+
+    def __len__(self):
+        return len(self.data)
+
+    def __iter__(self):
+        return (NoteRow(self, i) for i in range(len(self.data)))
+
+    def __getitem__(self, index):
+        if isinstance(index, Integral):
+            index = int(index)
+            if index < 0:
+                index += len(self.data)
+            if not 0 <= index < len(self.data):
+                raise IndexError('note index out of range')
+            return NoteRow(self, index)
+        return NoteTable(self.data[index], self.format)
+
+    def __eq__(self, other):
+        if isinstance(other, NoteTable):
+            import numpy as np
+            return self.format == other.format and np.array_equal(self.data, other.data)
+        if isinstance(other, list):
+            return list(self) == other
+        return NotImplemented
+
+    __hash__ = None
+
+    def __repr__(self):
+        return f"NoteTable({len(self.data)} notes, format={self.format!r})"
+
+    def __getstate__(self):
+        return {'data': self.data, 'format': self.format}
+
+    def __setstate__(self, state):
+        self.__init__(state['data'], state['format'])
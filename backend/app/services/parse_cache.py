@@ -0,0 +1,131 @@
+"""
+Parse Cache
+Content-addressed in-memory cache of parsed music data.
+
+Uploads are keyed on the SHA-256 of their bytes, so re-uploading the same
+file (e.g. while trying different player lists) skips mido/music21 and the
+melody/harmony extraction entirely.  Entries are evicted least-recently-used
+first once the configured byte budget is exceeded.
+"""
+
+import hashlib
+import logging
+import sys
+import threading
+from collections import OrderedDict
+
+logger = logging.getLogger(__name__)
+
+
+class ParseCache:
+    """Thread-safe LRU cache of parsed music_data dicts under a byte budget"""
+
+    def __init__(self, max_bytes):
+        self.max_bytes = max(0, int(max_bytes or 0))
+        self._entries = OrderedDict()  # key -> (music_data, size_bytes)
+        self._lock = threading.Lock()
+        self.current_bytes = 0
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+
+    @staticmethod
+    def make_key(data, file_type, **options):
+        """Build a cache key from file contents, file type and any non-default parse options"""
+        key = f"{file_type}:{hashlib.sha256(data).hexdigest()}"
+        for name, value in sorted(options.items()):
+            if value:
+                key += f":{name}{value}"
+        return key
+
+    def get(self, key):
+        """Return cached music_data for key (or None), updating recency and counters"""
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is None:
+                self.misses += 1
+                return None
+            self._entries.move_to_end(key)
+            self.hits += 1
+        # Shallow copy so callers can add top-level keys without touching the cache
+        return dict(entry[0])
+
+    def put(self, key, music_data):
+        """Store music_data under key, evicting least-recently-used entries as needed"""
+        if self.max_bytes <= 0:
+            return False
+
+        size = ParseCache.estimate_size(music_data)
+        if size > self.max_bytes:
+            logger.info(f"Parse cache: entry {key[:24]} ({size} bytes) exceeds budget, not cached")
+            return False
+
+        with self._lock:
+            if key in self._entries:
+                self.current_bytes -= self._entries.pop(key)[1]
+
+            while self._entries and self.current_bytes + size > self.max_bytes:
+                _, (_, evicted_size) = self._entries.popitem(last=False)
+                self.current_bytes -= evicted_size
+                self.evictions += 1
+
+            self._entries[key] = (dict(music_data), size)
+            self.current_bytes += size
+        return True
+
+    def clear(self):
+        """Drop all entries (counters are kept)"""
+        with self._lock:
+            self._entries.clear()
+            self.current_bytes = 0
+
+    def stats(self):
+        """Return cache counters and occupancy"""
+        with self._lock:
+            lookups = self.hits + self.misses
+            return {
+                'hits': self.hits,
+                'misses': self.misses,
+                'evictions': self.evictions,
+                'hit_rate': self.hits / lookups if lookups else 0.0,
+                'entries': len(self._entries),
+                'bytes': self.current_bytes,
+                'max_bytes': self.max_bytes,
+            }
+
+    @staticmethod
+    def estimate_size(obj):
+        """Approximate deep memory footprint of a music_data structure in bytes.
+
+        Shared objects (e.g. small ints and repeated key strings) are counted
+        once so the estimate tracks what the entry actually keeps alive.
+        Objects such as the NoteTable and PitchIndex are walked through their
+        attributes, so their NumPy columns and any cached lists, matrices and
+        profiles built so far are included.  An array that owns its buffer
+        is charged its nbytes; a view is charged through its base array, or
+        its own nbytes when the base is another buffer (a disk cache mapping).
+        """
+        import numpy as np
+
+        seen = set()
+        total = 0
+        stack = [obj]
+        while stack:
+            item = stack.pop()
+            if id(item) in seen:
+                continue
+            seen.add(id(item))
+            total += sys.getsizeof(item)
+            if isinstance(item, np.ndarray):
+                if isinstance(item.base, np.ndarray):
+                    stack.append(item.base)  # getsizeof counts only the header of a view
+                elif item.base is not None:
+                    total += item.nbytes
+            elif isinstance(item, dict):
+                stack.extend(item.keys())
+                stack.extend(item.values())
+            elif isinstance(item, (list, tuple, set, frozenset)):
+                stack.extend(item)
+            elif hasattr(item, '__dict__') and not isinstance(item, type):
+                stack.extend(vars(item).values())
+        return total
@@ -0,0 +1,58 @@
+"""
+Parse Limits
+Upper bounds on score size, enforced while a file is being decoded.
+
+MAX_CONTENT_LENGTH bounds the upload, not what it expands to: a few MB of
+MIDI running status can hold over a million notes.  The parsers count note
+events as they decode each track chunk (MIDI) or measure (MusicXML) and
+raise ParseLimitExceeded as soon as a limit is passed, before the note
+table, tempo map or any later stage is built.
+"""
+
+import sys
+
+
+class ParseLimitExceeded(Exception):
+    """Raised when a score is larger than the configured limits"""
+
+    code = 'ERR_SCORE_TOO_LARGE'
+
+
+class ParseLimits:
+    """Note event and unique pitch caps for one parse (None means unlimited)"""
+
+    def __init__(self, max_note_events=None, max_unique_pitches=None):
+        self.max_note_events = max_note_events
+        self.max_unique_pitches = max_unique_pitches
+
+    @staticmethod
+    def from_config(config):
+        """Build limits from a Flask config mapping (MAX_NOTE_EVENTS, MAX_UNIQUE_PITCHES)"""
+        return ParseLimits(
+            max_note_events=config.get('MAX_NOTE_EVENTS') or None,
+            max_unique_pitches=config.get('MAX_UNIQUE_PITCHES') or None,
+        )
+
+    def note_budget(self, used=0):
+        """How many more note events may be decoded after `used` (sys.maxsize when unlimited)"""
+        if self.max_note_events is None:
+            return sys.maxsize
+        return self.max_note_events - used
+
+    def check_note_events(self, count):
+        """Raise if count note events is over the limit"""
+        if self.max_note_events is not None and count > self.max_note_events:
+            raise ParseLimitExceeded(
+                f"Score has more than {self.max_note_events} note events; "
+                f"split it or raise MAX_NOTE_EVENTS"
+            )
+
+    def check_unique_pitches(self, count):
+        """Raise if count distinct pitches is over the limit"""
+        if self.max_unique_pitches is not None and count > self.max_unique_pitches:
+            raise ParseLimitExceeded(
+                f"Score uses {count} distinct pitches; at most {self.max_unique_pitches} are supported"
+            )
+
+
+UNLIMITED = ParseLimits()
@@ -0,0 +1,195 @@
+"""
+Parse Worker Pool
+Runs MusicParser in supervised worker processes under a deadline.
+
+A pathological score can keep music21 busy for minutes, and a thread cannot
+be interrupted.  Uploads are therefore parsed in separate processes: each
+worker stays warm between requests (its imports and music21 setup are paid
+once), and a worker that has not answered by the deadline is killed and
+replaced, so the request fails with ParseTimeout instead of pinning a Flask
+thread.
+
+Workers are spawned on first use.  Results travel back as compact payloads:
+the NoteTable pickles as one structured array, and the PitchIndex is rebuilt
+in the parent rather than sent.
+
+Spawned workers re-import the parent's main script as __mp_main__, so a
+script that creates the app (or parses) must do so under
+``if __name__ == '__main__':`` -- as run.py does.  Otherwise each worker
+starts a pool of its own while bootstrapping, dies, and the parse fails
+with ParseWorkerError.
+"""
+
+import logging
+import multiprocessing
+import queue
+import threading
+import time
+
+logger = logging.getLogger(__name__)
+
+
+class ParseTimeout(Exception):
+    """Raised when a parse does not finish before the deadline"""
+
+    code = 'ERR_PARSE_TIMEOUT'
+
+
+class ParseWorkerError(Exception):
+    """Raised when a worker process dies mid-parse"""
+
+
+def _worker_main(conn):
+    """Worker process loop: parse requests from conn until it closes"""
+    from app.services.music_parser import MusicParser
+    from app.services.parse_limits import ParseLimits
+
+    while True:
+        try:
+            request = conn.recv()
+        except (EOFError, OSError):
+            return
+        filename, data, onset_tolerance_ms, limits, selection = request
+        try:
+            parser = MusicParser(onset_tolerance_ms=onset_tolerance_ms, limits=ParseLimits(*limits),
+                                 selection=selection)
+            reply = ('ok', ParseWorkerPool.to_payload(parser.parse(filename, data=data)))
+        except Exception as e:
+            reply = ('error', e)
+        try:
+            conn.send(reply)
+        except Exception as e:
+            # e.g. an exception that does not pickle; report it as a plain one
+            conn.send(('error', Exception(str(reply[1] if reply[0] == 'error' else e))))
+
+
+class _Worker:
+    """One worker process and the parent's end of its pipe"""
+
+    def __init__(self, context, target=_worker_main):
+        self.conn, child_conn = context.Pipe()
+        self.process = context.Process(target=target, args=(child_conn,), daemon=True)
+        self.process.start()
+        child_conn.close()
+
+    def stop(self):
+        self.conn.close()
+        if self.process.is_alive():
+            self.process.kill()
+        self.process.join(timeout=5)
+
+
+class ParseWorkerPool:
+    """Fixed-size pool of warm parser processes with a per-parse deadline"""
+
+    def __init__(self, size=1, timeout=30):
+        """
+        Args:
+            size: Number of worker processes
+            timeout: Seconds a parse (including waiting for a free worker) may take
+        """
+        self.size = max(1, int(size))
+        self.timeout = timeout
+        self._context = multiprocessing.get_context('spawn')
+        self._idle = queue.Queue()
+        self._workers = []
+        self._lock = threading.Lock()
+        self.timeouts = 0
+        self.restarts = 0
+
+    def start(self):
+        """Spawn the workers now instead of on the first parse"""
+        with self._lock:
+            while len(self._workers) < self.size:
+                worker = _Worker(self._context)
+                self._workers.append(worker)
+                self._idle.put(worker)
+
+    def shutdown(self):
+        """Stop every worker"""
+        with self._lock:
+            workers, self._workers = self._workers, []
+            self._idle = queue.Queue()
+        for worker in workers:
+            worker.stop()
+
+    def parse(self, filename, data, onset_tolerance_ms=0, limits=None, selection=None, deadline=None):
+        """
+        Parse file contents in a worker.
+
+        Args:
+            filename: Original filename (selects the parser)
+            data: File contents (bytes)
+            onset_tolerance_ms: Passed to MusicParser
+            limits: Optional ParseLimits, passed to MusicParser
+            selection: Optional TrackSelection, passed to MusicParser
+            deadline: Optional time.monotonic() by which the whole request must
+                      finish; waiting for a worker and parsing get what is left of it
+                      (never more than the pool's timeout)
+
+        Returns:
+            music_data, as MusicParser.parse returns it
+
+        Raises:
+            ParseTimeout: If no result arrives before the deadline
+            ParseWorkerError: If the worker process dies
+            Exception: Whatever MusicParser raised in the worker
+        """
+        if not self._workers:
+            self.start()
+        now = time.monotonic()
+        deadline = min(deadline, now + self.timeout) if deadline is not None else now + self.timeout
+
+        try:
+            worker = self._idle.get(timeout=max(0.0, deadline - now))
+        except queue.Empty:
+            self.timeouts += 1
+            raise ParseTimeout("No parse worker became free before the request deadline")
+
+        limit_args = (limits.max_note_events, limits.max_unique_pitches) if limits else (None, None)
+        try:
+            worker.conn.send((filename, data, onset_tolerance_ms, limit_args, selection))
+            if not worker.conn.poll(max(0.0, deadline - time.monotonic())):
+                self.timeouts += 1
+                logger.warning(f"Parse of {filename} ran past its deadline; restarting worker")
+                self._replace(worker)
+                worker = None
+                raise ParseTimeout("Parsing did not finish before the request deadline")
+            status, result = worker.conn.recv()
+        except (EOFError, OSError) as e:
+            logger.error(f"Parse worker died while parsing {filename}: {e}")
+            self._replace(worker)
+            worker = None
+            raise ParseWorkerError("Parse worker exited unexpectedly")
+        finally:
+            if worker is not None:
+                self._idle.put(worker)
+
+        if status == 'error':
+            raise result
+        return ParseWorkerPool.from_payload(result)
+
+    def _replace(self, worker):
+        """Kill a worker and put a fresh one in the idle queue"""
+        worker.stop()
+        self.restarts += 1
+        with self._lock:
+            if worker in self._workers:
+                self._workers.remove(worker)
+            replacement = _Worker(self._context)
+            self._workers.append(replacement)
+        self._idle.put(replacement)
+
+    @staticmethod
+    def to_payload(music_data):
+        """music_data without derived objects that are cheaper to rebuild than to send"""
+        return {k: v for k, v in music_data.items() if k != 'pitch_index'}
+
+    @staticmethod
+    def from_payload(payload):
+        """Rebuild music_data from to_payload's output"""
+        from app.services.pitch_index import PitchIndex
+
+        music_data = dict(payload)
+        music_data['pitch_index'] = PitchIndex(music_data['notes'])
+        return music_data
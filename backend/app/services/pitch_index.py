@@ -0,0 +1,176 @@
+"""
+Pitch Index
+Per-score index from pitch to that pitch's notes, built once per parse.
+
+Swap-gap checks, pair swap costs, playability scoring and the simulation all
+look notes up by pitch.  PitchIndex groups the NoteTable row numbers by pitch
+(a stable argsort, so each group stays in time order) and records where each
+pitch's group starts and ends, along with the groups' start/end times in ms
+and in score units.  MusicParser stores it as music_data['pitch_index'] and
+the arrangement pipeline shares that one instance instead of re-indexing the
+notes in every strategy and scorer.
+
+The arrays are read-only.  Python tuple lists derived from them for the
+event-by-event loops, the score's MusicProfile and the pairwise minimum-gap
+matrix used by swap-gap checks are built on first use and then reused.
+"""
+
+
+class PitchIndex:
+    """Immutable pitch -> time-ordered note range index over a NoteTable"""
+
+    def __init__(self, notes):
+        """
+        Args:
+            notes: NoteTable in score order
+        """
+        import numpy as np
+
+        self.notes = notes
+        pitches = notes.pitch
+        # Row numbers grouped by pitch; stable, so each group keeps time order
+        self.order = np.argsort(pitches, kind='stable')
+        # bounds[p]:bounds[p + 1] is pitch p's slice of order
+        self.bounds = np.searchsorted(pitches[self.order], np.arange(257)).tolist()
+        self.pitches = [p for p in range(256) if self.bounds[p + 1] > self.bounds[p]]
+
+        self.start_ms = notes.start_ms[self.order]
+        self.end_ms = notes.end_ms[self.order]
+        self.start = notes.time[self.order]
+        self.end = self.start + notes.duration[self.order]
+        for array in (self.order, self.start_ms, self.end_ms, self.start, self.end):
+            array.flags.writeable = False
+
+        self._events = {}
+        self._profile = None
+        self._min_gaps = None
+
+    @staticmethod
+    def for_music_data(music_data):
+        """Return music_data's shared index, or build one for hand-built music_data"""
+        index = music_data.get('pitch_index')
+        if index is not None:
+            return index
+        from app.services.note_table import NoteTable
+        return PitchIndex(NoteTable.from_music_data(music_data))
+
+    def count(self, pitch):
+        """Number of notes at a pitch"""
+        if not 0 <= pitch < 256:
+            return 0
+        return self.bounds[pitch + 1] - self.bounds[pitch]
+
+    def note_indices(self, pitches):
+        """NoteTable row numbers of every note at any of pitches, in time order"""
+        import numpy as np
+
+        ranges = [
+            self.order[self.bounds[p]:self.bounds[p + 1]]
+            for p in set(pitches) if 0 <= p < 256 and self.bounds[p + 1] > self.bounds[p]
+        ]
+        if not ranges:
+            return np.zeros(0, dtype=np.intp)
+        if len(ranges) == 1:
+            return ranges[0]
+        return np.sort(np.concatenate(ranges))
+
+    def events_ms(self, pitch):
+        """[(start_ms, end_ms, pitch)] for one pitch, in time order"""
+        return self._event_list('ms', pitch, self.start_ms, self.end_ms)
+
+    def events_units(self, pitch):
+        """[(start, end, pitch)] in score units (ticks or quarter lengths), in time order"""
+        return self._event_list('units', pitch, self.start, self.end)
+
+    def _event_list(self, kind, pitch, starts, ends):
+        key = (kind, pitch)
+        events = self._events.get(key)
+        if events is None:
+            if self.count(pitch):
+                lo, hi = self.bounds[pitch], self.bounds[pitch + 1]
+                events = [(s, e, pitch) for s, e in zip(starts[lo:hi].tolist(), ends[lo:hi].tolist())]
+            else:
+                events = []
+            self._events[key] = events
+        return events
+
+    def gap_matrix_ms(self):
+        """
+        Minimum transition gaps between every ordered pair of pitches.
+
+        Entry [i, j] is the smallest start_ms(next) - end_ms(prev) over notes
+        of pitches[j] that directly follow a note of pitches[i] when only
+        those two pitches are considered; inf if that never happens.
+
+        Built with one pass over the time-ordered notes per pitch: a running
+        max gives, for every note, the latest earlier note of pitch i, which
+        is its predecessor in the pair's stream when it comes after the
+        note's own previous same-pitch note.
+
+        Returns:
+            (pitches, P x P float array)
+        """
+        import numpy as np
+
+        pitch = self.notes.pitch
+        start_ms = self.notes.start_ms
+        end_ms = self.notes.end_ms
+        count = len(pitch)
+        rows = np.full(256, -1, dtype=np.intp)
+        rows[self.pitches] = np.arange(len(self.pitches))
+        note_rows = rows[pitch]
+        positions = np.arange(count)
+
+        # Each note's previous note of the same pitch (-1 for the first)
+        prev_same = np.full(count, -1, dtype=np.intp)
+        if count > 1:
+            same = pitch[self.order[1:]] == pitch[self.order[:-1]]
+            prev_same[self.order[1:][same]] = self.order[:-1][same]
+
+        gaps = np.full((len(self.pitches), len(self.pitches)), np.inf)
+        prev_other = np.empty(count, dtype=np.intp)
+        for row, p in enumerate(self.pitches):
+            latest = np.maximum.accumulate(np.where(pitch == p, positions, -1))
+            prev_other[0] = -1
+            prev_other[1:] = latest[:-1]
+            follows = np.flatnonzero((pitch != p) & (prev_other > prev_same))
+            np.minimum.at(gaps[row], note_rows[follows],
+                          start_ms[follows] - end_ms[prev_other[follows]])
+        return list(self.pitches), gaps
+
+    def min_gap_ms(self, a, b):
+        """
+        Smallest swap gap between pitches a and b, in either direction.
+
+        A hand holding both bells swaps between them with at least this much
+        time; inf if either pitch is unplayed.
+        """
+        if self._min_gaps is None:
+            import numpy as np
+
+            pitches, gaps = self.gap_matrix_ms()
+            both = np.minimum(gaps, gaps.T).tolist()
+            rows = {p: both[i] for i, p in enumerate(pitches)}
+            self._min_gaps = ({p: i for i, p in enumerate(pitches)}, rows)
+        columns, rows = self._min_gaps
+        row = rows.get(a)
+        column = columns.get(b)
+        if row is None or column is None:
+            return float('inf')
+        return row[column]
+
+    def profile(self):
+        """The score's MusicProfile (per-pitch statistics), built on first use"""
+        if self._profile is None:
+            from app.services.music_profile import MusicProfile
+            self._profile = MusicProfile(self)
+        return self._profile
+
+    def __len__(self):
+        return len(self.notes)
+
+    def __getstate__(self):
+        return {'notes': self.notes}
+
+    def __setstate__(self, state):
+        self.__init__(state['notes'])
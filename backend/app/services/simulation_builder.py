@@ -8,6 +8,8 @@ stick-figure players ringing handbells in sync with the uploaded music.
 import logging
 
 from config import Config
+from app.services.bell_ids import BellIds
+from app.services.pitch_index import PitchIndex
 
 logger = logging.getLogger(__name__)
 
@@ -108,17 +110,15 @@ class SimulationBuilder:
 
         Args:
             music_data: Parsed music dict (from MusicParser.parse).
-            arrangement: Assignment dict {player_name: {'bells', 'left_hand', 'right_hand'}}.
+            arrangement: Assignment dict {player_name: {'bells', 'left_hand', 'right_hand'}};
+                bells are pitches or note names.
             tight_swap_threshold_ms: Gap threshold in ms below which a swap is flagged tight.
 
         Returns:
             Serializable dict describing player timelines for animation.
         """
-        from app.services.music_parser import MusicParser
-
         fmt = music_data.get('format', 'midi')
         tempo_bpm = int(music_data.get('tempo', 120))
-        all_notes = music_data.get('notes', [])
 
         if fmt == 'midi':
             ticks_per_beat = int(music_data.get('ticks_per_beat', 480))
@@ -126,28 +126,15 @@ class SimulationBuilder:
             # MusicXML uses quarter_length units; treat as ticks_per_beat=1 sentinel
             ticks_per_beat = 1
 
-        def to_ms(ticks_or_ql):
-            """Convert ticks (MIDI) or quarter_length (MusicXML) to ms."""
-            return ticks_or_ql / ticks_per_beat * (60000.0 / tempo_bpm)
-
-        def note_time_ms(n):
-            if fmt == 'midi':
-                return to_ms(n.get('time', n.get('offset', 0)))
-            else:
-                return to_ms(n.get('offset', 0))
-
-        def note_dur_ms(n):
-            if fmt == 'midi':
-                return to_ms(n.get('duration', 1))
-            else:
-                return to_ms(n.get('duration', 0.5))
+        # start_ms/end_ms are filled at parse time (tempo map aware), and
+        # notes are in time order
+        index = PitchIndex.for_music_data(music_data)
+        all_notes = index.notes
 
         # Determine total duration from last note end
         duration_ms = 0
-        for n in all_notes:
-            end = note_time_ms(n) + note_dur_ms(n)
-            if end > duration_ms:
-                duration_ms = end
+        if len(all_notes):
+            duration_ms = max(duration_ms, float(all_notes.end_ms.max()))
 
         players_out = []
 
@@ -163,59 +150,60 @@ class SimulationBuilder:
 
             for bell_name in left_hand_bells:
                 try:
-                    p = MusicParser.note_name_to_pitch(bell_name)
+                    p = BellIds.pitch(bell_name)
                     hand_map[p] = 'left'
-                    name_map[p] = bell_name
+                    name_map[p] = BellIds.name(bell_name)
                     bell_pitches.add(p)
-                except (ValueError, KeyError):
+                except ValueError:
                     logger.warning(f"Could not convert bell '{bell_name}' to pitch for player '{player_name}' (left hand); skipping.")
 
             for bell_name in right_hand_bells:
                 try:
-                    p = MusicParser.note_name_to_pitch(bell_name)
+                    p = BellIds.pitch(bell_name)
                     hand_map[p] = 'right'
-                    name_map[p] = bell_name
+                    name_map[p] = BellIds.name(bell_name)
                     bell_pitches.add(p)
-                except (ValueError, KeyError):
+                except ValueError:
                     logger.warning(f"Could not convert bell '{bell_name}' to pitch for player '{player_name}' (right hand); skipping.")
 
             # Handle bells listed only in 'bells' (not in hand lists)
             for bell_name in all_bell_names:
                 try:
-                    p = MusicParser.note_name_to_pitch(bell_name)
+                    p = BellIds.pitch(bell_name)
                     if p not in hand_map:
                         hand_map[p] = 'left'
-                        name_map[p] = bell_name
+                        name_map[p] = BellIds.name(bell_name)
                         bell_pitches.add(p)
-                except (ValueError, KeyError):
+                except ValueError:
                     logger.warning(f"Could not convert bell '{bell_name}' to pitch for player '{player_name}' (bells list); skipping.")
 
             # Build bells metadata list
             bells_meta = []
             for bell_name in all_bell_names:
                 try:
-                    p = MusicParser.note_name_to_pitch(bell_name)
+                    p = BellIds.pitch(bell_name)
                     diam, wt, cpx = SimulationBuilder._get_bell_data(p)
                     bells_meta.append({
-                        'name': bell_name,
+                        'name': BellIds.name(bell_name),
                         'pitch': p,
                         'hand': hand_map.get(p, 'left'),
                         'diameter_in': diam,
                         'weight_oz': wt,
                         'canvas_px': cpx,
                     })
-                except (ValueError, KeyError):
+                except ValueError:
                     logger.warning(f"Could not build metadata for bell '{bell_name}' for player '{player_name}'; skipping.")
             weight_by_pitch = {b['pitch']: b['weight_oz'] for b in bells_meta}
 
-            # Filter and sort notes for this player
-            player_notes = [n for n in all_notes if n.get('pitch') in bell_pitches]
-            player_notes.sort(key=lambda n: note_time_ms(n))
+            # This player's notes as columns, in time order; notes without a
+            # velocity (MusicXML) ring at 80
+            player_notes = all_notes[index.note_indices(bell_pitches)]
+            player_pitches = player_notes.column('pitch')
+            player_velocities = [v or 80 for v in player_notes.column('velocity')]
 
             # Determine initial held bells per hand (first unique pitch seen per hand)
             holding = {'left': None, 'right': None}
-            for n in player_notes:
-                p = n.get('pitch')
+            for p in player_pitches:
                 h = hand_map.get(p, 'left')
                 if holding[h] is None:
                     holding[h] = p
@@ -227,16 +215,12 @@ class SimulationBuilder:
 
             events = []
 
-            for n in player_notes:
-                pitch = n.get('pitch')
-                if pitch is None or pitch not in bell_pitches:
-                    continue
-
-                ring_time = note_time_ms(n)
-                ring_dur = note_dur_ms(n)
-                velocity = n.get('velocity', 80)
+            for pitch, ring_time, ring_end, velocity in zip(
+                    player_pitches, player_notes.column('start_ms'), player_notes.column('end_ms'),
+                    player_velocities):
+                ring_dur = ring_end - ring_time
                 hand = hand_map.get(pitch, 'left')
-                bell_name = name_map.get(pitch, MusicParser.pitch_to_note_name(pitch))
+                bell_name = name_map.get(pitch) or BellIds.name(pitch)
 
                 # Check if we need a swap on this hand
                 if holding[hand] != pitch:
@@ -255,7 +239,7 @@ class SimulationBuilder:
                     tight = gap_ms < tight_swap_threshold_ms
 
                     if old_pitch is not None:
-                        old_name = name_map.get(old_pitch, MusicParser.pitch_to_note_name(old_pitch))
+                        old_name = name_map.get(old_pitch) or BellIds.name(old_pitch)
                         events.append({
                             'type': 'put_down',
                             'bell_name': old_name,
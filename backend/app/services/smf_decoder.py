@@ -0,0 +1,260 @@
+"""
+Standard MIDI File Decoder
+Byte-level scan of SMF track chunks that keeps only what the arranger uses.
+
+mido builds a Message object for every event in the file, including the
+controller, pitch-bend and sysex data we discard.  This decoder walks each
+MTrk chunk through a memoryview, skips everything except note on/off and
+set_tempo, and pairs notes into flat typed arrays.
+
+Note pairing follows MIDIParser's mido loop exactly (notes keyed by track
+and pitch; a repeated note on replaces the pending one; note ons that are
+never released get a one-tick duration).  Each track's notes are kept in
+note-on order and the tracks are heap-merged, so the returned columns are
+ordered by onset tick, ties broken by track and then by event order.  One
+deliberate difference: meta events of unknown type keep their delta time,
+which mido drops, so later events in that track are not pulled earlier.  Input
+that mido would read differently or reject (SMPTE timing, non-MTrk chunks,
+undefined status bytes, running status after sysex, events overrunning
+their chunk, ...) raises UnsupportedSMF so the caller can fall back to mido.
+
+Note events are counted as they are decoded; passing ParseLimits makes the
+scan stop with ParseLimitExceeded as soon as the file goes over its budget.
+A TrackSelection drops note events on deselected tracks and channels before
+they are paired or counted (they neither start nor end notes).
+"""
+
+import heapq
+import struct
+from array import array
+from operator import itemgetter
+
+from app.services.parse_limits import UNLIMITED
+from app.services.track_selection import ALL_NOTES
+
+_MAX_MESSAGE_LENGTH = 1000000  # mido's limit for meta/sysex payloads
+
+_META = 0xFF
+_SET_TEMPO = 0x51
+
+
+class UnsupportedSMF(Exception):
+    """Raised when a file should be read by mido instead"""
+
+
+class SMFDecoder:
+    """Extract notes and tempo changes from raw SMF bytes"""
+
+    @staticmethod
+    def decode(data, limits=UNLIMITED, selection=ALL_NOTES):
+        """
+        Decode a Standard MIDI File.
+
+        Args:
+            data: Raw file contents (bytes-like)
+            limits: ParseLimits checked while decoding
+            selection: TrackSelection of the tracks and channels whose notes are kept
+
+        Returns:
+            Dict with 'ticks_per_beat', 'tempo_changes' ([(tick, microseconds per beat)]
+            in file order) and note columns 'pitch', 'velocity', 'time', 'duration',
+            'track' ordered by onset tick
+
+        Raises:
+            UnsupportedSMF: If the file needs mido
+            ParseLimitExceeded: As soon as the file has more notes than limits allow
+        """
+        view = memoryview(data).cast('B')
+        try:
+            return SMFDecoder._decode(view, limits, selection)
+        except IndexError:
+            raise UnsupportedSMF("truncated event")
+
+    @staticmethod
+    def _decode(view, limits, selection):
+        size = len(view)
+        if size < 14 or view[0:4] != b'MThd':
+            raise UnsupportedSMF("missing MThd header")
+        header_size = struct.unpack_from('>L', view, 4)[0]
+        if header_size < 6 or 8 + header_size > size:
+            raise UnsupportedSMF("short MThd header")
+        _, num_tracks, ticks_per_beat = struct.unpack_from('>hhh', view, 8)
+        if ticks_per_beat <= 0:
+            raise UnsupportedSMF("SMPTE or zero time division")
+
+        tempo_changes = []
+        tracks = []
+        note_count = 0
+
+        pos = 8 + header_size
+        for _ in range(max(num_tracks, 0)):
+            if pos + 8 > size:
+                raise UnsupportedSMF("missing track chunk")
+            name, chunk_size = struct.unpack_from('>4sL', view, pos)
+            if name != b'MTrk':
+                raise UnsupportedSMF("chunk is not MTrk")
+            start = pos + 8
+            end = start + chunk_size
+            if end > size:
+                raise UnsupportedSMF("track chunk runs past end of file")
+
+            track = SMFDecoder._scan_track(view, start, end, len(tracks), tempo_changes, limits, note_count,
+                                           selection.channels_for_track(len(tracks)))
+            note_count += len(track)
+            tracks.append(track)
+            pos = end
+
+        columns = SMFDecoder.merge_tracks(tracks)
+        columns['ticks_per_beat'] = ticks_per_beat
+        columns['tempo_changes'] = tempo_changes
+        return columns
+
+    @staticmethod
+    def merge_tracks(tracks):
+        """
+        Heap-merge per-track note lists into onset-ordered columns.
+
+        Args:
+            tracks: One list per track of (tick_on, pitch, velocity, duration, track)
+                    tuples, each already in onset order
+
+        Returns:
+            Dict of 'pitch', 'velocity', 'time', 'duration', 'track' arrays.  Equal
+            onsets keep track order, then their order within the track.
+        """
+        pitches = array('B')
+        velocities = array('B')
+        times = array('q')
+        durations = array('q')
+        track_ids = array('H')
+
+        if len(tracks) == 1:
+            merged = tracks[0]
+        else:
+            merged = heapq.merge(*tracks, key=itemgetter(0))
+        for tick_on, pitch, velocity, duration, track in merged:
+            pitches.append(pitch)
+            velocities.append(velocity)
+            times.append(tick_on)
+            durations.append(duration)
+            track_ids.append(track)
+
+        return {
+            'pitch': pitches,
+            'velocity': velocities,
+            'time': times,
+            'duration': durations,
+            'track': track_ids,
+        }
+
+    @staticmethod
+    def _scan_track(buf, i, end, track_idx, tempo_changes, limits, used, channels):
+        """Walk one MTrk chunk from byte i to end, returning its notes in onset order.
+
+        used is the note count of earlier tracks; limits is checked as notes are added.
+        channels holds 16 keep flags; note events on other channels are skipped.
+        """
+        max_notes = limits.note_budget(used)
+        tick = 0
+        running = None
+        notes = []  # (tick_on, pitch, velocity, duration, track); duration 0 while pending
+        pending = {}  # pitch -> index into notes
+        replaced = 0
+
+        while i < end:
+            # Delta time (variable-length quantity)
+            byte = buf[i]
+            i += 1
+            delta = byte & 0x7F
+            while byte & 0x80:
+                byte = buf[i]
+                i += 1
+                delta = (delta << 7) | (byte & 0x7F)
+            tick += delta
+
+            status = buf[i]
+            if status < 0x80:
+                if running is None:
+                    raise UnsupportedSMF("running status without a previous status")
+                if running >= 0xF0:
+                    raise UnsupportedSMF("running status after sysex")
+                status = running  # data bytes start at i
+            else:
+                i += 1
+                if status != _META:
+                    running = status
+
+            if status < 0xF0:
+                kind = status & 0xF0
+                data1 = buf[i]
+                if kind == 0xC0 or kind == 0xD0:
+                    if data1 > 127:
+                        raise UnsupportedSMF("data byte out of range")
+                    i += 1
+                    continue
+                data2 = buf[i + 1]
+                if data1 > 127 or data2 > 127:
+                    raise UnsupportedSMF("data byte out of range")
+                i += 2
+
+                if not channels[status & 0x0F] and (kind == 0x90 or kind == 0x80):
+                    continue
+                if kind == 0x90 and data2 > 0:
+                    previous = pending.get(data1)
+                    if previous is not None:
+                        notes[previous] = None
+                        replaced += 1
+                    if len(notes) >= max_notes and len(notes) - replaced >= max_notes:
+                        limits.check_note_events(used + len(notes) - replaced + 1)
+                    pending[data1] = len(notes)
+                    notes.append((tick, data1, data2, 0, track_idx))
+                elif kind == 0x80 or kind == 0x90:
+                    idx = pending.pop(data1, None)
+                    if idx is not None:
+                        tick_on, _, velocity, _, _ = notes[idx]
+                        notes[idx] = (tick_on, data1, velocity, max(1, tick - tick_on), track_idx)
+                continue
+
+            if status == _META:
+                meta_type = buf[i]
+                i += 1
+            elif status != 0xF0 and status != 0xF7:
+                raise UnsupportedSMF(f"undefined status byte 0x{status:02x}")
+
+            # Meta and sysex payloads: variable-length size, then data
+            byte = buf[i]
+            i += 1
+            length = byte & 0x7F
+            while byte & 0x80:
+                byte = buf[i]
+                i += 1
+                length = (length << 7) | (byte & 0x7F)
+            if length > _MAX_MESSAGE_LENGTH:
+                raise UnsupportedSMF("message length exceeds maximum")
+
+            if status == _META:
+                if meta_type == _SET_TEMPO:
+                    if length < 3:
+                        raise UnsupportedSMF("short set_tempo")
+                    tempo_changes.append((tick, (buf[i] << 16) | (buf[i + 1] << 8) | buf[i + 2]))
+            elif length:
+                # mido rejects sysex payloads with data bytes above 127 (framing bytes excepted)
+                payload = buf[i:i + length]
+                if payload[0] == 0xF0:
+                    payload = payload[1:]
+                if len(payload) and payload[-1] == 0xF7:
+                    payload = payload[:-1]
+                if len(payload) and max(payload) > 127:
+                    raise UnsupportedSMF("sysex data byte out of range")
+            i += length
+
+        if i != end:
+            raise UnsupportedSMF("event overruns track chunk")
+
+        # Note ons without a matching note off get the minimum duration
+        for idx in pending.values():
+            tick_on, pitch, velocity, _, _ = notes[idx]
+            notes[idx] = (tick_on, pitch, velocity, 1, track_idx)
+        if replaced:
+            notes = [n for n in notes if n is not None]
+        return notes
@@ -0,0 +1,211 @@
+"""
+Strategy Worker Pool
+Runs the arrangement strategies of one request side by side in worker processes.
+
+Each strategy's pipeline (assignment, conflict resolution, validation, swap
+counting, simulation) is independent of the others and CPU bound, so a thread
+pool would only take turns on the GIL.  The workers are spawned once and stay
+warm across requests.  A request takes one free worker (waiting for it) and
+any others that are idle, sends each of them the score once, pickled a single
+time, and then hands out strategies as workers finish, so a slow strategy
+does not hold up the rest.  Results come back in strategy order, and the
+generator keeps its serial bookkeeping on top of them, so the output is the
+same as running the strategies one after another.
+
+Like the parse workers, these re-import the main script, which therefore has
+to keep creating the app under an ``if __name__ == '__main__':`` guard.
+"""
+
+import collections
+import logging
+import multiprocessing
+import multiprocessing.connection
+import pickle
+import queue
+import threading
+import time
+
+from app.services.parse_worker_pool import _Worker
+
+logger = logging.getLogger(__name__)
+
+
+class StrategyTimeout(Exception):
+    """Raised when the strategies do not finish before the deadline"""
+
+    code = 'ERR_GENERATION_TIMEOUT'
+
+
+class StrategyWorkerError(Exception):
+    """Raised (as a strategy's result) when a worker process dies mid-strategy"""
+
+
+def _worker_main(conn):
+    """Worker process loop: keep the latest score, run strategies on it until conn closes"""
+    from app.services.arrangement_generator import ArrangementGenerator
+    from app.services.pitch_index import PitchIndex
+
+    context = None
+    while True:
+        try:
+            request = conn.recv()
+        except (EOFError, OSError):
+            return
+        if request[0] == 'score':
+            context = pickle.loads(request[1])
+            music_data = context['music_data']
+            music_data['pitch_index'] = PitchIndex.for_music_data(music_data)
+            context['pitch_index'] = music_data['pitch_index']
+            continue
+        _, strategy, description = request
+        try:
+            reply = ('ok', ArrangementGenerator.run_strategy(context, strategy, description))
+        except Exception as e:
+            reply = ('error', e)
+        try:
+            conn.send(reply)
+        except Exception as e:
+            conn.send(('error', Exception(str(reply[1] if reply[0] == 'error' else e))))
+
+
+class StrategyWorkerPool:
+    """Fixed-size pool of warm processes that run arrangement strategies"""
+
+    def __init__(self, size=1, timeout=30):
+        """
+        Args:
+            size: Number of worker processes
+            timeout: Most seconds one request's strategies (including waiting for a
+                     worker) may take; a request deadline passed to run can cut it shorter
+        """
+        self.size = max(1, int(size))
+        self.timeout = timeout
+        self._context = multiprocessing.get_context('spawn')
+        self._idle = queue.Queue()
+        self._workers = []
+        self._lock = threading.Lock()
+        self.timeouts = 0
+        self.restarts = 0
+
+    def start(self):
+        """Spawn the workers now instead of on the first request"""
+        with self._lock:
+            while len(self._workers) < self.size:
+                worker = _Worker(self._context, _worker_main)
+                self._workers.append(worker)
+                self._idle.put(worker)
+
+    def shutdown(self):
+        """Stop every worker"""
+        with self._lock:
+            workers, self._workers = self._workers, []
+            self._idle = queue.Queue()
+        for worker in workers:
+            worker.stop()
+
+    def run(self, context, jobs, deadline=None):
+        """
+        Run strategies on one score in the workers.
+
+        Args:
+            context: Dict of everything a strategy reads (see
+                     ArrangementGenerator.run_strategy); music_data's pitch_index is
+                     rebuilt in each worker rather than sent
+            jobs: List of (strategy, description) pairs
+            deadline: Optional time.monotonic() by which the whole request must
+                      finish; the strategies get what is left of it (never more
+                      than the pool's timeout)
+
+        Returns:
+            List of ('ok', arrangement) or ('error', exception), in jobs order
+
+        Raises:
+            StrategyTimeout: If the results do not all arrive before the deadline
+        """
+        if not jobs:
+            return []
+        if not self._workers:
+            self.start()
+        now = time.monotonic()
+        deadline = min(deadline, now + self.timeout) if deadline is not None else now + self.timeout
+
+        try:
+            workers = [self._idle.get(timeout=max(0.0, deadline - now))]
+        except queue.Empty:
+            self.timeouts += 1
+            raise StrategyTimeout("No strategy worker became free before the request deadline")
+        # Only idle extras: waiting for more could deadlock two requests holding one each
+        while len(workers) < len(jobs):
+            try:
+                workers.append(self._idle.get_nowait())
+            except queue.Empty:
+                break
+
+        music_data = {k: v for k, v in context['music_data'].items() if k != 'pitch_index'}
+        blob = pickle.dumps({**context, 'music_data': music_data, 'pitch_index': None},
+                            protocol=pickle.HIGHEST_PROTOCOL)
+        results = [None] * len(jobs)
+        pending = collections.deque(range(len(jobs)))
+        busy = {}  # conn -> (worker, job index)
+
+        def dispatch(worker):
+            index = pending.popleft()
+            try:
+                worker.conn.send(('run',) + tuple(jobs[index]))
+            except OSError:
+                pending.appendleft(index)
+                self._lose(workers, worker)
+                return
+            busy[worker.conn] = (worker, index)
+
+        try:
+            for worker in list(workers):
+                try:
+                    worker.conn.send(('score', blob))
+                except OSError:
+                    self._lose(workers, worker)
+            for worker in list(workers):
+                if pending:
+                    dispatch(worker)
+
+            while busy or pending:
+                if not busy:
+                    # Every worker of this request died; report the rest as failed
+                    while pending:
+                        results[pending.popleft()] = ('error', StrategyWorkerError("Strategy worker exited unexpectedly"))
+                    break
+                ready = multiprocessing.connection.wait(list(busy), max(0.0, deadline - time.monotonic()))
+                if not ready:
+                    self.timeouts += 1
+                    logger.warning(f"Strategies ran past the request deadline; restarting {len(busy)} worker(s)")
+                    for worker, _ in list(busy.values()):
+                        self._lose(workers, worker)
+                    busy.clear()
+                    raise StrategyTimeout("Generating arrangements did not finish before the request deadline")
+                for conn in ready:
+                    worker, index = busy.pop(conn)
+                    try:
+                        results[index] = conn.recv()
+                    except (EOFError, OSError) as e:
+                        logger.error(f"Strategy worker died while running {jobs[index][0]}: {e}")
+                        results[index] = ('error', StrategyWorkerError("Strategy worker exited unexpectedly"))
+                        self._lose(workers, worker)
+                        continue
+                    if pending:
+                        dispatch(worker)
+        finally:
+            for worker in workers:
+                self._idle.put(worker)
+        return results
+
+    def _lose(self, workers, worker):
+        """Drop a dead or stuck worker from this request and replace it in the pool"""
+        workers.remove(worker)
+        worker.stop()
+        self.restarts += 1
+        with self._lock:
+            if worker in self._workers:
+                self._workers.remove(worker)
+            replacement = _Worker(self._context, _worker_main)
+            self._workers.append(replacement)
+        self._idle.put(replacement)
@@ -162,12 +162,12 @@ class SwapCostCalculator:
 
         This is equivalent to ``calculate_pair_swap_cost`` but avoids rescanning
         the full note list for every pair call.  The caller builds the index once
-        (O(N_events + N_pitches * k*log(k))) and each pair lookup is then
+        (O(N_events)) and each pair lookup is then
         O(|events_a| + |events_b|) via a linear merge of two pre-sorted lists.
 
         Pre-condition: each list in pitch_index must already be sorted by start
-        time in ascending order.  ``_build_pair_costs`` sorts the lists once after
-        constructing the index.
+        time in ascending order.  ``_build_pair_costs`` builds them from the
+        time-ordered music_data notes, so they need no sorting.
 
         Args:
             bell_a_pitch: First bell MIDI pitch
@@ -206,7 +206,83 @@ class SwapCostCalculator:
         if not gaps:
             return {'transitions': transitions, 'avg_gap': float('inf'), 'gaps': []}
         return {'transitions': transitions, 'avg_gap': sum(gaps) / len(gaps), 'gaps': gaps}
-    
+
+    @staticmethod
+    def pair_swap_cost_matrices(pitch_index, pitches):
+        """
+        Transition counts and average transition gaps for every pair of pitches at once.
+
+        Gives, for all pairs, the same numbers as ``calculate_pair_swap_cost_indexed``
+        with the earlier pitch in ``pitches`` as bell A, without a merge per pair.
+        The notes of the listed pitches are put in one timeline ordered by start
+        and then by position in ``pitches`` (the pairwise merge puts bell A first
+        on equal starts).  For each pitch A, a running max over that timeline gives
+        every note's latest earlier A note; when that comes after the note's own
+        previous same-pitch note, the pair (A, note's pitch) has a transition
+        there.  Gaps are summed per pair in timeline order, so the averages match
+        the pairwise merge exactly.
+
+        Args:
+            pitch_index: The score's PitchIndex (score units: ticks or quarter lengths)
+            pitches: Distinct MIDI pitches; matrix rows and columns follow this order
+
+        Returns:
+            (transitions, avg_gap): symmetric P x P arrays of int transition counts
+            and average gaps (inf where a pair has no transitions)
+        """
+        import numpy as np
+
+        count = len(pitches)
+        transitions = np.zeros((count, count), dtype=np.int64)
+        gap_sums = np.zeros((count, count))
+        if pitch_index is not None and len(pitch_index) and count > 1:
+            rank = np.full(256, -1, dtype=np.intp)
+            for r, p in reversed(list(enumerate(pitches))):
+                if 0 <= p < 256:
+                    rank[p] = r
+            notes = pitch_index.notes
+            keep = np.flatnonzero(rank[notes.pitch] >= 0)
+            ranks = rank[notes.pitch[keep]]
+            start = notes.time[keep]
+            end = start + notes.duration[keep]
+
+            # Timeline: by start, then pitch rank; stable, so each pitch keeps score order
+            timeline = np.lexsort((ranks, start))
+            ranks, start, end = ranks[timeline], start[timeline], end[timeline]
+            positions = np.arange(len(ranks))
+
+            # Each note's previous note of the same pitch (-1 for the first)
+            prev_same = np.full(len(ranks), -1, dtype=np.intp)
+            by_pitch = np.argsort(ranks, kind='stable')
+            same = ranks[by_pitch[1:]] == ranks[by_pitch[:-1]]
+            prev_same[by_pitch[1:][same]] = by_pitch[:-1][same]
+
+            at, cells, gaps = [], [], []
+            prev_other = np.empty(len(ranks), dtype=np.intp)
+            for a in np.unique(ranks).tolist():
+                latest = np.maximum.accumulate(np.where(ranks == a, positions, -1))
+                prev_other[0] = -1
+                prev_other[1:] = latest[:-1]
+                follows = np.flatnonzero((ranks != a) & (prev_other > prev_same))
+                b = ranks[follows]
+                at.append(follows)
+                cells.append(np.minimum(a, b) * count + np.maximum(a, b))
+                gaps.append(start[follows] - end[prev_other[follows]])
+
+            if at:
+                in_order = np.argsort(np.concatenate(at), kind='stable')
+                cells = np.concatenate(cells)[in_order]
+                gaps = np.concatenate(gaps)[in_order]
+                # bincount adds in input order: each pair's gaps are summed along the timeline
+                transitions = np.bincount(cells, minlength=count * count).reshape(count, count)
+                gap_sums = np.bincount(cells, weights=gaps, minlength=count * count).reshape(count, count)
+                transitions = transitions + transitions.T
+                gap_sums = gap_sums + gap_sums.T
+
+        avg_gap = np.full((count, count), np.inf)
+        np.divide(gap_sums, transitions, out=avg_gap, where=transitions > 0)
+        return transitions, avg_gap
+
     @staticmethod
     def score_bell_for_player(
         player_assignment,
@@ -7,6 +7,9 @@ because they need to play a bell not currently in their hands.
 
 import logging
 
+from app.services.bell_ids import BellIds
+from app.services.pitch_index import PitchIndex
+
 logger = logging.getLogger(__name__)
 
 
@@ -39,15 +42,13 @@ class SwapCounter:
             return swap_counts
         
         # Get all notes with timing in chronological order
-        all_notes = music_data['notes']
-        if not all_notes:
+        index = PitchIndex.for_music_data(music_data)
+        all_notes = index.notes
+        if not len(all_notes):
             for player_name in assignment.keys():
                 swap_counts[player_name] = 0
             return swap_counts
         
-        # Convert note names to pitches for matching
-        from app.services.music_parser import MusicParser
-        
         for player_name, player_data in assignment.items():
             left_hand = player_data.get('left_hand', [])
             right_hand = player_data.get('right_hand', [])
@@ -58,40 +59,36 @@ class SwapCounter:
                 swap_counts[player_name] = 0
                 continue
             
-            # Build pitch-to-note-name mapping for this player's bells
+            # Pitches of this player's bells (IDs, or names from hand-built arrangements)
             bell_pitches = set()
-            for bell_name in all_bells:
+            for bell in all_bells:
                 try:
-                    pitch = MusicParser.note_name_to_pitch(bell_name)
-                    bell_pitches.add(pitch)
-                except (ValueError, KeyError) as e:
-                    logger.warning(f"Could not convert bell name {bell_name} to pitch: {e}")
+                    bell_pitches.add(BellIds.pitch(bell))
+                except ValueError as e:
+                    logger.warning(f"Could not convert bell name {bell} to pitch: {e}")
             
-            # Get notes played by this player, in chronological order
-            player_notes = [n for n in all_notes if n.get('pitch') in bell_pitches]
-            player_notes.sort(key=lambda n: n.get('time', 0))
+            # Pitches played by this player, in chronological order
+            player_pitches = all_notes.pitch[index.note_indices(bell_pitches)].tolist()
             
-            if len(player_notes) <= 1:
+            if len(player_pitches) <= 1:
                 swap_counts[player_name] = 0
                 continue
             
             # Build hand map for bells
             hand_map = {}  # pitch -> 'left' or 'right'
-            for bell_name in left_hand:
+            for bell in left_hand:
                 try:
-                    pitch = MusicParser.note_name_to_pitch(bell_name)
-                    hand_map[pitch] = 'left'
-                except (ValueError, KeyError) as e:
-                    logger.debug(f"Could not convert left hand bell name {bell_name} to pitch: {e}")
-            for bell_name in right_hand:
+                    hand_map[BellIds.pitch(bell)] = 'left'
+                except ValueError as e:
+                    logger.debug(f"Could not convert left hand bell name {bell} to pitch: {e}")
+            for bell in right_hand:
                 try:
-                    pitch = MusicParser.note_name_to_pitch(bell_name)
-                    hand_map[pitch] = 'right'
-                except (ValueError, KeyError) as e:
-                    logger.debug(f"Could not convert right hand bell name {bell_name} to pitch: {e}")
+                    hand_map[BellIds.pitch(bell)] = 'right'
+                except ValueError as e:
+                    logger.debug(f"Could not convert right hand bell name {bell} to pitch: {e}")
             
             # Count swaps: when player needs to switch which bell they're holding
-            swaps = SwapCounter._count_swaps_for_player(player_notes, hand_map)
+            swaps = SwapCounter._count_swaps_for_pitches(player_pitches, hand_map)
             swap_counts[player_name] = swaps
         
         return swap_counts
@@ -124,11 +121,22 @@ class SwapCounter:
         Returns:
             Integer count of swaps
         """
-        if len(player_notes) <= 1:
-            return 0
+        return SwapCounter._count_swaps_for_pitches([note.get('pitch') for note in player_notes], hand_map)
+    
+    @staticmethod
+    def _count_swaps_for_pitches(pitches, hand_map):
+        """
+        Count swaps for a player's chronological pitch sequence (see _count_swaps_for_player).
         
-        # Get pitches in order (may have duplicates)
-        pitches = [note.get('pitch') for note in player_notes]
+        Args:
+            pitches: List of MIDI pitches in chronological order (may have duplicates)
+            hand_map: Dict mapping pitch -> 'left' or 'right'
+            
+        Returns:
+            Integer count of swaps
+        """
+        if len(pitches) <= 1:
+            return 0
         
         # Get unique pitches in order of first appearance
         unique_pitches = []
@@ -0,0 +1,104 @@
+"""
+Tempo Map
+Piecewise-constant tempo over a score, used to convert note positions to
+milliseconds once at parse time.
+
+Positions are in the score's native unit: ticks for MIDI (units per beat =
+ticks_per_beat) and quarter lengths for MusicXML (units per beat = 1).  The
+parsers fill the NoteTable's start_ms / end_ms columns with one vectorized
+convert() call (NoteTable.annotate), so downstream services read them
+directly instead of re-deriving milliseconds on every call.
+
+Parsed notes are also guaranteed to be in score order (ascending position,
+ties in parser order), so services select a player's or a bell's notes by
+filtering and never need to re-sort them.
+"""
+
+from bisect import bisect_right
+
+
+class TempoMap:
+    """Convert score positions to milliseconds across tempo changes"""
+
+    def __init__(self, changes=(), units_per_beat=1, initial_bpm=120):
+        """
+        Args:
+            changes: Iterable of (position, bpm); a later entry at the same position wins
+            units_per_beat: Position units per beat (ticks_per_beat for MIDI, 1 for MusicXML)
+            initial_bpm: Tempo before the first change
+        """
+        self.units_per_beat = max(units_per_beat or 1, 1)
+
+        by_position = {0.0: float(max(initial_bpm or 120, 1))}
+        for position, bpm in changes:
+            if bpm and bpm > 0:
+                by_position[max(float(position), 0.0)] = float(bpm)
+
+        self.positions = sorted(by_position)
+        self.bpms = [by_position[p] for p in self.positions]
+
+        # Milliseconds elapsed at the start of each segment
+        self.segment_ms = [0.0]
+        for i in range(1, len(self.positions)):
+            span = self.positions[i] - self.positions[i - 1]
+            self.segment_ms.append(
+                self.segment_ms[-1] + span / self.units_per_beat * (60000.0 / self.bpms[i - 1])
+            )
+
+    @staticmethod
+    def from_music_data(music_data):
+        """Build the tempo map described by a music_data dict"""
+        fmt = music_data.get('format', 'midi')
+        units_per_beat = music_data.get('ticks_per_beat', 480) if fmt == 'midi' else 1
+        return TempoMap(
+            changes=music_data.get('tempo_map') or (),
+            units_per_beat=units_per_beat,
+            initial_bpm=music_data.get('tempo', 120),
+        )
+
+    @staticmethod
+    def ensure_time_order(notes):
+        """Stable-sort notes by score position in place unless already ordered.
+
+        A linear check for parsed scores, which arrive in order; hand-built note
+        lists are sorted once here so callers can rely on the ordering.
+        """
+        positions = [n.get('time', n.get('offset', 0)) for n in notes]
+        if any(positions[i] < positions[i - 1] for i in range(1, len(positions))):
+            order = sorted(range(len(notes)), key=positions.__getitem__)
+            notes[:] = [notes[i] for i in order]
+        return notes
+
+    def to_list(self):
+        """Serializable [[position, bpm], ...] form, stored as music_data['tempo_map']"""
+        return [[p, b] for p, b in zip(self.positions, self.bpms)]
+
+    def bpm_at(self, position):
+        """Tempo in effect at a score position"""
+        return self.bpms[max(bisect_right(self.positions, float(position)) - 1, 0)]
+
+    def convert(self, starts, durations):
+        """Convert position and duration arrays to (start_ms, end_ms) arrays"""
+        import numpy as np
+
+        starts = np.asarray(starts, dtype=np.float64)
+        durations = np.asarray(durations, dtype=np.float64)
+        positions = np.asarray(self.positions, dtype=np.float64)
+        ms_per_unit = 60000.0 / np.asarray(self.bpms, dtype=np.float64)
+        segment_ms = np.asarray(self.segment_ms, dtype=np.float64)
+
+        def segment_of(values):
+            return np.clip(np.searchsorted(positions, values, side='right') - 1, 0, None)
+
+        ends = starts + durations
+        start_seg = segment_of(starts)
+        end_seg = segment_of(ends)
+        start_ms = segment_ms[start_seg] + (starts - positions[start_seg]) / self.units_per_beat * ms_per_unit[start_seg]
+        # Notes inside one segment add their converted duration (as a per-call
+        # conversion would); only notes spanning a tempo change are split.
+        end_ms = np.where(
+            start_seg == end_seg,
+            start_ms + durations / self.units_per_beat * ms_per_unit[start_seg],
+            segment_ms[end_seg] + (ends - positions[end_seg]) / self.units_per_beat * ms_per_unit[end_seg],
+        )
+        return start_ms, end_ms
@@ -0,0 +1,133 @@
+"""
+Track Selection
+Which MIDI tracks and channels contribute notes to a parse.
+
+Scores often carry parts that should not be rung: a General MIDI drum kit on
+channel 10 (its "pitches" are drum sounds) or accompaniment tracks.  Hymn
+files also often double one line on several tracks (organ manuals plus a
+vocal track); merge_doublings collapses those into single rings.  They
+inflate unique_notes and force virtual players.  The MIDI decoders check the
+selection per note event, so notes on deselected tracks or channels are never
+allocated; tempo events are still read from every track.
+
+Tracks are zero-based indices in file order (the NoteTable 'track' column).
+Channels are numbered 1-16 at the API, as in General MIDI, and zero-based
+internally.  Percussion (channel 10) is dropped unless it is asked for.
+Doublings are kept unless merging is asked for.
+"""
+
+PERCUSSION_CHANNEL = 9  # General MIDI channel 10, zero-based
+
+_NO_CHANNELS = (False,) * 16
+
+
+class TrackSelection:
+    """Track and channel filter for MIDI note events (None means no restriction)"""
+
+    def __init__(self, tracks=None, exclude_tracks=(), channels=None, exclude_channels=(),
+                 include_percussion=False, merge_doublings=False):
+        """
+        Args:
+            tracks: Track indices to keep (None keeps every track)
+            exclude_tracks: Track indices to drop
+            channels: Zero-based channels to keep (None keeps every channel)
+            exclude_channels: Zero-based channels to drop
+            include_percussion: Keep channel 10 even when channels does not name it
+            merge_doublings: Collapse same-pitch notes with overlapping spans
+                             across tracks into one note (NoteTable.merge_doublings)
+        """
+        for channel in list(channels or ()) + list(exclude_channels):
+            if not 0 <= channel < 16:
+                raise ValueError(f"MIDI channels are 1-16, got {channel + 1}")
+        self.tracks = frozenset(tracks) if tracks is not None else None
+        self.exclude_tracks = frozenset(exclude_tracks)
+        self.channels = frozenset(channels) if channels is not None else None
+        self.exclude_channels = frozenset(exclude_channels)
+        self.include_percussion = bool(include_percussion)
+        self.merge_doublings = bool(merge_doublings)
+
+        allowed = [
+            (self.channels is None or c in self.channels) and c not in self.exclude_channels
+            for c in range(16)
+        ]
+        if not self.include_percussion and (self.channels is None or PERCUSSION_CHANNEL not in self.channels):
+            allowed[PERCUSSION_CHANNEL] = False
+        self.channel_allowed = tuple(allowed)
+
+    @staticmethod
+    def from_form(form):
+        """
+        Build a selection from request form fields.
+
+        Fields (all optional): 'tracks', 'exclude_tracks', 'channels' and
+        'exclude_channels' as comma-separated numbers (channels 1-16), and
+        'include_percussion' and 'merge_doublings' as true/false.
+
+        Raises:
+            ValueError: If a field is malformed
+        """
+        def numbers(field, offset=0):
+            value = (form.get(field) or '').strip()
+            if not value:
+                return None
+            try:
+                return [int(part) - offset for part in value.split(',') if part.strip()]
+            except ValueError:
+                raise ValueError(f"{field} must be a comma-separated list of numbers")
+
+        def flag(field):
+            return str(form.get(field, '')).lower() in ('1', 'true', 'yes', 'on')
+
+        return TrackSelection(
+            tracks=numbers('tracks'),
+            exclude_tracks=numbers('exclude_tracks') or (),
+            channels=numbers('channels', offset=1),
+            exclude_channels=numbers('exclude_channels', offset=1) or (),
+            include_percussion=flag('include_percussion'),
+            merge_doublings=flag('merge_doublings'),
+        )
+
+    def track_allowed(self, track):
+        """True if notes on this track are kept"""
+        return (self.tracks is None or track in self.tracks) and track not in self.exclude_tracks
+
+    def channels_for_track(self, track):
+        """Per-channel keep flags for one track (all False for a deselected track)"""
+        return self.channel_allowed if self.track_allowed(track) else _NO_CHANNELS
+
+    def key(self):
+        """Canonical string for cache keys; empty for the default selection"""
+        if self == DEFAULT_SELECTION:
+            return ''
+        tracks, exclude_tracks, channel_allowed, merge_doublings = self._state()
+        parts = []
+        if tracks is not None:
+            parts.append('t' + '.'.join(map(str, sorted(tracks))))
+        if exclude_tracks:
+            parts.append('xt' + '.'.join(map(str, sorted(exclude_tracks))))
+        parts.append('c' + ''.join('1' if allowed else '0' for allowed in channel_allowed))
+        if merge_doublings:
+            parts.append('md')
+        return '-'.join(parts)
+
+    def _state(self):
+        """(kept tracks or None, excluded tracks, channel flags, merge flag) with redundant settings folded"""
+        tracks = None
+        if self.tracks is not None:
+            tracks = self.tracks - self.exclude_tracks
+        exclude_tracks = self.exclude_tracks if tracks is None else frozenset()
+        return tracks, exclude_tracks, self.channel_allowed, self.merge_doublings
+
+    def __eq__(self, other):
+        return isinstance(other, TrackSelection) and self._state() == other._state()
+
+    def __hash__(self):
+        return hash(self._state())
+
+    def __repr__(self):
+        return f"TrackSelection({self.key() or 'default'})"
+
+
+DEFAULT_SELECTION = TrackSelection()
+
+ALL_NOTES = TrackSelection(include_percussion=True)
@@ -3,6 +3,8 @@ from dotenv import load_dotenv
 
 load_dotenv()
 
+_CPUS = os.cpu_count() or 1
+
 class Config:
     """Base configuration"""
     FLASK_ENV = os.getenv('FLASK_ENV', 'development')
@@ -10,7 +12,28 @@ class Config:
     UPLOAD_FOLDER = os.path.join(os.path.dirname(__file__), 'uploads')
     MAX_CONTENT_LENGTH = 5 * 1024 * 1024  # 5MB max file size
     REQUEST_TIMEOUT = 30  # 30 second timeout
-    ALLOWED_EXTENSIONS = {'mid', 'midi', 'musicxml', 'xml'}
+    # Parser processes (killed and replaced when a request's deadline passes); 0 parses in the
+    # request thread.  A file that runs to the deadline holds its worker until then and other
+    # uploads queue for the rest, so keep at least 2 (default: one per core, 2 to 4)
+    PARSE_WORKERS = int(os.getenv('PARSE_WORKERS', min(4, max(2, _CPUS))))
+    # Processes that run the arrangement strategies side by side (default: one per core, up to
+    # the 5 strategies, when there is more than one core); 0 runs them in the request thread
+    STRATEGY_WORKERS = int(os.getenv('STRATEGY_WORKERS', min(5, _CPUS) if _CPUS > 1 else 0))
+    PARSE_CACHE_MAX_BYTES = int(os.getenv('PARSE_CACHE_MAX_BYTES', 64 * 1024 * 1024))  # 0 disables the cache
+    # Persistent parse cache (survives restarts); disabled unless a directory is configured
+    PARSE_CACHE_DIR = os.getenv('PARSE_CACHE_DIR')
+    PARSE_CACHE_DISK_MAX_BYTES = int(os.getenv('PARSE_CACHE_DISK_MAX_BYTES', 256 * 1024 * 1024))
+    # Onsets this close (ms) are one chord when picking melody notes; raise for humanized MIDI
+    MELODY_ONSET_TOLERANCE_MS = float(os.getenv('MELODY_ONSET_TOLERANCE_MS', 0))
+    ALLOWED_EXTENSIONS = {'mid', 'midi', 'musicxml', 'xml', 'mxl'}
+    # Decoded score caps, checked while parsing so huge files are rejected early (0 disables)
+    MAX_NOTE_EVENTS = int(os.getenv('MAX_NOTE_EVENTS', 250000))
+    MAX_UNIQUE_PITCHES = int(os.getenv('MAX_UNIQUE_PITCHES', 88))  # a full piano keyboard
+    # Simulated-annealing pass over the best greedy arrangement: a fixed, seeded number of
+    # moves (repeatable), with ANNEAL_BUDGET_MS as a wall-clock safety limit (0 disables the
+    # pass).  ANNEAL_MAX_MOVES=0 searches until the budget runs out, which is not repeatable.
+    ANNEAL_BUDGET_MS = int(os.getenv('ANNEAL_BUDGET_MS', 2000))
+    ANNEAL_MAX_MOVES = int(os.getenv('ANNEAL_MAX_MOVES', 4000))
     MIN_PLAYERS = 1
     MAX_PLAYERS = 64  # 128 unique MIDI pitches / 2 (minimum bells per player)
     
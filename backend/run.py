@@ -1,10 +1,34 @@
-from app import create_app
+import multiprocessing
 import os
+import sys
 
-# Create Flask app
-app = create_app(os.getenv('FLASK_ENV', 'development'))
 
-if __name__ == '__main__':
+def main():
+    # `python run.py --profile-startup` reports per-module import time and exits
+    profiler = None
+    if '--profile-startup' in sys.argv:
+        from startup_profile import StartupProfiler
+        profiler = StartupProfiler().install()
+
+    from app import create_app
+
+    # Create Flask app
+    app = create_app(os.getenv('FLASK_ENV', 'development'))
+
+    if profiler is not None:
+        profiler.finish()
+        print(profiler.report())
+        sys.exit(1 if profiler.over_budget() else 0)
+
     # Only enable debug mode in development, never in production
     debug_mode = os.getenv('FLASK_ENV') != 'production'
     app.run(debug=debug_mode, port=5000)
+
+
+# Parse and strategy workers are spawned processes that re-import this file as
+# __mp_main__, so building the app stays under the guard: a worker must not
+# create (and start parsing with) an app of its own
+if __name__ == '__main__':
+    # Workers of the frozen (PyInstaller) build re-enter here
+    multiprocessing.freeze_support()
+    main()
@@ -37,11 +37,27 @@ a = Analysis(
         'app.services.music_parser',
         'app.services.midi_parser',
         'app.services.musicxml_parser',
+        'app.services.musicxml_stream_parser',
+        'app.services.parse_cache',
+        'app.services.disk_parse_cache',
+        'app.services.tempo_map',
+        'app.services.smf_decoder',
+        'app.services.note_table',
+        'app.services.pitch_index',
+        'app.services.bell_ids',
+        'app.services.hand_state',
+        'app.services.music_profile',
+        'app.services.track_selection',
+        'app.services.mxl_container',
+        'app.services.parse_limits',
+        'app.services.parse_worker_pool',
         'app.services.melody_harmony_extractor',
         'app.services.bell_assignment',
         'app.services.conflict_resolver',
         'app.services.arrangement_validator',
         'app.services.arrangement_generator',
+        'app.services.arrangement_annealer',
+        'app.services.strategy_worker_pool',
         'app.services.swap_counter',
         'app.services.export_formatter',
         
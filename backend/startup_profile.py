@@ -0,0 +1,86 @@
+"""
+Startup Profiler
+Records how long each module takes to import while the backend starts.
+
+Used by ``python run.py --profile-startup``.  The hook is installed before the
+app package is imported, so Flask, mido and every service are measured.
+music21 is loaded on first MusicXML fallback and should not appear here.
+"""
+
+import builtins
+import importlib.util
+import os
+import sys
+import time
+
+
+class StartupProfiler:
+    """Time first-time module imports by wrapping builtins.__import__"""
+
+    def __init__(self):
+        self.records = {}  # module name -> (cumulative_seconds, self_seconds)
+        self.total_seconds = None
+        self._stack = []
+        self._original_import = None
+        self._started = None
+
+    def install(self):
+        """Start recording imports"""
+        self._original_import = builtins.__import__
+        builtins.__import__ = self._import
+        self._started = time.perf_counter()
+        return self
+
+    def finish(self):
+        """Stop recording and fix the total startup time"""
+        if self._original_import is not None:
+            builtins.__import__ = self._original_import
+            self._original_import = None
+        if self.total_seconds is None and self._started is not None:
+            self.total_seconds = time.perf_counter() - self._started
+        return self
+
+    def _import(self, name, globals=None, locals=None, fromlist=(), level=0):
+        original = self._original_import
+        try:
+            package = (globals or {}).get('__package__') if level else None
+            absolute = importlib.util.resolve_name('.' * level + name, package) if level else name
+        except (ImportError, ValueError):
+            absolute = name
+
+        candidates = [absolute] + [f"{absolute}.{f}" for f in (fromlist or ()) if f != '*']
+        pending = [m for m in candidates if m not in sys.modules]
+        if not pending:
+            return original(name, globals, locals, fromlist, level)
+
+        self._stack.append(0.0)
+        start = time.perf_counter()
+        try:
+            return original(name, globals, locals, fromlist, level)
+        finally:
+            elapsed = time.perf_counter() - start
+            children = self._stack.pop()
+            if self._stack:
+                self._stack[-1] += elapsed
+            loaded = [m for m in pending if m in sys.modules]
+            if loaded and loaded[0] not in self.records:
+                self.records[loaded[0]] = (elapsed, elapsed - children)
+
+    def report(self, limit=25):
+        """Format the slowest imports (by cumulative time) as a text table"""
+        lines = [f"Backend startup: {self.total_seconds * 1000:.1f} ms"]
+        lines.append(f"{'cumulative ms':>14} {'self ms':>9}  module")
+        ranked = sorted(self.records.items(), key=lambda item: item[1][0], reverse=True)
+        for module, (cumulative, own) in ranked[:limit]:
+            lines.append(f"{cumulative * 1000:>14.1f} {own * 1000:>9.1f}  {module}")
+        heavy = [m for m in ('music21', 'numpy') if m in sys.modules]
+        if heavy:
+            lines.append(f"Loaded at startup (expected on first use): {', '.join(heavy)}")
+        return '\n'.join(lines)
+
+    def over_budget(self):
+        """Return True if STARTUP_BUDGET_MS is set and startup took longer"""
+        budget = os.getenv('STARTUP_BUDGET_MS')
+        if not budget:
+            return False
+        return self.total_seconds * 1000 > float(budget)
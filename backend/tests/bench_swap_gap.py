@@ -0,0 +1,108 @@
+"""
+Swap-Gap Check Benchmark
+Times the hand swap-gap check against the merged-timeline check it replaced.
+
+Run from the backend directory:
+
+    python tests/bench_swap_gap.py [--checks N] [--seed S]
+
+Before the pairwise min-gap matrix, _check_swap_gap_for_hand merged the event
+lists of every bell on the hand plus the candidate on each call (reproduced
+below as _merged_check).  It now looks up PitchIndex.gap_matrix_ms, which is
+built once per score.  Both checks run on the same synthetic scores of 40 or
+more pitches and must agree on every hand, as
+test_swap_gap_check_equals_merged_timeline_check asserts on small scores.
+
+    pass   hands that never swap too fast, so the old check walks the whole timeline
+    dense  random hands on overlapping notes, which mostly fail early
+"""
+
+import argparse
+import heapq
+import os
+import random
+import sys
+import time
+from operator import itemgetter
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from app.services.bell_assignment import BellAssignmentAlgorithm  # noqa: E402
+from app.services.note_table import NoteTable  # noqa: E402
+from app.services.pitch_index import PitchIndex  # noqa: E402
+
+# (case, pitch count, note count, min gap ms): 120 BPM, so a 240-tick note lasts 250 ms
+CASES = [
+    ('pass', 40, 5000, 200),
+    ('pass', 48, 20000, 200),
+    ('pass', 61, 50000, 200),
+    ('dense', 40, 5000, 500),
+    ('dense', 61, 50000, 500),
+]
+
+
+def _merged_check(existing_hand, new_bell, pitch_index, min_gap):
+    """The check before the matrix: a linear merge of the hand's per-pitch timelines"""
+    new_events = pitch_index.events_ms(new_bell)
+    if not new_events:
+        return True
+    streams = [pitch_index.events_ms(p) for p in set(existing_hand) if pitch_index.count(p)]
+    streams.append(new_events)
+    prev = None
+    for curr in heapq.merge(*streams, key=itemgetter(0)):
+        if prev is not None and prev[2] != curr[2] and curr[0] - prev[1] < min_gap:
+            return False
+        prev = curr
+    return True
+
+
+def _score(case, pitch_count, note_count, rng):
+    """NoteTable of a synthetic score; 'pass' notes follow each other 250 ms apart"""
+    pitches = list(range(36, 36 + pitch_count))
+    if case == 'pass':
+        times = [i * 480 for i in range(note_count)]
+    else:
+        times = sorted(rng.randrange(0, note_count * 120, 60) for _ in range(note_count))
+    notes = [{'pitch': rng.choice(pitches), 'velocity': 80, 'time': t, 'duration': 240} for t in times]
+    return NoteTable.from_music_data({'notes': notes, 'format': 'midi', 'tempo': 120, 'ticks_per_beat': 480})
+
+
+def run(checks, seed):
+    """Print one line per case: the one-time matrix build and both checks' total time"""
+    rng = random.Random(seed)
+    print(f"{'case':<6} {'pitches':>7} {'notes':>6} {'checks':>6} {'build ms':>9} "
+          f"{'merge ms':>9} {'matrix ms':>10} {'failed':>6}")
+    for case, pitch_count, note_count, min_gap in CASES:
+        table = _score(case, pitch_count, note_count, rng)
+        index = PitchIndex(table)
+        pitches = list(range(36, 36 + pitch_count))
+        hands = [(rng.sample(pitches, rng.randrange(1, 4)), rng.choice(pitches)) for _ in range(checks)]
+        config = {'min_gap_ms': {'experienced': min_gap}}
+
+        for pitch in pitches:
+            index.events_ms(pitch)  # the merge's per-pitch lists are also built once per score
+        start = time.perf_counter()
+        index.min_gap_ms(pitches[0], pitches[1])  # builds the matrix and its lookup rows
+        build = time.perf_counter() - start
+
+        start = time.perf_counter()
+        expected = [_merged_check(hand, bell, index, min_gap) for hand, bell in hands]
+        merge = time.perf_counter() - start
+
+        start = time.perf_counter()
+        actual = [BellAssignmentAlgorithm._check_swap_gap_for_hand(hand, bell, index, config, 'experienced')
+                  for hand, bell in hands]
+        matrix = time.perf_counter() - start
+
+        if actual != expected:
+            raise AssertionError(f"{case} {pitch_count}/{note_count}: matrix check disagrees with the merge")
+        print(f"{case:<6} {pitch_count:>7} {note_count:>6} {checks:>6} {build * 1000:>9.1f} "
+              f"{merge * 1000:>9.1f} {matrix * 1000:>10.1f} {expected.count(False):>6}")
+
+
+if __name__ == '__main__':
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[1])
+    parser.add_argument('--checks', type=int, default=500, help='hands checked per score (default 500)')
+    parser.add_argument('--seed', type=int, default=0, help='random seed for scores and hands')
+    args = parser.parse_args()
+    run(args.checks, args.seed)
@@ -0,0 +1,85 @@
+"""
+Unit tests for the /api/analyze endpoint
+Tests score metadata and reuse of its cache key by /api/generate-arrangements
+"""
+
+import io
+import json
+from io import BytesIO
+
+import mido
+import pytest
+from app import create_app
+
+
+def _midi(pitches):
+    mid = mido.MidiFile(ticks_per_beat=480)
+    track = mido.MidiTrack()
+    mid.tracks.append(track)
+    track.append(mido.MetaMessage('set_tempo', tempo=500000))
+    for p in pitches:
+        track.append(mido.Message('note_on', note=p, velocity=80, time=0))
+        track.append(mido.Message('note_off', note=p, time=480))
+    buf = BytesIO()
+    mid.save(file=buf)
+    return buf.getvalue()
+
+
+@pytest.fixture(scope='module')
+def client():
+    app = create_app()
+    app.config['PARSE_WORKERS'] = 0
+    app.extensions.pop('parse_pool', None)
+    return app.test_client()
+
+
+def test_analyze_reports_score_metadata(client):
+    """Pitches, range, duration, event count and the minimum player estimate"""
+    response = client.post(
+        '/api/analyze',
+        data={'file': (io.BytesIO(_midi([60, 62, 64, 65, 67, 69, 71, 72, 60])), 'scale.mid'),
+              'players': json.dumps([{'name': 'A', 'experience': 'beginner'}])},
+        content_type='multipart/form-data',
+    )
+
+    body = response.json
+    assert response.status_code == 200
+    assert body['unique_pitches'] == [60, 62, 64, 65, 67, 69, 71, 72]
+    assert body['unique_notes'][0] == 'C4'
+    assert body['range'] == {'lowest': 60, 'highest': 72, 'lowest_name': 'C4',
+                             'highest_name': 'C5', 'semitones': 12}
+    assert body['event_count'] == 9
+    assert body['duration_ms'] == 4500
+    assert body['minimum_players'] == 3  # 2-bell beginner plus two 3-bell virtual players
+    assert [p['count'] for p in body['pitches']][0] == 2
+    assert body['cache_key'].startswith('midi:')
+
+
+def test_generate_reuses_cache_key(client):
+    """generate-arrangements accepts the analyze cache key in place of the file"""
+    data = _midi([60, 62, 64, 65])
+    cache_key = client.post(
+        '/api/analyze', data={'file': (io.BytesIO(data), 'four.mid')}, content_type='multipart/form-data',
+    ).json['cache_key']
+
+    players = [{'name': 'A', 'experience': 'experienced'}, {'name': 'B', 'experience': 'experienced'}]
+    response = client.post(
+        '/api/generate-arrangements',
+        data={'cache_key': cache_key, 'players': json.dumps(players)},
+        content_type='multipart/form-data',
+    )
+
+    assert response.status_code == 200
+    assert response.json['note_count'] == 4
+    assert response.json['cache_key'] == cache_key
+    bells = {b for a in response.json['best_arrangement']['assignments'].values() for b in a['bells']}
+    assert bells == {'C4', 'D4', 'E4', 'F4'}
+
+
+def test_unknown_cache_key_without_file_is_a_cache_miss(client):
+    response = client.post(
+        '/api/analyze', data={'cache_key': 'midi:0000'}, content_type='multipart/form-data',
+    )
+
+    assert response.status_code == 404
+    assert response.json['code'] == 'ERR_CACHE_MISS'
@@ -0,0 +1,169 @@
+"""
+Unit tests for ArrangementAnnealer
+Tests the simulated-annealing local search and its 'anneal' arrangement
+"""
+
+import copy
+import io
+import json
+import random
+import time
+
+import mido
+from app import create_app
+from app.services.arrangement_annealer import ArrangementAnnealer, _AnnealState
+from app.services.arrangement_generator import ArrangementGenerator
+from app.services.arrangement_validator import ArrangementValidator
+from app.services.pitch_index import PitchIndex
+from config import Config
+
+
+def _music_data(notes):
+    """music_data for (pitch, beat, beats) notes at 120 BPM (500 ms per beat)"""
+    return {
+        'notes': [{'pitch': p, 'time': int(t * 480), 'duration': int(d * 480)} for p, t, d in notes],
+        'unique_notes': sorted({p for p, _, _ in notes}),
+        'format': 'midi', 'tempo': 120, 'ticks_per_beat': 480,
+    }
+
+
+def _hand_gap(pitch_index, hand):
+    pitches = [b for b in hand if pitch_index.count(b)]
+    return min((pitch_index.min_gap_ms(a, b) for i, a in enumerate(pitches) for b in pitches[i + 1:]),
+               default=float('inf'))
+
+
+def test_moves_keep_bells_caps_and_swap_gaps():
+    """Every bell stays assigned once, caps hold, hands stay balanced and no tighter than allowed; input untouched"""
+    rng = random.Random(5)
+    pitches = list(range(60, 72))
+    music_data = _music_data([(rng.choice(pitches), rng.randrange(96) / 2, 0.5) for _ in range(200)])
+    players = [{'name': 'A', 'experience': 'experienced'}, {'name': 'B', 'experience': 'intermediate'},
+               {'name': 'C', 'experience': 'intermediate'}, {'name': 'D', 'experience': 'beginner'}]
+    assignment = {
+        'A': {'bells': [60, 61, 62, 63, 64], 'left_hand': [60, 62, 64], 'right_hand': [61, 63]},
+        'B': {'bells': [65, 66, 67], 'left_hand': [65, 67], 'right_hand': [66]},
+        'C': {'bells': [68, 69, 70], 'left_hand': [68], 'right_hand': [69, 70]},
+        'D': {'bells': [71], 'left_hand': [71], 'right_hand': []},
+    }
+    original = copy.deepcopy(assignment)
+
+    result = ArrangementAnnealer.anneal(assignment, music_data, players, budget_ms=10_000, max_moves=3000, seed=1)
+    again = ArrangementAnnealer.anneal(assignment, music_data, players, budget_ms=10_000, max_moves=3000, seed=1)
+
+    assert assignment == original
+    assert again['assignment'] == result['assignment']  # max_moves stops it, so the run repeats
+    assert result['moves'] == 3000 and result['score'] >= result['start_score']
+
+    index = PitchIndex.for_music_data(music_data)
+    caps = {p['name']: Config.MAX_BELLS_PER_EXPERIENCE[p['experience']] for p in players}
+    gaps = {p['name']: Config.MIN_SWAP_GAP_MS[p['experience']] for p in players}
+    placed = []
+    for name, data in result['assignment'].items():
+        assert 1 <= len(data['bells']) <= caps[name]
+        assert sorted(data['left_hand'] + data['right_hand']) == sorted(data['bells'])
+        assert len(data['bells']) < 2 or (data['left_hand'] and data['right_hand'])
+        for hand in ('left_hand', 'right_hand'):
+            before = _hand_gap(index, original[name][hand]) if name in original else float('inf')
+            assert _hand_gap(index, data[hand]) >= min(gaps[name], before)
+        placed += data['bells']
+    assert sorted(placed) == pitches
+
+
+def test_moves_never_empty_a_hand():
+    """No move leaves a player with two or more bells holding them all in one hand"""
+    rng = random.Random(7)
+    music_data = _music_data([(rng.choice(range(60, 68)), i, 1) for i in range(64)])
+    players = [{'name': 'A', 'experience': 'experienced'}, {'name': 'B', 'experience': 'intermediate'}]
+    assignment = {
+        'A': {'bells': [60, 61, 62, 63, 64], 'left_hand': [60, 62, 64], 'right_hand': [61, 63]},
+        'B': {'bells': [65, 66, 67], 'left_hand': [65], 'right_hand': [66, 67]},
+    }
+    state = _AnnealState(assignment, PitchIndex.for_music_data(music_data), players,
+                         {'MIN_SWAP_GAP_MS': {'experienced': 0, 'intermediate': 0}})
+
+    applied = 0
+    for _ in range(2000):
+        if state.random_move(rng) is not None:
+            applied += 1
+        for left, right in state.hands:
+            assert len(left) + len(right) < 2 or (left and right)
+    assert applied > 100
+
+
+def test_climbs_out_of_impossible_swaps():
+    """A hand alternating two bells 250 ms apart fails hard; moving one to a free hand fixes it"""
+    notes = [(60 if i % 2 == 0 else 62, i / 2, 0.5) for i in range(16)] + [(64, 10, 1)]
+    music_data = _music_data(notes)
+    players = [{'name': 'A', 'experience': 'experienced'}, {'name': 'B', 'experience': 'experienced'}]
+    assignment = {
+        'A': {'bells': [60, 62], 'left_hand': [60, 62], 'right_hand': []},
+        'B': {'bells': [64], 'left_hand': [64], 'right_hand': []},
+    }
+    assert ArrangementValidator.calculate_quality_breakdown(assignment, music_data)['hard_fail']
+
+    result = ArrangementAnnealer.anneal(assignment, music_data, players, budget_ms=10_000, max_moves=500)
+
+    breakdown = ArrangementValidator.calculate_quality_breakdown(result['assignment'], music_data)
+    assert not breakdown['hard_fail'] and breakdown['final_score'] > 0
+    assert round(result['score'], 2) == breakdown['final_score']
+    assert result['start_score'] < 0 < result['score']
+
+
+def test_generator_adds_anneal_arrangement():
+    """generate() appends an 'anneal' arrangement no worse than the best greedy one; a short deadline or zero budget skips it"""
+    rng = random.Random(2)
+    music_data = _music_data([(rng.choice(range(60, 70)), i / 2, 0.5) for i in range(120)])
+    players = [{'name': f'P{i}', 'experience': e}
+               for i, e in enumerate(['experienced', 'intermediate', 'intermediate', 'beginner'])]
+    app = create_app()
+    app.config.update(ANNEAL_BUDGET_MS=10_000, ANNEAL_MAX_MOVES=2000)
+
+    with app.app_context():
+        result = ArrangementGenerator().generate(music_data, players)
+        by_strategy = {a['strategy']: a for a in result['arrangements']}
+        greedy_best = max(a['quality_score'] for a in result['arrangements'] if a['strategy'] != 'anneal')
+        assert by_strategy['anneal']['quality_score'] >= greedy_best
+        assert [a['quality_score'] for a in result['arrangements']] == sorted(
+            (a['quality_score'] for a in result['arrangements']), reverse=True)
+
+        # Less than the budget left before the request deadline skips it as well
+        result = ArrangementGenerator().generate(music_data, players, deadline=time.monotonic() + 5)
+        assert 'anneal' not in [a['strategy'] for a in result['arrangements']]
+
+        app.config['ANNEAL_BUDGET_MS'] = 0
+        strategies = [a['strategy'] for a in ArrangementGenerator().generate(music_data, players)['arrangements']]
+        assert 'anneal' not in strategies
+
+
+def test_repeated_requests_give_identical_output():
+    """With the default config (fixed, seeded move count) the same request returns the same arrangements"""
+    rng = random.Random(4)
+    mid = mido.MidiFile(ticks_per_beat=480)
+    track = mido.MidiTrack()
+    mid.tracks.append(track)
+    for _ in range(160):
+        pitch = rng.choice(range(60, 76))
+        track.append(mido.Message('note_on', note=pitch, velocity=80, time=rng.choice([0, 240])))
+        track.append(mido.Message('note_off', note=pitch, time=240))
+    buf = io.BytesIO()
+    mid.save(file=buf)
+    players = [{'name': f'P{i}', 'experience': e}
+               for i, e in enumerate(['experienced', 'intermediate', 'intermediate', 'beginner'])]
+    app = create_app()
+    app.config['PARSE_WORKERS'] = 0
+    app.extensions['parse_pool'] = None
+    client = app.test_client()
+
+    bodies = []
+    for _ in range(2):
+        response = client.post(
+            '/api/generate-arrangements',
+            data={'file': (io.BytesIO(buf.getvalue()), 'song.mid'), 'players': json.dumps(players)},
+            content_type='multipart/form-data',
+        )
+        assert response.status_code == 200
+        bodies.append(response.json)
+
+    assert 'anneal' in [a['strategy'] for a in bodies[0]['arrangements']]
+    assert bodies[0]['arrangements'] == bodies[1]['arrangements']
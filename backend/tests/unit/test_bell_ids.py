@@ -0,0 +1,65 @@
+"""
+Unit tests for BellIds
+Tests integer bell IDs and the conversions to note names at the boundary
+"""
+
+import random
+
+from app.services.bell_assignment import BellAssignmentAlgorithm
+from app.services.bell_ids import BellIds
+from app.services.export_formatter import ExportFormatter
+from app.services.music_parser import MusicParser
+
+
+def _music_data(seed, pitches, count=200):
+    rng = random.Random(seed)
+    notes = [
+        {'pitch': rng.choice(pitches), 'velocity': 80,
+         'time': rng.randrange(0, 480 * 48, 120), 'duration': rng.choice([120, 240, 480])}
+        for _ in range(count)
+    ]
+    notes.sort(key=lambda n: n['time'])
+    return {'notes': notes, 'format': 'midi', 'tempo': 120, 'ticks_per_beat': 480}
+
+
+def test_encode_keeps_distinct_spellings():
+    """Names map to pitches; unparsable bells and repeated spellings keep themselves as IDs"""
+    ids, spellings = BellIds.encode(['C4', 61, 'C#4', 'X9', 'C4'])
+
+    assert ids == {'C4': 60, 61: 61, 'C#4': 'C#4', 'X9': 'X9'}
+    assert spellings == {60: 'C4', 61: 61, 'C#4': 'C#4', 'X9': 'X9'}
+    assert BellIds.name(61) == 'C#4'
+    assert BellIds.pitch('C#4') == 61
+    assert BellIds.normalize('X9') == 'X9'
+
+
+def test_assignments_match_between_pitches_and_names():
+    """Every strategy assigns the same bells whether notes are given as pitches or names"""
+    pitches = [48, 50, 52, 53, 55, 57, 59, 60, 62, 64, 65, 67, 69, 71, 72]
+    music_data = _music_data(3, pitches)
+    names = [MusicParser.pitch_to_note_name(p) for p in pitches]
+    players = [{'name': f'P{i}', 'experience': e}
+               for i, e in enumerate(['experienced', 'experienced', 'intermediate', 'beginner'])]
+    config = {'MIN_SWAP_GAP_MS': {'experienced': 300, 'intermediate': 600, 'beginner': 1200}}
+
+    for strategy in ['experienced_first', 'balanced', 'min_transitions', 'fatigue_snake', 'activity_snake']:
+        by_pitch = BellAssignmentAlgorithm.assign_bells(
+            pitches, players, strategy=strategy, priority_notes=pitches[7:10],
+            config=config, note_timings=music_data['notes'])
+        by_name = BellAssignmentAlgorithm.assign_bells(
+            names, players, strategy=strategy, priority_notes=names[7:10],
+            config=config, note_timings=music_data['notes'])
+
+        assert all(isinstance(b, int) for data in by_pitch.values() for b in data['bells'])
+        assert BellIds.to_names(by_pitch) == by_name
+
+
+def test_export_names_integer_bells():
+    """The CSV export writes note names for integer bell IDs"""
+    arrangement = {'Alice': {'bells': [60, 62], 'left_hand': [60], 'right_hand': [62]}}
+    players = [{'name': 'Alice', 'experience': 'experienced'}]
+
+    csv_text = ExportFormatter.format_to_csv(arrangement, players, 'song.mid', 'balanced')
+
+    assert 'Alice,experienced,C4,D4,0' in csv_text
+    assert csv_text.rstrip().endswith('C4\r\nD4')
@@ -0,0 +1,157 @@
+"""
+Unit tests for DiskParseCache
+Tests columnar round-trips, persistence across instances, and oldest-first eviction
+"""
+
+import mmap
+import os
+import tempfile
+import time
+from unittest.mock import patch
+import mido
+from app.services.disk_parse_cache import DiskParseCache
+from app.services.parse_cache import ParseCache
+from app.services.music_parser import MusicParser
+from app.services.midi_parser import MIDIParser
+
+
+def _midi_bytes(pitches=(60, 64, 67, 72)):
+    """Helper to build a small two-track MIDI file in memory"""
+    mid = mido.MidiFile()
+    for offset in (0, 1):
+        track = mido.MidiTrack()
+        mid.tracks.append(track)
+        if offset == 0:
+            track.append(mido.MetaMessage('set_tempo', tempo=600000))
+        for p in pitches:
+            track.append(mido.Message('note_on', note=p - 12 * offset, velocity=70 + offset, time=0))
+            track.append(mido.Message('note_off', note=p - 12 * offset, velocity=0, time=480))
+    with tempfile.NamedTemporaryFile(mode='wb', delete=False, suffix='.mid') as tmp:
+        tmp_path = tmp.name
+    try:
+        mid.save(tmp_path)
+        with open(tmp_path, 'rb') as f:
+            return f.read()
+    finally:
+        os.unlink(tmp_path)
+
+
+def test_midi_round_trip_matches_parser_output():
+    """Cached MIDI data should be identical to a fresh parse"""
+    data = _midi_bytes()
+    parsed = MusicParser().parse('song.mid', data=data)
+
+    with tempfile.TemporaryDirectory() as tmpdir:
+        cache = DiskParseCache(tmpdir, 10 * 1024 * 1024)
+        key = ParseCache.make_key(data, 'midi')
+        assert cache.put(key, parsed) is True
+        loaded = cache.get(key)
+
+    assert loaded['notes'] == parsed['notes']
+    assert loaded['unique_notes'] == parsed['unique_notes']
+    assert loaded['melody_pitches'] == parsed['melody_pitches']
+    assert loaded['harmony_pitches'] == parsed['harmony_pitches']
+    assert loaded['frequencies'] == parsed['frequencies']
+    assert loaded['tempo'] == parsed['tempo']
+    assert loaded['ticks_per_beat'] == parsed['ticks_per_beat']
+    assert loaded['format'] == 'midi'
+
+
+def test_musicxml_style_round_trip():
+    """MusicXML notes keep offsets, durations and chord membership"""
+    music_data = {
+        'notes': [
+            {'pitch': 60, 'duration': 1.0, 'offset': 0.0, 'is_chord_member': True},
+            {'pitch': 64, 'duration': 1.0, 'offset': 0.0, 'is_chord_member': True},
+            {'pitch': 67, 'duration': 0.5, 'offset': 1.5, 'is_chord_member': False},
+        ],
+        'unique_notes': [60, 64, 67],
+        'note_count': 3,
+        'total_note_events': 3,
+        'melody_pitches': [64, 67],
+        'harmony_pitches': [60],
+        'frequencies': {60: 1, 64: 1, 67: 1},
+        'chords': [{'pitches': [60, 64], 'duration': 1.0, 'offset': 0.0, 'type': 'chord'}],
+        'format': 'musicxml',
+        'tempo': 96,
+    }
+    with tempfile.TemporaryDirectory() as tmpdir:
+        cache = DiskParseCache(tmpdir, 10 * 1024 * 1024)
+        cache.put('musicxml:abc', music_data)
+        loaded = cache.get('musicxml:abc')
+
+    keys = ('pitch', 'duration', 'offset', 'is_chord_member')
+    assert [{k: n[k] for k in keys} for n in loaded['notes']] == music_data['notes']
+    assert {k: v for k, v in loaded.items() if k not in ('notes', 'pitch_index')} == {
+        k: v for k, v in music_data.items() if k != 'notes'
+    }
+    assert loaded['pitch_index'].notes is loaded['notes']
+
+
+def test_cache_survives_new_instance():
+    """A new backend process (new instances) should hit the persisted entry"""
+    data = _midi_bytes()
+    with tempfile.TemporaryDirectory() as tmpdir:
+        first = MusicParser(disk_cache=DiskParseCache(tmpdir, 10 * 1024 * 1024)).parse('song.mid', data=data)
+
+        restarted = DiskParseCache(tmpdir, 10 * 1024 * 1024)
+        with patch.object(MIDIParser, 'parse', side_effect=AssertionError('parser should not run')):
+            second = MusicParser(cache=ParseCache(1024 * 1024), disk_cache=restarted).parse('song.mid', data=data)
+
+        assert second['notes'] == first['notes']
+        assert restarted.stats()['hits'] == 1
+
+
+def test_hit_maps_rows_read_only():
+    """Loaded rows stay a view of the file mapping, survive eviction, and are copied on the first write"""
+    data = _midi_bytes()
+    parsed = MusicParser().parse('song.mid', data=data)
+    with tempfile.TemporaryDirectory() as tmpdir:
+        cache = DiskParseCache(tmpdir, 10 * 1024 * 1024)
+        cache.put('midi:a', parsed)
+        notes = cache.get('midi:a')['notes']
+        os.remove(cache._path('midi:a'))
+
+        assert not notes.data.flags.writeable
+        assert isinstance(notes.data.base.obj, mmap.mmap)
+        assert ParseCache.estimate_size(notes) >= notes.data.nbytes
+        assert notes == parsed['notes']
+
+    notes.set('melody', True)
+    assert notes.data.flags.writeable and notes.melody.all()
+
+
+def test_oldest_entry_evicted_first():
+    """Oldest file is removed once the directory exceeds its byte cap"""
+    music_data = MusicParser().parse('song.mid', data=_midi_bytes())
+    with tempfile.TemporaryDirectory() as tmpdir:
+        probe = DiskParseCache(tmpdir, 10 * 1024 * 1024)
+        probe.put('midi:probe', music_data)
+        entry_size = probe.stats()['bytes']
+        os.remove(probe._path('midi:probe'))
+
+        cache = DiskParseCache(tmpdir, int(entry_size * 2.5))
+        cache.put('midi:a', music_data)
+        cache.put('midi:b', music_data)
+        past = time.time() - 100
+        os.utime(cache._path('midi:a'), (past, past))
+        os.utime(cache._path('midi:b'), (past + 10, past + 10))
+        cache.put('midi:c', music_data)
+
+        assert cache.get('midi:a') is None
+        assert cache.get('midi:b') is not None
+        assert cache.get('midi:c') is not None
+        assert cache.stats()['evictions'] == 1
+
+
+def test_corrupt_file_is_a_miss():
+    """An unreadable cache file is discarded and treated as a miss"""
+    with tempfile.TemporaryDirectory() as tmpdir:
+        cache = DiskParseCache(tmpdir, 10 * 1024 * 1024)
+        path = cache._path('midi:bad')
+        with open(path, 'wb') as f:
+            f.write(b'not a cache file at all')
+
+        assert cache.get('midi:bad') is None
+        assert not os.path.exists(path)
+        assert cache.stats()['misses'] == 1
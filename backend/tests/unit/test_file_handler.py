@@ -132,6 +132,42 @@ def test_save_file_write_error():
         except Exception as e:
             assert "Failed to save file" in str(e)
 
+def test_read_file_returns_bytes_without_saving():
+    """Should read upload into memory and return sanitized filename"""
+    mock_file = Mock()
+    mock_file.filename = '../my song.mid'
+    mock_file.read = Mock(return_value=b'MThd data')
+    mock_file.save = Mock()
+    
+    filename, data = FileHandler.read_file(mock_file)
+    
+    assert filename == 'my_song.mid'
+    assert data == b'MThd data'
+    mock_file.save.assert_not_called()
+
+def test_read_file_invalid_extension():
+    """Should reject in-memory upload with invalid extension"""
+    mock_file = Mock()
+    mock_file.filename = 'document.txt'
+    
+    try:
+        FileHandler.read_file(mock_file)
+        assert False, "Should have raised ValueError"
+    except ValueError as e:
+        assert "File type not allowed" in str(e)
+
+def test_read_file_empty_upload():
+    """Should reject an upload with no content"""
+    mock_file = Mock()
+    mock_file.filename = 'test.mid'
+    mock_file.read = Mock(return_value=b'')
+    
+    try:
+        FileHandler.read_file(mock_file)
+        assert False, "Should have raised ValueError"
+    except ValueError as e:
+        assert "empty" in str(e)
+
 def test_delete_file_existing():
     """Should delete existing file"""
     with tempfile.NamedTemporaryFile(mode='w', delete=False, suffix='.mid') as tmp:
@@ -156,5 +192,5 @@ def test_delete_file_nonexistent():
 
 def test_allowed_extensions_includes_all_formats():
     """Should support all documented file formats"""
-    expected = {'mid', 'midi', 'musicxml', 'xml'}
+    expected = {'mid', 'midi', 'musicxml', 'xml', 'mxl'}
     assert FileHandler.ALLOWED_EXTENSIONS == expected
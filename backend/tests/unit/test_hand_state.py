@@ -0,0 +1,68 @@
+"""
+Unit tests for HandState
+Tests incremental swap-gap tracking for one hand during bell assignment
+"""
+
+import random
+
+from app.services.bell_assignment import BellAssignmentAlgorithm
+from app.services.hand_state import HandState
+from app.services.note_table import NoteTable
+from app.services.pitch_index import PitchIndex
+
+
+def _index(notes):
+    """PitchIndex over (pitch, beat, beats) notes at 120 BPM (500 ms per beat)"""
+    return PitchIndex(NoteTable.from_music_data({
+        'notes': [{'pitch': p, 'time': t * 480, 'duration': d * 480} for p, t, d in notes],
+        'format': 'midi', 'tempo': 120, 'ticks_per_beat': 480,
+    }))
+
+
+def test_what_if_probe_leaves_state_unchanged():
+    """allows/gap_with look ahead without adding; add records the new minimum"""
+    index = _index([(60, 0, 1), (62, 3, 1), (64, 4, 1), (60, 8, 1)])
+    hand = HandState(index, [60])
+
+    assert hand.gap_with((62,)) == 1000
+    assert hand.allows((62,), 1000) and not hand.allows((62,), 1001)
+    assert not hand.allows((62, 64), 500)  # 62 ends as 64 starts
+    assert hand.bells == [60] and hand.min_gap_ms == float('inf')
+
+    hand.add(62)
+    assert hand.min_gap_ms == 1000 and len(hand) == 2
+    assert hand.allows((71, 'C9'), 5000)  # unplayed bells never conflict
+
+
+def test_incremental_state_matches_fresh_check():
+    """Adding bells one by one gives the same answers as checking the whole hand"""
+    rng = random.Random(3)
+    pitches = [60, 62, 64, 65, 67, 69, 71, 72]
+    index = _index([(rng.choice(pitches), rng.randrange(64), rng.choice([1, 2])) for _ in range(150)])
+    config = {'min_gap_ms': 300}
+    for _ in range(50):
+        hand = HandState(index)
+        bells = []
+        for bell in rng.sample(pitches, 5):
+            expected = BellAssignmentAlgorithm._check_swap_gap_for_hand(bells, bell, index, config, 'experienced')
+            assert hand.allows((bell,), 300) == expected
+            if expected:
+                hand.add(bell)
+                bells.append(bell)
+        assert hand.bells == bells
+
+
+def test_helpers_keep_hands_in_sync_with_bells():
+    """Bells appended directly follow parity; the pair lands on one hand; no state leaks"""
+    index = _index([(60, 0, 1), (62, 2, 1), (64, 4, 1), (65, 6, 1), (67, 8, 1)])
+    config = {'min_gap_ms': {'experienced': 500}}
+    assignment = {'bells': [60, 62], 'left_hand': [], 'right_hand': []}
+
+    assert BellAssignmentAlgorithm._try_assign_pair_same_hand(assignment, 64, 65, index, config, 'experienced')
+    assert BellAssignmentAlgorithm._try_extra_bell(assignment, 67, index, config, 'experienced')
+    hands = assignment['_hands']
+    assert hands['left'].bells == [60, 64, 65] and hands['right'].bells == [62, 67]
+
+    BellAssignmentAlgorithm._assign_hands({'A': assignment})
+    assert assignment['left_hand'] == [60, 64, 65] and assignment['right_hand'] == [62, 67]
+    assert '_hands' not in assignment and '_hand_map' not in assignment
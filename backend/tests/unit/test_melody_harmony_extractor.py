@@ -0,0 +1,59 @@
+"""
+Unit tests for MelodyHarmonyExtractor
+Tests the vectorized NoteTable split against the dict-based extract
+"""
+
+import random
+
+from app.services.melody_harmony_extractor import MelodyHarmonyExtractor
+from app.services.note_table import NoteTable
+
+
+def _table(notes):
+    return NoteTable.from_music_data({'notes': notes, 'format': 'midi', 'tempo': 120, 'ticks_per_beat': 480})
+
+
+def test_masks_match_dict_extract_for_exact_onsets():
+    """With no tolerance the masks pick the same melody notes as extract"""
+    rng = random.Random(5)
+    for _ in range(20):
+        notes = [
+            {'pitch': rng.randint(55, 80), 'velocity': 80, 'time': rng.randrange(0, 4800, 240), 'duration': 240}
+            for _ in range(rng.randint(1, 150))
+        ]
+        table = _table(notes)
+        expected = MelodyHarmonyExtractor.extract(list(table))
+        result = MelodyHarmonyExtractor.extract_masks(table)
+
+        assert result['melody'].nonzero()[0].tolist() == sorted(row.index for row in expected['melody'])
+        assert result['harmony'].tolist() == (~result['melody']).tolist()
+        assert result['melody_pitches'] == expected['melody_pitches']
+        assert result['harmony_pitches'] == expected['harmony_pitches']
+        assert result['frequencies'] == MelodyHarmonyExtractor.get_note_frequencies(list(table))
+
+
+def test_tolerance_groups_humanized_chords():
+    """Onsets a few ticks apart form one chord only when within the tolerance"""
+    table = _table([
+        {'pitch': 60, 'velocity': 80, 'time': 0, 'duration': 480},
+        {'pitch': 67, 'velocity': 80, 'time': 3, 'duration': 480},
+        {'pitch': 64, 'velocity': 80, 'time': 5, 'duration': 480},
+        {'pitch': 62, 'velocity': 80, 'time': 480, 'duration': 480},
+    ])
+
+    exact = MelodyHarmonyExtractor.extract_masks(table)
+    assert exact['melody'].tolist() == [True, True, True, True]
+
+    ticks = MelodyHarmonyExtractor.extract_masks(table, onset_tolerance=5)
+    assert ticks['melody'].tolist() == [False, True, False, True]
+    assert sorted(ticks['harmony_pitches']) == [60, 64]
+
+    # Gaps chain: at 120 BPM / 480 ticks per beat the gaps are 3.1 ms and 2.1 ms
+    assert MelodyHarmonyExtractor.extract_masks(table, 3.2, 'ms')['melody'].tolist() == ticks['melody'].tolist()
+    assert MelodyHarmonyExtractor.extract_masks(table, 2.5, 'ms')['melody'].tolist() == [True, True, False, True]
+
+
+def test_empty_table():
+    result = MelodyHarmonyExtractor.extract_masks(_table([]))
+    assert len(result['melody']) == 0
+    assert result['melody_pitches'] == [] and result['frequencies'] == {}
@@ -236,3 +236,46 @@ def test_parse_notes_have_required_fields():
             
     finally:
         os.unlink(midi_file)
+
+
+def test_parse_midi_from_bytes():
+    """Should parse MIDI data held in memory without a file path"""
+    midi_file = _create_valid_midi_file()
+    
+    try:
+        with open(midi_file, 'rb') as f:
+            data = f.read()
+        
+        from_path = MIDIParser.parse(midi_file)
+        from_bytes = MIDIParser.parse(data)
+        
+        assert from_bytes['notes'] == from_path['notes']
+        assert from_bytes['tempo'] == from_path['tempo']
+        assert from_bytes['ticks_per_beat'] == from_path['ticks_per_beat']
+        
+    finally:
+        os.unlink(midi_file)
+
+
+def test_parse_midi_from_file_object():
+    """Should parse MIDI data from a binary file-like object"""
+    midi_file = _create_valid_midi_file()
+    
+    try:
+        with open(midi_file, 'rb') as f:
+            result = MIDIParser.parse(f)
+        
+        assert result['note_count'] == 3
+        assert len(result['notes']) == 3
+        
+    finally:
+        os.unlink(midi_file)
+
+
+def test_parse_corrupted_midi_bytes():
+    """Should raise parse error for invalid in-memory MIDI data"""
+    try:
+        MIDIParser.parse(b'This is not a valid MIDI file')
+        assert False, "Should have raised exception"
+    except Exception as e:
+        assert "Failed to parse MIDI file" in str(e)
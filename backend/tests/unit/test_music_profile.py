@@ -0,0 +1,73 @@
+"""
+Unit tests for MusicProfile
+Tests the per-pitch statistics shared by the strategies and scorers
+"""
+
+import random
+
+import pytest
+from app.services.arrangement_validator import ArrangementValidator
+from app.services.pitch_index import PitchIndex
+from app.services.simulation_builder import SimulationBuilder
+
+
+def _music_data(seed, count=300):
+    rng = random.Random(seed)
+    notes = [
+        {'pitch': rng.choice([60, 62, 64, 65, 67, 72]), 'velocity': 80,
+         'time': rng.randrange(0, 480 * 64, 120), 'duration': rng.choice([120, 240, 480]),
+         'melody': rng.random() < 0.4}
+        for _ in range(count)
+    ]
+    notes.sort(key=lambda n: n['time'])
+    return {'notes': notes, 'format': 'midi', 'tempo': 120, 'ticks_per_beat': 480}
+
+
+def test_statistics_match_note_by_note_totals():
+    """Every per-pitch statistic equals a direct walk over that pitch's notes"""
+    index = PitchIndex.for_music_data(_music_data(1))
+    profile = index.profile()
+
+    for pitch in index.pitches:
+        rows = [n for n in index.notes if n['pitch'] == pitch]
+        starts = [n['start_ms'] for n in rows]
+        ring = [n['end_ms'] - n['start_ms'] for n in rows]
+        stats = profile.stats(pitch)
+
+        assert stats['count'] == len(rows)
+        assert stats['ring_ms'] == pytest.approx(sum(ring))
+        assert stats['fatigue'] == pytest.approx(sum(ring) * SimulationBuilder.get_bell_weight_oz(pitch))
+        assert stats['first_onset_ms'] == starts[0]
+        assert stats['last_onset_ms'] == starts[-1]
+        if len(rows) > 1:
+            gaps = [b - a for a, b in zip(starts, starts[1:])]
+            assert stats['mean_gap_ms'] == pytest.approx(sum(gaps) / len(gaps))
+        melody = index.notes.melody[index.note_indices([pitch])].tolist()
+        assert stats['melody_share'] == pytest.approx(sum(melody) / len(rows))
+
+    assert profile.count[61] == 0 and profile.ring_ms[61] == 0.0
+
+
+def test_profile_is_built_once_per_index():
+    """The profile is cached on the shared PitchIndex"""
+    music_data = _music_data(2)
+    music_data['pitch_index'] = PitchIndex.for_music_data(music_data)
+
+    assert music_data['pitch_index'].profile() is music_data['pitch_index'].profile()
+
+
+def test_fatigue_fairness_reads_profile():
+    """Fatigue fairness sums the profile's weighted fatigue per player"""
+    music_data = _music_data(3)
+    music_data['pitch_index'] = PitchIndex.for_music_data(music_data)
+    fatigue = music_data['pitch_index'].profile().fatigue
+    arrangement = {
+        'A': {'bells': [60, 62], 'left_hand': [60], 'right_hand': [62]},
+        'B': {'bells': ['E4', 'F4', 'G4'], 'left_hand': ['E4', 'G4'], 'right_hand': ['F4']},
+    }
+
+    details = ArrangementValidator._calculate_fatigue_fairness_details(arrangement, music_data)
+
+    loads = [fatigue[60] + fatigue[62], fatigue[64] + fatigue[65] + fatigue[67]]
+    mean = sum(loads) / 2
+    assert details['cv'] == pytest.approx(abs(loads[0] - loads[1]) / 2 / mean)
@@ -282,3 +282,35 @@ def test_parse_invalid_xml_structure():
             pass  # Expected
     finally:
         os.unlink(tmp_path)
+
+
+def test_parse_musicxml_from_bytes():
+    """Should parse MusicXML data held in memory without a file path"""
+    xml_file = _create_musicxml_with_chord()
+    
+    try:
+        with open(xml_file, 'rb') as f:
+            data = f.read()
+        
+        from_path = MusicXMLParser.parse(xml_file)
+        from_bytes = MusicXMLParser.parse(data)
+        
+        assert from_bytes['notes'] == from_path['notes']
+        assert from_bytes['tempo'] == from_path['tempo']
+        assert len(from_bytes['chords']) == len(from_path['chords'])
+        
+    finally:
+        os.unlink(xml_file)
+
+
+def test_app_startup_does_not_import_music21():
+    """music21 should only load when a MusicXML file needs it"""
+    import subprocess
+    import sys
+    backend_dir = os.path.dirname(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+    code = "import sys; import app.routes; print('music21' in sys.modules)"
+    result = subprocess.run(
+        [sys.executable, '-c', code],
+        cwd=backend_dir, capture_output=True, text=True, check=True
+    )
+    assert result.stdout.strip() == 'False'
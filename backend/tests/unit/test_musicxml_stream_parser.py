@@ -0,0 +1,187 @@
+"""
+Unit tests for MusicXMLStreamParser
+Checks the streaming fast path against the music21 path and its fallbacks
+"""
+
+import pytest
+from app.services import musicxml_parser
+from app.services.musicxml_parser import MusicXMLParser
+from app.services.musicxml_stream_parser import MusicXMLStreamParser, UnsupportedMusicXML
+
+
+def _score(*parts, divisions=1, time=('4', '4')):
+    """Build a partwise MusicXML document; each part is a list of measure bodies"""
+    part_list = ''.join(
+        f'<score-part id="P{i}"><part-name>P{i}</part-name></score-part>'
+        for i in range(1, len(parts) + 1)
+    )
+    body = []
+    for i, measures in enumerate(parts, start=1):
+        xml = [f'<part id="P{i}">']
+        for number, content in enumerate(measures, start=1):
+            attributes = ''
+            if number == 1:
+                attributes = (
+                    f'<attributes><divisions>{divisions}</divisions>'
+                    f'<time><beats>{time[0]}</beats><beat-type>{time[1]}</beat-type></time></attributes>'
+                )
+            xml.append(f'<measure number="{number}">{attributes}{content}</measure>')
+        xml.append('</part>')
+        body.append(''.join(xml))
+    return (
+        '<?xml version="1.0" encoding="UTF-8"?>'
+        '<score-partwise version="3.1">'
+        f'<part-list>{part_list}</part-list>{"".join(body)}</score-partwise>'
+    ).encode('utf-8')
+
+
+def _note(step, octave, duration, alter=None, chord=False, voice=None, extra=''):
+    alter_xml = f'<alter>{alter}</alter>' if alter is not None else ''
+    chord_xml = '<chord/>' if chord else ''
+    voice_xml = f'<voice>{voice}</voice>' if voice is not None else ''
+    return (
+        f'<note>{chord_xml}<pitch><step>{step}</step>{alter_xml}<octave>{octave}</octave></pitch>'
+        f'<duration>{duration}</duration>{voice_xml}{extra}</note>'
+    )
+
+
+def _rest(duration, voice=None):
+    voice_xml = f'<voice>{voice}</voice>' if voice is not None else ''
+    return f'<note><rest/><duration>{duration}</duration>{voice_xml}</note>'
+
+
+def _parse_with_music21(data, monkeypatch):
+    """Run MusicXMLParser with the fast path disabled"""
+    def decline(source, limits=None):
+        raise UnsupportedMusicXML('disabled for test')
+    monkeypatch.setattr(musicxml_parser.MusicXMLStreamParser, 'parse', staticmethod(decline))
+    return MusicXMLParser.parse(data)
+
+
+def _assert_matches_music21(data, monkeypatch):
+    MusicXMLStreamParser.parse(data)  # must not decline
+    fast = MusicXMLParser.parse(data)
+    slow = _parse_with_music21(data, monkeypatch)
+    for key in ('notes', 'chords', 'tempo', 'tempo_map', 'unique_notes', 'note_count', 'total_note_events', 'format'):
+        assert fast[key] == slow[key], key
+    return fast
+
+
+def test_simple_melody_matches_music21(monkeypatch):
+    """Single-voice melody with accidentals and a metronome mark"""
+    metronome = (
+        '<direction placement="above"><direction-type><metronome>'
+        '<beat-unit>quarter</beat-unit><per-minute>96</per-minute>'
+        '</metronome></direction-type><sound tempo="96"/></direction>'
+    )
+    data = _score([
+        metronome + _note('C', 4, 1) + _note('F', 4, 1, alter=1) + _note('B', 3, 1, alter=-1) + _rest(1),
+        _note('G', 4, 4),
+    ])
+    result = _assert_matches_music21(data, monkeypatch)
+    assert result['tempo'] == 96
+    assert [n['pitch'] for n in result['notes']] == [60, 66, 58, 67]
+
+
+def test_chords_voices_and_backup_match_music21(monkeypatch):
+    """Chords, two voices joined by <backup>, and a <forward> gap"""
+    measure = (
+        _note('C', 5, 2, voice=1) + _note('E', 5, 2, chord=True, voice=1) + _note('D', 5, 2, voice=1)
+        + '<backup><duration>4</duration></backup>'
+        + _note('C', 3, 1, voice=2) + '<forward><duration>2</duration><voice>2</voice></forward>'
+        + _note('G', 2, 1, voice=2)
+    )
+    data = _score([measure, _note('C', 4, 4, voice=1)])
+    result = _assert_matches_music21(data, monkeypatch)
+    assert len(result['chords']) == 1
+    assert sum(1 for n in result['notes'] if n['is_chord_member']) == 2
+
+
+def test_multiple_parts_and_triplets_match_music21(monkeypatch):
+    """Notes from several parts interleave by offset; triplets keep exact offsets"""
+    upper = [_note('E', 5, 2) * 3 + _note('G', 5, 3) + _note('C', 6, 3) + _note('B', 5, 3) + _note('C', 6, 3)]
+    lower = [_note('C', 3, 6) + _note('G', 2, 6)]
+    data = _score(upper, lower, divisions=3)
+    result = _assert_matches_music21(data, monkeypatch)
+    assert result['notes'][0]['offset'] == 0.0
+    assert result['notes'][1]['offset'] == 0.0
+
+
+def test_tie_chain_merged_into_one_event(monkeypatch):
+    """A note tied across two barlines is a single event in both paths"""
+    data = _score([
+        _note('D', 4, 2) + _note('C', 4, 2, extra='<tie type="start"/>'),
+        _note('C', 4, 4, extra='<tie type="stop"/><tie type="start"/>'),
+        _note('C', 4, 1, extra='<tie type="stop"/>') + _note('C', 4, 3),
+    ])
+    result = _assert_matches_music21(data, monkeypatch)
+    assert [(n['pitch'], n['offset'], n['duration']) for n in result['notes']] == [
+        (62, 0.0, 2.0), (60, 2.0, 7.0), (60, 9.0, 3.0)
+    ]
+    assert result['total_note_events'] == 3
+    assert result['notes'].end_ms[1] == 4500
+
+
+def test_ties_in_chords_and_unison_parts(monkeypatch):
+    """Only the tied chord member is merged; unison parts keep separate chains"""
+    data = _score(
+        [_note('C', 4, 4, extra='<tie type="start"/>') + _note('E', 4, 4, chord=True),
+         _note('C', 4, 4, extra='<tie type="stop"/>') + _note('E', 4, 4, chord=True)],
+        [_note('C', 4, 4, extra='<tie type="start"/>'), _note('C', 4, 4, extra='<tie type="stop"/>')],
+    )
+    result = _assert_matches_music21(data, monkeypatch)
+    assert [(n['pitch'], n['offset'], n['duration']) for n in result['notes']] == [
+        (60, 0.0, 8.0), (64, 0.0, 4.0), (60, 0.0, 8.0), (64, 4.0, 4.0)
+    ]
+    assert [c['pitches'] for c in result['chords']] == [[60, 64], [64]]
+
+
+def test_dangling_tie_stop_kept_as_note(monkeypatch):
+    """A stop with no open chain (or after a gap) is an ordinary note"""
+    data = _score([
+        _note('C', 4, 2, extra='<tie type="stop"/>') + _note('C', 4, 1, extra='<tie type="start"/>')
+        + _rest(1),
+        _note('C', 4, 4, extra='<tie type="stop"/>'),
+    ])
+    result = _assert_matches_music21(data, monkeypatch)
+    assert [n['offset'] for n in result['notes']] == [0.0, 2.0, 4.0]
+
+
+def test_sound_tempo_without_metronome(monkeypatch):
+    """A bare <sound tempo> sets the tempo in both paths"""
+    data = _score(['<direction><direction-type><words>Allegro</words></direction-type>'
+                   '<sound tempo="132"/></direction>' + _note('C', 4, 4)])
+    result = _assert_matches_music21(data, monkeypatch)
+    assert result['tempo'] == 132
+
+
+@pytest.mark.parametrize('content', [
+    '<note><grace/><pitch><step>D</step><octave>4</octave></pitch></note>' + _note('C', 4, 4),
+    '<harmony><root><root-step>C</root-step></root><kind>major</kind></harmony>' + _note('C', 4, 4),
+    '<note><unpitched><display-step>C</display-step><display-octave>4</display-octave></unpitched>'
+    '<duration>4</duration></note>',
+])
+def test_unsupported_constructs_are_declined(content):
+    """Constructs the fast path does not model are left to music21"""
+    data = _score([content])
+    with pytest.raises(UnsupportedMusicXML):
+        MusicXMLStreamParser.parse(data)
+
+
+def test_grace_note_file_parses_via_fallback():
+    """MusicXMLParser still returns notes when the fast path declines"""
+    data = _score(['<note><grace/><pitch><step>D</step><octave>4</octave></pitch></note>' + _note('C', 4, 4)])
+    result = MusicXMLParser.parse(data)
+    assert 60 in result['unique_notes']
+
+
+def test_timewise_score_is_unsupported():
+    data = b'<?xml version="1.0"?><score-timewise><part-list/></score-timewise>'
+    with pytest.raises(UnsupportedMusicXML):
+        MusicXMLStreamParser.parse(data)
+
+
+def test_no_notes_raises_value_error():
+    data = _score([_rest(4)])
+    with pytest.raises(ValueError, match="No notes found"):
+        MusicXMLStreamParser.parse(data)
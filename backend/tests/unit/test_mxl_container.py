@@ -0,0 +1,73 @@
+"""
+Unit tests for MXLContainer
+Tests compressed MusicXML (.mxl) ingestion through the MusicXML parser
+"""
+
+import zipfile
+from io import BytesIO
+
+import pytest
+from app.services.music_parser import MusicParser
+from app.services.musicxml_parser import MusicXMLParser
+from app.services.mxl_container import InvalidMXL, MXLContainer
+
+_SCORE = (
+    '<?xml version="1.0"?><score-partwise><part-list><score-part id="P1"><part-name>P</part-name>'
+    '</score-part></part-list><part id="P1"><measure number="1"><attributes><divisions>1</divisions>'
+    '</attributes>'
+    + ''.join(f'<note><pitch><step>{s}</step><octave>4</octave></pitch><duration>1</duration></note>'
+              for s in 'CDEF')
+    + '</measure></part></score-partwise>'
+).encode('utf-8')
+
+_CONTAINER = (
+    '<?xml version="1.0"?><container><rootfiles>'
+    '<rootfile full-path="{path}" media-type="application/vnd.recordare.musicxml+xml"/>'
+    '<rootfile full-path="preview.pdf" media-type="application/pdf"/>'
+    '</rootfiles></container>'
+)
+
+
+def _mxl(members):
+    buf = BytesIO()
+    with zipfile.ZipFile(buf, 'w', zipfile.ZIP_DEFLATED) as archive:
+        for name, data in members.items():
+            archive.writestr(name, data)
+    return buf.getvalue()
+
+
+def test_root_score_from_container_parses_like_plain_xml():
+    """container.xml picks the root score; the result matches the uncompressed file"""
+    data = _mxl({
+        'mimetype': 'application/vnd.recordare.musicxml',
+        'META-INF/container.xml': _CONTAINER.format(path='scores/song.xml'),
+        'scores/other.xml': b'<not-a-score/>',
+        'scores/song.xml': _SCORE,
+    })
+
+    assert MXLContainer.is_container(data)
+    assert MXLContainer.read_score(data) == _SCORE
+
+    compressed = MusicXMLParser.parse(data)
+    plain = MusicXMLParser.parse(_SCORE)
+    assert sorted(compressed['unique_notes']) == sorted(plain['unique_notes']) == [60, 62, 64, 65]
+    assert compressed['notes'] == plain['notes']
+
+    music_data = MusicParser().parse('song.mxl', data=data)
+    assert music_data['format'] == 'musicxml'
+
+
+def test_archive_without_container_uses_first_score():
+    data = _mxl({'song.musicxml': _SCORE})
+
+    assert MXLContainer.read_score(data) == _SCORE
+
+
+def test_bad_archives_are_rejected():
+    with pytest.raises(InvalidMXL):
+        MXLContainer.open_score(_mxl({'META-INF/container.xml': _CONTAINER.format(path='missing.xml')}))
+    with pytest.raises(InvalidMXL):
+        MXLContainer.open_score(_mxl({'readme.txt': b'nothing here'}))
+    with pytest.raises(InvalidMXL, match='expands beyond'):
+        MXLContainer.read_score(_mxl({'song.xml': _SCORE}), max_bytes=100)
+    assert not MXLContainer.is_container(_SCORE)
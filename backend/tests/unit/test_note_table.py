@@ -0,0 +1,119 @@
+"""
+Unit tests for NoteTable
+Tests the columnar note store and its legacy dict-compatible rows
+"""
+
+import pickle
+from io import BytesIO
+
+import mido
+from app.services.midi_parser import MIDIParser
+from app.services.musicxml_parser import MusicXMLParser
+from app.services.note_table import NoteTable
+
+
+def _two_track_midi():
+    mid = mido.MidiFile(type=1, ticks_per_beat=480)
+    for pitches in ((60, 62), (48, 50)):
+        track = mido.MidiTrack()
+        mid.tracks.append(track)
+        for p in pitches:
+            track.append(mido.Message('note_on', note=p, velocity=90, time=0))
+            track.append(mido.Message('note_off', note=p, time=480))
+    buf = BytesIO()
+    mid.save(file=buf)
+    return buf.getvalue()
+
+
+def test_midi_rows_keep_legacy_keys_and_types():
+    """Rows read like the old MIDI note dicts, with integer ticks"""
+    notes = MIDIParser.parse(_two_track_midi())['notes']
+
+    assert isinstance(notes, NoteTable)
+    first = notes[0]
+    assert dict(first) == {
+        'pitch': 60, 'velocity': 90, 'time': 0, 'offset': 0, 'duration': 480,
+        'start_ms': 0.0, 'end_ms': 500.0,
+    }
+    assert isinstance(first['time'], int) and isinstance(first['duration'], int)
+    assert first.get('missing', 'default') == 'default'
+    assert notes.track.tolist() == [0, 1, 0, 1]
+    assert notes.nbytes == 38 * len(notes)
+
+
+def test_musicxml_rows_keep_legacy_keys():
+    note = '<note><pitch><step>C</step><octave>4</octave></pitch><duration>2</duration></note>'
+    xml = (
+        '<?xml version="1.0"?><score-partwise><part-list><score-part id="P1"><part-name>P</part-name>'
+        '</score-part></part-list><part id="P1"><measure number="1"><attributes><divisions>2</divisions>'
+        f'<time><beats>4</beats><beat-type>4</beat-type></time></attributes>{note}{note}</measure>'
+        '</part></score-partwise>'
+    ).encode('utf-8')
+    notes = MusicXMLParser.parse(xml)['notes']
+
+    assert notes.format == 'musicxml'
+    assert set(notes[1]) == {'pitch', 'duration', 'offset', 'is_chord_member', 'start_ms', 'end_ms'}
+    assert (notes[1]['offset'], notes[1]['duration'], notes[1]['is_chord_member']) == (1.0, 1.0, False)
+
+
+def test_from_music_data_sorts_and_annotates_hand_built_notes():
+    """Legacy note dicts are time-ordered, get ms times, and pitchless notes are dropped"""
+    music_data = {
+        'notes': [
+            {'pitch': 64, 'time': 480, 'duration': 480},
+            {'pitch': None, 'time': 0, 'duration': 10},
+            {'pitch': 60, 'time': 0, 'duration': 480},
+        ],
+        'format': 'midi', 'tempo': 120, 'ticks_per_beat': 480,
+    }
+    table = NoteTable.from_music_data(music_data)
+
+    assert table.pitch.tolist() == [60, 64]
+    assert table.start_ms.tolist() == [0.0, 500.0]
+    assert table.end_ms.tolist() == [500.0, 1000.0]
+    assert NoteTable.from_music_data({'notes': table}) is table
+
+
+def test_equality_slicing_and_masks():
+    table = NoteTable.from_columns(
+        'midi', pitch=[60, 62, 60], time=[0, 1, 2], duration=[1, 1, 1], velocity=[80, 80, 80]
+    )
+
+    assert table == NoteTable.from_dicts(table.to_dicts())
+    assert table == table.to_dicts()
+    assert table.pitch_mask({60}).tolist() == [True, False, True]
+    subset = table[table.pitch_mask({60})]
+    assert len(subset) == 2 and subset[-1]['time'] == 2
+
+
+def test_set_refreshes_row_views():
+    table = NoteTable.from_columns('midi', pitch=[60], time=[0], duration=[10])
+    assert table[0]['start_ms'] == 0.0
+    table.set('start_ms', [250.0])
+    assert table[0]['start_ms'] == 250.0
+
+
+def test_pickle_round_trip():
+    table = MIDIParser.parse(_two_track_midi())['notes']
+    assert pickle.loads(pickle.dumps(table)) == table
+
+
+def test_merge_doublings_takes_union_span():
+    """Overlapping same-pitch notes merge; touching notes and other pitches do not"""
+    table = NoteTable.from_columns(
+        'midi',
+        pitch=[60, 60, 64, 60, 60],
+        velocity=[70, 90, 80, 60, 50],
+        track=[0, 1, 0, 2, 0],
+        time=[0, 0, 0, 240, 600],
+        duration=[480, 600, 480, 120, 240],
+    )
+
+    merged = table.merge_doublings()
+
+    assert merged.pitch.tolist() == [60, 64, 60]
+    assert merged.time.tolist() == [0, 0, 600]
+    assert merged.duration.tolist() == [600, 480, 240]
+    assert merged.velocity.tolist() == [90, 80, 50]
+    assert merged.track.tolist() == [0, 0, 0]
+    assert len(table) == 5
@@ -0,0 +1,127 @@
+"""
+Unit tests for ParseCache and MusicParser cache integration
+Tests content-addressed lookups, LRU eviction, byte budget, and counters
+"""
+
+import os
+import tempfile
+from unittest.mock import patch
+import mido
+from app.services.parse_cache import ParseCache
+from app.services.music_parser import MusicParser
+from app.services.midi_parser import MIDIParser
+
+
+def _music_data(n_notes):
+    """Helper to build a music_data-like dict with n_notes notes"""
+    notes = [{'pitch': 60 + (i % 12), 'time': i * 480, 'offset': i * 480, 'duration': 480} for i in range(n_notes)]
+    return {'notes': notes, 'unique_notes': sorted({n['pitch'] for n in notes}), 'format': 'midi'}
+
+
+def _midi_bytes():
+    """Helper to build a small MIDI file in memory"""
+    mid = mido.MidiFile()
+    track = mido.MidiTrack()
+    mid.tracks.append(track)
+    track.append(mido.Message('note_on', note=60, velocity=64, time=0))
+    track.append(mido.Message('note_off', note=60, velocity=0, time=480))
+    track.append(mido.Message('note_on', note=64, velocity=64, time=0))
+    track.append(mido.Message('note_off', note=64, velocity=0, time=480))
+    with tempfile.NamedTemporaryFile(mode='wb', delete=False, suffix='.mid') as tmp:
+        tmp_path = tmp.name
+    try:
+        mid.save(tmp_path)
+        with open(tmp_path, 'rb') as f:
+            return f.read()
+    finally:
+        os.unlink(tmp_path)
+
+
+def test_make_key_is_content_addressed():
+    """Same bytes give the same key; different bytes or type give different keys"""
+    assert ParseCache.make_key(b'abc', 'midi') == ParseCache.make_key(b'abc', 'midi')
+    assert ParseCache.make_key(b'abc', 'midi') != ParseCache.make_key(b'abd', 'midi')
+    assert ParseCache.make_key(b'abc', 'midi') != ParseCache.make_key(b'abc', 'musicxml')
+    # Non-default parse options get their own entries; defaults keep the plain key
+    assert ParseCache.make_key(b'abc', 'midi', onset=0) == ParseCache.make_key(b'abc', 'midi')
+    assert ParseCache.make_key(b'abc', 'midi', onset=20.0) != ParseCache.make_key(b'abc', 'midi')
+
+
+def test_get_miss_then_hit_counters():
+    """Should count misses and hits"""
+    cache = ParseCache(10 * 1024 * 1024)
+    assert cache.get('k') is None
+    cache.put('k', _music_data(10))
+    assert cache.get('k')['format'] == 'midi'
+    stats = cache.stats()
+    assert stats['hits'] == 1
+    assert stats['misses'] == 1
+    assert stats['entries'] == 1
+    assert stats['bytes'] > 0
+
+
+def test_lru_eviction_under_budget():
+    """Least recently used entry is evicted first when over budget"""
+    entry_size = ParseCache.estimate_size(_music_data(50))
+    cache = ParseCache(int(entry_size * 2.5))
+    cache.put('a', _music_data(50))
+    cache.put('b', _music_data(50))
+    cache.get('a')  # 'a' becomes most recently used
+    cache.put('c', _music_data(50))
+
+    assert cache.get('b') is None
+    assert cache.get('a') is not None
+    assert cache.get('c') is not None
+    assert cache.stats()['evictions'] == 1
+    assert cache.stats()['bytes'] <= cache.max_bytes
+
+
+def test_oversized_entry_not_cached():
+    """An entry larger than the whole budget is not stored"""
+    cache = ParseCache(100)
+    assert cache.put('big', _music_data(50)) is False
+    assert cache.stats()['entries'] == 0
+
+
+def test_note_table_entry_charged_for_its_columns():
+    """Parsed entries are charged for NumPy columns and cached matrices, not just the dict shell"""
+    music_data = MusicParser().parse('song.mid', data=_midi_bytes())
+    notes, pitch_index = music_data['notes'], music_data['pitch_index']
+    cache = ParseCache(10 * 1024 * 1024)
+
+    cache.put('k', music_data)
+    charged = cache.stats()['bytes']
+    assert charged >= notes.nbytes + pitch_index.start_ms.nbytes + pitch_index.end_ms.nbytes
+
+    pitch_index.gap_matrix_ms()
+    notes.column('pitch')
+    assert ParseCache.estimate_size(music_data) > charged
+
+
+def test_zero_budget_disables_cache():
+    """A zero byte budget stores nothing"""
+    cache = ParseCache(0)
+    assert cache.put('k', _music_data(1)) is False
+    assert cache.get('k') is None
+
+
+def test_music_parser_repeat_upload_skips_parsing():
+    """Second parse of identical bytes should be served from the cache"""
+    cache = ParseCache(10 * 1024 * 1024)
+    data = _midi_bytes()
+
+    first = MusicParser(cache=cache).parse('song.mid', data=data)
+    with patch.object(MIDIParser, 'parse', side_effect=AssertionError('parser should not run')):
+        second = MusicParser(cache=cache).parse('renamed.mid', data=data)
+
+    assert second['notes'] == first['notes']
+    assert second['unique_notes'] == first['unique_notes']
+    assert cache.stats()['hits'] == 1
+    assert cache.stats()['misses'] == 1
+
+
+def test_music_parser_without_cache_parses_every_time():
+    """MusicParser without a cache keeps the original behaviour"""
+    data = _midi_bytes()
+    result = MusicParser().parse('song.mid', data=data)
+    assert result['note_count'] == 2
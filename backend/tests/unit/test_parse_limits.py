@@ -0,0 +1,84 @@
+"""
+Unit tests for ParseLimits
+Tests early rejection of scores over the note event and pitch caps
+"""
+
+import io
+import json
+from io import BytesIO
+
+import mido
+import pytest
+from app import create_app
+from app.services.midi_parser import MIDIParser
+from app.services.musicxml_parser import MusicXMLParser
+from app.services.parse_limits import ParseLimitExceeded, ParseLimits
+
+
+def _midi(pitches, tracks=1):
+    mid = mido.MidiFile(type=1, ticks_per_beat=480)
+    for _ in range(tracks):
+        track = mido.MidiTrack()
+        mid.tracks.append(track)
+        for p in pitches:
+            track.append(mido.Message('note_on', note=p, velocity=80, time=0))
+            track.append(mido.Message('note_off', note=p, time=120))
+    buf = BytesIO()
+    mid.save(file=buf)
+    return buf.getvalue()
+
+
+def _musicxml(pitch_count):
+    steps = ['C', 'D', 'E', 'F', 'G', 'A', 'B']
+    notes = ''.join(
+        f'<note><pitch><step>{steps[i % 7]}</step><octave>{2 + i // 7}</octave></pitch>'
+        f'<duration>1</duration></note>'
+        for i in range(pitch_count)
+    )
+    return (
+        '<?xml version="1.0"?><score-partwise><part-list><score-part id="P1"><part-name>P</part-name>'
+        '</score-part></part-list><part id="P1"><measure number="1"><attributes><divisions>1</divisions>'
+        f'</attributes>{notes}</measure></part></score-partwise>'
+    ).encode('utf-8')
+
+
+def test_midi_note_events_limit_counts_across_tracks():
+    data = _midi(range(60, 70), tracks=3)  # 30 notes
+
+    assert len(MIDIParser.parse(data, ParseLimits(max_note_events=30))['notes']) == 30
+    with pytest.raises(ParseLimitExceeded):
+        MIDIParser.parse(data, ParseLimits(max_note_events=29))
+
+
+def test_mido_fallback_enforces_the_same_limits():
+    data = _midi(range(60, 70), tracks=3)
+
+    decoded = MIDIParser._decode_with_mido(data, ParseLimits(max_note_events=30))
+    assert len(decoded['pitch']) == 30 and decoded['ticks_per_beat'] == 480
+    with pytest.raises(ParseLimitExceeded):
+        MIDIParser._decode_with_mido(data, ParseLimits(max_note_events=25))
+
+
+def test_unique_pitch_limit():
+    with pytest.raises(ParseLimitExceeded, match='10 distinct pitches'):
+        MIDIParser.parse(_midi(range(60, 70)), ParseLimits(max_unique_pitches=9))
+    with pytest.raises(ParseLimitExceeded):
+        MusicXMLParser.parse(_musicxml(12), ParseLimits(max_unique_pitches=11))
+    with pytest.raises(ParseLimitExceeded):
+        MusicXMLParser.parse(_musicxml(12), ParseLimits(max_note_events=11))
+    assert MusicXMLParser.parse(_musicxml(12), ParseLimits(12, 12))['total_note_events'] == 12
+
+
+def test_route_rejects_oversized_score_with_error_code():
+    app = create_app()
+    app.config['MAX_NOTE_EVENTS'] = 5
+    players = [{'name': 'A', 'experience': 'experienced'}]
+
+    response = app.test_client().post(
+        '/api/generate-arrangements',
+        data={'file': (io.BytesIO(_midi(range(60, 70))), 'big.mid'), 'players': json.dumps(players)},
+        content_type='multipart/form-data',
+    )
+
+    assert response.status_code == 413
+    assert response.json['code'] == 'ERR_SCORE_TOO_LARGE'
@@ -0,0 +1,110 @@
+"""
+Unit tests for ParseWorkerPool
+Tests parsing in worker processes, error propagation and deadline enforcement
+"""
+
+import time
+from io import BytesIO
+
+import mido
+import pytest
+from app.services.music_parser import MusicParser
+from app.services.parse_limits import ParseLimitExceeded, ParseLimits
+from app.services.parse_worker_pool import ParseTimeout, ParseWorkerPool
+from config import Config
+
+
+def _midi(note_count):
+    mid = mido.MidiFile(ticks_per_beat=480)
+    track = mido.MidiTrack()
+    mid.tracks.append(track)
+    for i in range(note_count):
+        pitch = 48 + i % 36
+        track.append(mido.Message('note_on', note=pitch, velocity=80, time=0))
+        track.append(mido.Message('note_off', note=pitch, time=60))
+    buf = BytesIO()
+    mid.save(file=buf)
+    return buf.getvalue()
+
+
+@pytest.fixture(scope='module')
+def pool():
+    pool = ParseWorkerPool(size=1, timeout=30)
+    pool.start()
+    yield pool
+    pool.shutdown()
+
+
+def test_worker_result_matches_in_process_parse(pool):
+    data = _midi(200)
+    expected = MusicParser().parse('song.mid', data=data)
+
+    result = MusicParser(pool=pool).parse('song.mid', data=data)
+
+    assert result['notes'] == expected['notes']
+    assert result['pitch_index'].bounds == expected['pitch_index'].bounds
+    assert {k: v for k, v in result.items() if k not in ('notes', 'pitch_index')} == {
+        k: v for k, v in expected.items() if k not in ('notes', 'pitch_index')
+    }
+
+
+def test_worker_errors_reach_the_caller(pool):
+    with pytest.raises(ParseLimitExceeded):
+        pool.parse('song.mid', _midi(50), limits=ParseLimits(max_note_events=10))
+    with pytest.raises(Exception, match='Error parsing MIDI file'):
+        pool.parse('broken.mid', b'not a midi file')
+    # The worker survives ordinary failures
+    assert len(pool.parse('song.mid', _midi(5))['notes']) == 5
+
+
+def test_deadline_replaces_the_worker(pool):
+    pid = pool._workers[0].process.pid
+    pool.timeout = 0.001
+    try:
+        with pytest.raises(ParseTimeout):
+            pool.parse('big.mid', _midi(20000))
+    finally:
+        pool.timeout = 30
+
+    assert pool.timeouts == 1 and pool.restarts == 1
+    assert pool._workers[0].process.pid != pid
+    assert len(pool.parse('song.mid', _midi(5))['notes']) == 5
+
+
+def test_request_deadline_caps_the_wait(pool):
+    """A request deadline shorter than the pool's timeout wins, both waiting for a worker and parsing"""
+    start = time.monotonic()
+    with pytest.raises(ParseTimeout):
+        pool.parse('big.mid', _midi(20000), deadline=start + 0.05)
+    held = pool._idle.get()
+    try:
+        with pytest.raises(ParseTimeout, match='No parse worker became free'):
+            pool.parse('song.mid', _midi(5), deadline=time.monotonic() + 0.2)
+    finally:
+        pool._idle.put(held)
+
+    assert time.monotonic() - start < 5
+    assert len(pool.parse('song.mid', _midi(5), deadline=time.monotonic() + 30)['notes']) == 5
+
+
+def test_second_upload_parses_while_a_worker_is_busy():
+    """By default there is more than one worker, so a file stuck in one does not hold up the next upload"""
+    assert Config.PARSE_WORKERS >= 2
+    pool = ParseWorkerPool(size=Config.PARSE_WORKERS, timeout=30)
+    pool.start()
+    try:
+        busy = pool._idle.get()  # as if mid-way through a pathological parse
+        start = time.monotonic()
+        assert len(pool.parse('song.mid', _midi(5))['notes']) == 5
+        assert time.monotonic() - start < 10
+        pool._idle.put(busy)
+    finally:
+        pool.shutdown()
+
+
+def test_run_module_builds_no_app_on_import():
+    """Spawned workers re-import run.py as __mp_main__; that must not create an app"""
+    import run
+
+    assert not hasattr(run, 'app')
+    assert callable(run.main)
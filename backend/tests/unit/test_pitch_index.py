@@ -0,0 +1,117 @@
+"""
+Unit tests for PitchIndex
+Tests the shared per-pitch note index built at parse time
+"""
+
+import heapq
+import pickle
+import random
+from operator import itemgetter
+
+from app.services.bell_assignment import BellAssignmentAlgorithm
+from app.services.note_table import NoteTable
+from app.services.pitch_index import PitchIndex
+
+
+def _random_music_data(seed, count=300):
+    rng = random.Random(seed)
+    notes = [
+        {'pitch': rng.choice([60, 62, 64, 65, 67, 72]), 'velocity': 80,
+         'time': rng.randrange(0, 480 * 64, 120), 'duration': rng.choice([120, 240, 480])}
+        for _ in range(count)
+    ]
+    return {'notes': notes, 'format': 'midi', 'tempo': 120, 'ticks_per_beat': 480}
+
+
+def test_groups_follow_time_order():
+    """Each pitch's slice lists that pitch's notes in score order"""
+    table = NoteTable.from_music_data(_random_music_data(1))
+    index = PitchIndex(table)
+
+    assert index.pitches == sorted(set(table.column('pitch')))
+    assert sum(index.count(p) for p in index.pitches) == len(table)
+    for p in index.pitches:
+        expected = [(n['start_ms'], n['end_ms'], p) for n in table if n['pitch'] == p]
+        assert index.events_ms(p) == expected
+        assert index.events_units(p) == [(n['time'], n['time'] + n['duration'], p)
+                                         for n in table if n['pitch'] == p]
+    assert index.events_ms(50) == [] and index.count(50) == 0 and index.count(300) == 0
+
+
+def test_note_indices_match_pitch_mask():
+    table = NoteTable.from_music_data(_random_music_data(2))
+    index = PitchIndex(table)
+
+    for pitches in ([60], [62, 67], [64, 65, 72, 99], []):
+        expected = [i for i, p in enumerate(table.column('pitch')) if p in pitches]
+        assert index.note_indices(pitches).tolist() == expected
+
+
+def test_for_music_data_reuses_parsed_index():
+    music_data = _random_music_data(3, count=20)
+    built = PitchIndex.for_music_data(music_data)
+    assert len(built) == 20
+
+    music_data['pitch_index'] = built
+    assert PitchIndex.for_music_data(music_data) is built
+
+    restored = pickle.loads(pickle.dumps(built))
+    assert restored.bounds == built.bounds and restored.events_ms(60) == built.events_ms(60)
+
+
+def test_assignment_is_the_same_with_or_without_shared_index():
+    """Passing the parsed index gives the same assignment as indexing note_timings"""
+    music_data = _random_music_data(4)
+    notes = ['C4', 'D4', 'E4', 'F4', 'G4', 'C5']
+    players = [{'name': f'P{i}', 'experience': 'intermediate'} for i in range(3)]
+    config = {'MIN_SWAP_GAP_MS': {'intermediate': 250}, 'TEMPO_BPM': 120, 'TICKS_PER_BEAT': 480}
+
+    for strategy in ('experienced_first', 'min_transitions', 'fatigue_snake'):
+        from_notes = BellAssignmentAlgorithm.assign_bells(
+            notes, players, strategy=strategy, config=config, note_timings=music_data['notes'])
+        shared = BellAssignmentAlgorithm.assign_bells(
+            notes, players, strategy=strategy, config=config,
+            pitch_index=PitchIndex.for_music_data(music_data))
+        assert shared == from_notes
+
+
+def _merged_gaps_ok(index, pitches, min_gap):
+    """Reference swap check: walk the merged timeline of every pitch on a hand"""
+    prev = None
+    for curr in heapq.merge(*(index.events_ms(p) for p in set(pitches)), key=itemgetter(0)):
+        if prev is not None and prev[2] != curr[2] and curr[0] - prev[1] < min_gap:
+            return False
+        prev = curr
+    return True
+
+
+def test_gap_matrix_matches_pairwise_merge():
+    """Each entry is the tightest transition of the two-pitch timeline, in score order"""
+    table = NoteTable.from_music_data(_random_music_data(4, count=120))
+    index = PitchIndex(table)
+    pitches, gaps = index.gap_matrix_ms()
+
+    for i, a in enumerate(pitches):
+        for j, b in enumerate(pitches):
+            merged = [(n['start_ms'], n['end_ms'], n['pitch']) for n in table if n['pitch'] in (a, b)]
+            transitions = [curr[0] - prev[1] for prev, curr in zip(merged, merged[1:])
+                           if prev[2] == a and curr[2] == b]
+            if a != b:
+                assert gaps[i, j] == min(transitions, default=float('inf'))
+    assert index.min_gap_ms(60, 50) == float('inf')
+
+
+def test_swap_gap_check_equals_merged_timeline_check():
+    """Pairwise matrix lookups agree with merging the whole hand's timeline"""
+    rng = random.Random(9)
+    config = {'min_gap_ms': {'experienced': 250, 'beginner': 700}}
+    for seed in range(5):
+        index = PitchIndex(NoteTable.from_music_data(_random_music_data(seed, count=80)))
+        for _ in range(200):
+            hand = rng.sample([60, 62, 64, 65, 67, 72], rng.randrange(1, 4))
+            bell = rng.choice([60, 62, 64, 65, 67, 72, 71])
+            experience = rng.choice(['experienced', 'beginner'])
+            expected = not index.count(bell) or _merged_gaps_ok(
+                index, hand + [bell], config['min_gap_ms'][experience])
+            assert BellAssignmentAlgorithm._check_swap_gap_for_hand(
+                hand, bell, index, config, experience) == expected
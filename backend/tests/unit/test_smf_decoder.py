@@ -0,0 +1,159 @@
+"""
+Unit tests for SMFDecoder
+Uses MIDIParser's mido decoding as the correctness oracle
+"""
+
+import random
+import struct
+from io import BytesIO
+
+import mido
+import pytest
+from app.services.midi_parser import MIDIParser
+from app.services.smf_decoder import SMFDecoder, UnsupportedSMF
+
+
+def _to_bytes(mid):
+    buf = BytesIO()
+    mid.save(file=buf)
+    return buf.getvalue()
+
+
+def _columns(decoded):
+    return {
+        'ticks_per_beat': decoded['ticks_per_beat'],
+        'tempo_changes': list(decoded['tempo_changes']),
+        'pitch': list(decoded['pitch']),
+        'velocity': list(decoded['velocity']),
+        'time': list(decoded['time']),
+        'duration': list(decoded['duration']),
+        'track': list(decoded['track']),
+    }
+
+
+def _assert_matches_mido(data):
+    expected = _columns(MIDIParser._decode_with_mido(data))
+    assert _columns(SMFDecoder.decode(data)) == expected
+    return expected
+
+
+def _random_midi(rng):
+    """Multi-track file mixing notes with CC, pitch bend, sysex and meta events"""
+    mid = mido.MidiFile(type=1, ticks_per_beat=rng.choice([96, 480, 960]))
+    for _ in range(rng.randint(1, 4)):
+        track = mido.MidiTrack()
+        mid.tracks.append(track)
+        for _ in range(rng.randint(0, 200)):
+            roll = rng.random()
+            delta = rng.choice([0, 0, 1, 60, 480, 20000])
+            channel = rng.randint(0, 15)
+            if roll < 0.3:
+                track.append(mido.Message('note_on', note=rng.randint(21, 108), velocity=rng.choice([0, 64, 127]),
+                                          channel=channel, time=delta))
+            elif roll < 0.45:
+                track.append(mido.Message('note_off', note=rng.randint(21, 108), channel=channel, time=delta))
+            elif roll < 0.7:
+                track.append(mido.Message('control_change', control=rng.randint(0, 127),
+                                          value=rng.randint(0, 127), channel=channel, time=delta))
+            elif roll < 0.8:
+                track.append(mido.Message('pitchwheel', pitch=rng.randint(-8192, 8191), channel=channel, time=delta))
+            elif roll < 0.85:
+                track.append(mido.Message('program_change', program=rng.randint(0, 127), channel=channel, time=delta))
+            elif roll < 0.9:
+                track.append(mido.Message('sysex', data=[rng.randint(0, 127) for _ in range(rng.randint(0, 40))],
+                                          time=delta))
+            elif roll < 0.95:
+                track.append(mido.MetaMessage('set_tempo', tempo=rng.randint(200000, 1500000), time=delta))
+            else:
+                track.append(mido.MetaMessage('text', text='x' * rng.randint(0, 200), time=delta))
+    return _to_bytes(mid)
+
+
+def test_matches_mido_on_random_files():
+    """Decoder output equals the mido oracle across varied event mixes"""
+    rng = random.Random(7)
+    for _ in range(60):
+        _assert_matches_mido(_random_midi(rng))
+
+
+def test_running_status_and_controller_skips():
+    """Running-status note events between dense controller data"""
+    mid = mido.MidiFile(ticks_per_beat=480)
+    track = mido.MidiTrack()
+    mid.tracks.append(track)
+    track.append(mido.MetaMessage('set_tempo', tempo=600000))
+    for i in range(20):
+        track.append(mido.Message('control_change', control=7, value=i, time=0))
+        track.append(mido.Message('note_on', note=60 + i, velocity=90, time=10))
+        track.append(mido.Message('note_on', note=60 + i, velocity=0, time=100))  # running status note off
+    data = _to_bytes(mid)
+
+    result = _assert_matches_mido(data)
+    assert result['pitch'] == list(range(60, 80))
+    assert result['duration'] == [100] * 20
+    assert result['tempo_changes'] == [(0, 600000)]
+
+
+def test_unmatched_note_on_gets_minimum_duration():
+    mid = mido.MidiFile()
+    track = mido.MidiTrack()
+    mid.tracks.append(track)
+    track.append(mido.Message('note_on', note=72, velocity=50, time=0))
+    track.append(mido.Message('note_on', note=60, velocity=70, time=10))
+    track.append(mido.Message('note_off', note=60, time=20))
+
+    result = _assert_matches_mido(_to_bytes(mid))
+    assert result['pitch'] == [72, 60]
+    assert result['duration'] == [1, 20]
+
+
+def test_tracks_are_merged_in_onset_order():
+    """Notes from every track come out sorted by onset, track order breaking ties"""
+    mid = mido.MidiFile(type=1, ticks_per_beat=480)
+    for notes in ([(0, 60, 960), (960, 62, 480)], [(0, 48, 480), (480, 50, 240)]):
+        track = mido.MidiTrack()
+        mid.tracks.append(track)
+        tick = 0
+        for start, pitch, duration in notes:
+            track.append(mido.Message('note_on', note=pitch, velocity=80, time=start - tick))
+            track.append(mido.Message('note_off', note=pitch, time=duration))
+            tick = start + duration
+
+    result = _assert_matches_mido(_to_bytes(mid))
+    assert result['pitch'] == [60, 48, 50, 62]
+    assert result['time'] == [0, 0, 480, 960]
+
+    parsed = MIDIParser.parse(_to_bytes(mid))
+    assert [n['time'] for n in parsed['notes']] == [0, 0, 480, 960]
+
+
+def test_smpte_division_is_unsupported():
+    """SMPTE timing is left to mido"""
+    data = bytearray(_random_midi(random.Random(1)))
+    struct.pack_into('>h', data, 12, -(25 << 8) | 40)
+    with pytest.raises(UnsupportedSMF):
+        SMFDecoder.decode(bytes(data))
+
+
+def test_truncated_file_is_unsupported():
+    data = _random_midi(random.Random(2))
+    with pytest.raises(UnsupportedSMF):
+        SMFDecoder.decode(data[:len(data) - 3])
+
+
+def test_parser_falls_back_to_mido(monkeypatch):
+    """MIDIParser still parses when the decoder declines"""
+    mid = mido.MidiFile()
+    track = mido.MidiTrack()
+    mid.tracks.append(track)
+    track.append(mido.Message('note_on', note=64, velocity=80, time=0))
+    track.append(mido.Message('note_off', note=64, time=480))
+    data = _to_bytes(mid)
+
+    def decline(data, limits=None, selection=None):
+        raise UnsupportedSMF('disabled for test')
+    monkeypatch.setattr('app.services.midi_parser.SMFDecoder.decode', staticmethod(decline))
+
+    result = MIDIParser.parse(data)
+    assert result['unique_notes'] == [64]
+    assert result['notes'][0]['duration'] == 480
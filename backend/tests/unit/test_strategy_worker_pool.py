@@ -0,0 +1,140 @@
+"""
+Unit tests for StrategyWorkerPool
+Tests running arrangement strategies in worker processes, error propagation and deadlines
+"""
+
+import io
+import json
+import random
+import threading
+import time
+
+import mido
+import pytest
+from app import create_app
+from app.services.arrangement_generator import ArrangementGenerator
+from app.services.parse_worker_pool import ParseWorkerPool
+from app.services.pitch_index import PitchIndex
+from app.services.strategy_worker_pool import StrategyTimeout, StrategyWorkerPool
+from config import Config
+
+PLAYERS = [{'name': 'A', 'experience': 'experienced'}, {'name': 'B', 'experience': 'intermediate'},
+           {'name': 'C', 'experience': 'beginner'}]
+
+
+def _music_data(note_count, seed=0):
+    rng = random.Random(seed)
+    notes = [{'pitch': rng.choice(range(55, 80)), 'time': i * 240, 'duration': 240} for i in range(note_count)]
+    return {
+        'notes': notes,
+        'unique_notes': sorted({n['pitch'] for n in notes}),
+        'format': 'midi', 'tempo': 120, 'ticks_per_beat': 480,
+    }
+
+
+def _context(music_data):
+    pitch_index = PitchIndex.for_music_data(music_data)
+    return {
+        'music_data': music_data,
+        'players': PLAYERS,
+        'expanded_players': PLAYERS,
+        'unique_notes': music_data['unique_notes'],
+        'melody_notes': [],
+        'config': {'MAX_BELLS_PER_EXPERIENCE': Config.MAX_BELLS_PER_EXPERIENCE,
+                   'MIN_SWAP_GAP_MS': Config.MIN_SWAP_GAP_MS},
+        'pitch_index': pitch_index,
+        'note_frequencies': ArrangementGenerator._note_frequencies(pitch_index),
+    }
+
+
+@pytest.fixture(scope='module')
+def pool():
+    pool = StrategyWorkerPool(size=2, timeout=30)
+    pool.start()
+    yield pool
+    pool.shutdown()
+
+
+def test_pool_output_matches_serial_generate(pool):
+    """With the default config, anneal pass included, pooled and serial output are identical"""
+    app = create_app()
+    music_data = _music_data(300)
+
+    with app.app_context():
+        expected = ArrangementGenerator().generate(music_data, PLAYERS)
+        result = ArrangementGenerator(pool=pool).generate(music_data, PLAYERS)
+
+    assert result == expected
+    assert len(result['arrangements']) == 6
+    assert 'anneal' in [a['strategy'] for a in result['arrangements']]
+
+
+def test_strategy_errors_reach_the_caller(pool):
+    jobs = [('no_such_strategy', 'Broken'), ('balanced', 'Evenly distribute melody notes')]
+
+    results = pool.run(_context(_music_data(40)), jobs)
+
+    assert results[0][0] == 'error' and 'Unknown strategy' in str(results[0][1])
+    assert results[1][0] == 'ok' and results[1][1]['strategy'] == 'balanced'
+
+
+def test_deadline_replaces_the_workers(pool):
+    pids = {worker.process.pid for worker in pool._workers}
+    pool.timeout = 0.001
+    try:
+        with pytest.raises(StrategyTimeout):
+            pool.run(_context(_music_data(20000)), [('balanced', 'x'), ('min_transitions', 'y')])
+    finally:
+        pool.timeout = 30
+
+    assert pool.timeouts == 1 and pool.restarts == 2
+    assert not pids & {worker.process.pid for worker in pool._workers}
+    assert pool.run(_context(_music_data(40)), [('balanced', 'x')])[0][0] == 'ok'
+
+
+def test_serial_generate_stops_at_the_deadline():
+    """Without a pool the deadline is checked between strategies"""
+    app = create_app()
+
+    with app.app_context():
+        with pytest.raises(StrategyTimeout):
+            ArrangementGenerator().generate(_music_data(40), PLAYERS, deadline=time.monotonic())
+
+
+def test_request_deadline_covers_parse_and_strategies(pool):
+    """A slow parse leaves the strategies only the rest of REQUEST_TIMEOUT, so the request fails on time"""
+    rng = random.Random(1)
+    mid = mido.MidiFile(ticks_per_beat=480)
+    track = mido.MidiTrack()
+    mid.tracks.append(track)
+    for _ in range(60000):  # strategies take well over a second on this
+        pitch = rng.choice(range(55, 80))
+        track.append(mido.Message('note_on', note=pitch, velocity=80, time=0))
+        track.append(mido.Message('note_off', note=pitch, time=120))
+    buf = io.BytesIO()
+    mid.save(file=buf)
+    players = [{'name': f'P{i}', 'experience': e}
+               for i, e in enumerate(['experienced', 'intermediate', 'intermediate', 'beginner'] * 2)]
+
+    parse_pool = ParseWorkerPool(size=1, timeout=30)
+    parse_pool.start()
+    app = create_app()
+    app.config['REQUEST_TIMEOUT'] = 2
+    app.extensions.update(parse_pool=parse_pool, strategy_pool=pool)
+    # Another upload holds the only parse worker for the first second of the request
+    release = threading.Timer(1.0, parse_pool._idle.put, [parse_pool._idle.get()])
+    try:
+        release.start()
+        start = time.monotonic()
+        response = app.test_client().post(
+            '/api/generate-arrangements',
+            data={'file': (io.BytesIO(buf.getvalue()), 'song.mid'), 'players': json.dumps(players)},
+            content_type='multipart/form-data',
+        )
+        elapsed = time.monotonic() - start
+    finally:
+        release.cancel()
+        parse_pool.shutdown()
+
+    assert response.status_code == 504 and response.json['code'] == 'ERR_GENERATION_TIMEOUT'
+    assert elapsed < 2 + 1  # the pools' own 30 s timeouts would each have allowed far longer
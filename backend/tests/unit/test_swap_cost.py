@@ -222,6 +222,34 @@ def test_calculate_pair_swap_cost_indexed():
     print("✓ test_calculate_pair_swap_cost_indexed passed")
 
 
+def test_pair_swap_cost_matrices_match_pairwise_merge():
+    """All-pairs matrices give the pairwise numbers, including equal-start ties."""
+    from app.services.note_table import NoteTable
+    from app.services.pitch_index import PitchIndex
+
+    notes = [
+        {'pitch': 60, 'time': 0, 'duration': 100},
+        {'pitch': 62, 'time': 0, 'duration': 50},      # same start as the 60
+        {'pitch': 64, 'time': 150, 'duration': 100},
+        {'pitch': 62, 'time': 200, 'duration': 100},
+        {'pitch': 60, 'time': 400, 'duration': 100},
+        {'pitch': 64, 'time': 450, 'duration': 100},
+        {'pitch': 62, 'time': 700, 'duration': 100},
+    ]
+    index = PitchIndex(NoteTable.from_music_data({'notes': notes, 'format': 'midi'}))
+    events = {p: index.events_units(p) for p in index.pitches}
+
+    for pitches in ([60, 62, 64, 99], [64, 62, 60, 99]):
+        transitions, avg_gap = SwapCostCalculator.pair_swap_cost_matrices(index, pitches)
+        for i, a in enumerate(pitches):
+            for j in range(i + 1, len(pitches)):
+                expected = SwapCostCalculator.calculate_pair_swap_cost_indexed(a, pitches[j], events)
+                assert transitions[i, j] == transitions[j, i] == expected['transitions']
+                assert avg_gap[i, j] == avg_gap[j, i] == expected['avg_gap']
+
+    print("✓ test_pair_swap_cost_matrices_match_pairwise_merge passed")
+
+
 def run_all_tests():
     """Run all tests"""
     print("\n" + "=" * 60)
@@ -237,6 +265,7 @@ def run_all_tests():
     test_score_bell_at_capacity()
     test_calculate_pair_swap_cost()
     test_calculate_pair_swap_cost_indexed()
+    test_pair_swap_cost_matrices_match_pairwise_merge()
     
     print("\n" + "=" * 60)
     print("✅ All swap cost tests passed!")
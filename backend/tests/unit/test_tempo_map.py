@@ -0,0 +1,130 @@
+"""
+Unit tests for TempoMap
+Tests tick/quarter-length to millisecond conversion across tempo changes
+"""
+
+from io import BytesIO
+
+import mido
+from app.services.note_table import NoteTable
+from app.services.tempo_map import TempoMap
+from app.services.midi_parser import MIDIParser
+from app.services.musicxml_parser import MusicXMLParser
+from app.services.simulation_builder import SimulationBuilder
+
+
+def _midi_bytes(track_messages):
+    mid = mido.MidiFile(ticks_per_beat=480)
+    track = mido.MidiTrack(track_messages)
+    mid.tracks.append(track)
+    buf = BytesIO()
+    mid.save(file=buf)
+    return buf.getvalue()
+
+
+def test_single_tempo_matches_direct_conversion():
+    """One tempo: same values as ticks / ticks_per_beat * ms_per_beat"""
+    tempo_map = TempoMap(units_per_beat=480, initial_bpm=96)
+    notes = NoteTable.from_columns(pitch=[60, 60, 60], time=[0, 123, 960], duration=[480, 77, 1])
+    notes.annotate(tempo_map)
+
+    for n in notes:
+        start = n['time'] / 480 * (60000.0 / 96)
+        assert n['start_ms'] == start
+        assert n['end_ms'] == start + n['duration'] / 480 * (60000.0 / 96)
+
+
+def test_tempo_change_is_piecewise():
+    """120 BPM for two beats, then 60 BPM"""
+    tempo_map = TempoMap([(0, 120), (960, 60)], units_per_beat=480)
+    start_ms, _ = tempo_map.convert([480, 960, 1440], [0, 0, 0])
+
+    assert start_ms.tolist() == [500.0, 1000.0, 2000.0]
+    assert tempo_map.bpm_at(1000) == 60.0
+
+
+def test_note_spanning_tempo_change():
+    """A note crossing a change uses both tempos"""
+    tempo_map = TempoMap([(960, 60)], units_per_beat=480, initial_bpm=120)
+    notes = NoteTable.from_columns(pitch=[60], time=[480], duration=[960]).annotate(tempo_map)
+
+    assert notes[0]['start_ms'] == 500.0
+    assert notes[0]['end_ms'] == 2000.0  # one beat at 120 BPM + one beat at 60 BPM
+
+
+def test_midi_parser_uses_every_set_tempo():
+    """Notes after a tempo change are timed at the new tempo"""
+    data = _midi_bytes([
+        mido.MetaMessage('set_tempo', tempo=500000, time=0),     # 120 BPM
+        mido.Message('note_on', note=60, velocity=64, time=0),
+        mido.Message('note_off', note=60, velocity=0, time=480),
+        mido.MetaMessage('set_tempo', tempo=1000000, time=0),    # 60 BPM
+        mido.Message('note_on', note=62, velocity=64, time=0),
+        mido.Message('note_off', note=62, velocity=0, time=480),
+    ])
+    result = MIDIParser.parse(data)
+
+    by_pitch = {n['pitch']: n for n in result['notes']}
+    assert (by_pitch[60]['start_ms'], by_pitch[60]['end_ms']) == (0.0, 500.0)
+    assert (by_pitch[62]['start_ms'], by_pitch[62]['end_ms']) == (500.0, 1500.0)
+    assert result['tempo'] == 120
+    assert result['tempo_map'] == [[0.0, 120.0], [480.0, 60.0]]
+
+
+def test_musicxml_metronome_changes():
+    """A second metronome mark changes the tempo from its offset"""
+    def metronome(bpm):
+        return (
+            '<direction><direction-type><metronome><beat-unit>quarter</beat-unit>'
+            f'<per-minute>{bpm}</per-minute></metronome></direction-type></direction>'
+        )
+    note = '<note><pitch><step>C</step><octave>4</octave></pitch><duration>4</duration></note>'
+    xml = (
+        '<?xml version="1.0"?><score-partwise><part-list><score-part id="P1"><part-name>P</part-name>'
+        '</score-part></part-list><part id="P1">'
+        '<measure number="1"><attributes><divisions>1</divisions><time><beats>4</beats>'
+        f'<beat-type>4</beat-type></time></attributes>{metronome(120)}{note}</measure>'
+        f'<measure number="2">{metronome(60)}{note}</measure>'
+        '</part></score-partwise>'
+    ).encode('utf-8')
+    result = MusicXMLParser.parse(xml)
+
+    assert [(n['start_ms'], n['end_ms']) for n in result['notes']] == [(0.0, 2000.0), (2000.0, 6000.0)]
+
+
+def test_hand_built_music_data_gets_ms_columns():
+    """Services accept music_data without precomputed times; the tempo map fills them"""
+    music_data = {
+        'notes': [{'pitch': 60, 'time': 960, 'duration': 480}],
+        'format': 'midi', 'tempo': 120, 'ticks_per_beat': 480,
+    }
+    notes = NoteTable.from_music_data(music_data)
+    assert notes[0]['start_ms'] == 1000.0
+    assert notes[0]['end_ms'] == 1500.0
+
+
+def test_ensure_time_order_sorts_hand_built_notes():
+    """Out-of-order notes are stable-sorted by position; ordered lists are left alone"""
+    notes = [{'pitch': 64, 'time': 480}, {'pitch': 60, 'time': 0}, {'pitch': 62, 'time': 480}]
+    TempoMap.ensure_time_order(notes)
+    assert [n['pitch'] for n in notes] == [60, 64, 62]
+
+    ordered = [{'pitch': 60, 'offset': 0.0}, {'pitch': 62, 'offset': 1.0}]
+    first = ordered[0]
+    TempoMap.ensure_time_order(ordered)
+    assert ordered[0] is first
+
+
+def test_simulation_uses_tempo_map_columns():
+    """SimulationBuilder reads start_ms/end_ms rather than a single tempo"""
+    music_data = {
+        'notes': [{'pitch': 60, 'time': 960, 'duration': 480, 'start_ms': 1000.0, 'end_ms': 2000.0}],
+        'format': 'midi', 'tempo': 120, 'ticks_per_beat': 480,
+    }
+    arrangement = {'Player 1': {'bells': ['C4'], 'left_hand': ['C4'], 'right_hand': []}}
+    result = SimulationBuilder.build(music_data, arrangement)
+
+    ring = [e for e in result['players'][0]['events'] if e['type'] == 'ring'][0]
+    assert ring['time_ms'] == 1000
+    assert ring['duration_ms'] == 1000
+    assert result['duration_ms'] == 2000
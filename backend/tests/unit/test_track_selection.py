@@ -0,0 +1,91 @@
+"""
+Unit tests for TrackSelection
+Tests track/channel filtering during MIDI decoding and its form fields
+"""
+
+import random
+
+import mido
+import pytest
+from werkzeug.datastructures import MultiDict
+from app.services.midi_parser import MIDIParser
+from app.services.music_parser import MusicParser
+from app.services.parse_cache import ParseCache
+from app.services.smf_decoder import SMFDecoder
+from app.services.track_selection import ALL_NOTES, DEFAULT_SELECTION, TrackSelection
+
+from tests.unit.test_smf_decoder import _columns, _random_midi, _to_bytes
+
+
+def _band():
+    """Track 0: melody on channel 1; track 1: bass on channel 2 and drums on channel 10"""
+    mid = mido.MidiFile(type=1, ticks_per_beat=480)
+    for events in ([(0, 72), (0, 74)], [(1, 36), (9, 38), (1, 40), (9, 42)]):
+        track = mido.MidiTrack()
+        mid.tracks.append(track)
+        for channel, pitch in events:
+            track.append(mido.Message('note_on', channel=channel, note=pitch, velocity=80, time=0))
+            track.append(mido.Message('note_off', channel=channel, note=pitch, time=240))
+    return _to_bytes(mid)
+
+
+def test_decoders_agree_on_filtered_notes():
+    """Both decoders skip deselected events before pairing notes"""
+    rng = random.Random(11)
+    selections = [DEFAULT_SELECTION, TrackSelection(tracks=[0, 2], channels=[0, 3, 9]),
+                  TrackSelection(exclude_tracks=[1], exclude_channels=[5])]
+    for _ in range(20):
+        data = _random_midi(rng)
+        for selection in selections:
+            assert (_columns(SMFDecoder.decode(data, selection=selection))
+                    == _columns(MIDIParser._decode_with_mido(data, selection=selection)))
+
+
+def test_percussion_dropped_by_default():
+    data = _band()
+
+    assert sorted(MIDIParser.parse(data)['unique_notes']) == [36, 40, 72, 74]
+    assert sorted(MIDIParser.parse(data, selection=ALL_NOTES)['unique_notes']) == [36, 38, 40, 42, 72, 74]
+    melody_only = MIDIParser.parse(data, selection=TrackSelection(tracks=[0]))
+    assert sorted(melody_only['unique_notes']) == [72, 74]
+    with pytest.raises(Exception, match='selected MIDI tracks'):
+        MIDIParser.parse(data, selection=TrackSelection(channels=[4]))
+
+
+def test_form_fields_and_cache_key():
+    """Channels are 1-based on the form; the selection is part of the cache key"""
+    selection = TrackSelection.from_form(MultiDict({'exclude_tracks': '1', 'channels': '1,10'}))
+    assert selection.channel_allowed[0] and selection.channel_allowed[9]
+    assert not selection.channel_allowed[1]
+    assert not selection.track_allowed(1)
+
+    assert TrackSelection.from_form(MultiDict()) == DEFAULT_SELECTION
+    assert TrackSelection.from_form(MultiDict({'include_percussion': 'true'})) == ALL_NOTES
+    with pytest.raises(ValueError):
+        TrackSelection.from_form(MultiDict({'channels': '17'}))
+
+    data = _band()
+    default_key = MusicParser().cache_key('band.mid', data)
+    assert default_key == ParseCache.make_key(data, 'midi')
+    assert MusicParser(selection=selection).cache_key('band.mid', data) != default_key
+    assert MusicParser(selection=selection).cache_key('band.musicxml', data) == ParseCache.make_key(data, 'musicxml')
+
+
+def test_merge_doublings_reports_reduction():
+    """A melody doubled on a second track collapses when merge_doublings is set"""
+    mid = mido.MidiFile(type=1, ticks_per_beat=480)
+    for channel in (0, 1):
+        track = mido.MidiTrack()
+        mid.tracks.append(track)
+        for pitch in (60, 62, 64, 65):
+            track.append(mido.Message('note_on', channel=channel, note=pitch, velocity=80, time=0))
+            track.append(mido.Message('note_off', channel=channel, note=pitch, time=480))
+    data = _to_bytes(mid)
+
+    selection = TrackSelection.from_form(MultiDict({'merge_doublings': 'true'}))
+    merged = MIDIParser.parse(data, selection=selection)
+
+    assert 'doublings' not in MIDIParser.parse(data)
+    assert merged['total_note_events'] == 4
+    assert merged['doublings'] == {'events_before': 8, 'events_after': 4, 'reduction_ratio': 0.5}
+    assert selection.key().endswith('-md') and selection != DEFAULT_SELECTION
@@ -22,9 +22,12 @@ const isDev = process.env.NODE_ENV === 'development';
 const BACKEND_PORT = 5000;
 const BACKEND_URL = `http://localhost:${BACKEND_PORT}`;
 const FRONTEND_PORT = 3001; // Use different port from backend
-const HEALTH_CHECK_DELAY_MS = 2000;
-const HEALTH_CHECK_INTERVAL_MS = 1000;
-const MAX_HEALTH_CHECK_ATTEMPTS = 30;
+// Backend imports only Flask and mido at startup (music21 loads on first use),
+// so poll early and often; `python run.py --profile-startup` shows the budget
+const HEALTH_CHECK_DELAY_MS = 200;
+const HEALTH_CHECK_INTERVAL_MS = 250;
+const HEALTH_CHECK_TIMEOUT_MS = 30000;
+const MAX_HEALTH_CHECK_ATTEMPTS = Math.ceil(HEALTH_CHECK_TIMEOUT_MS / HEALTH_CHECK_INTERVAL_MS);
 
 // Validate file path is not a system directory
 function isValidFilePath(filePath) {
@@ -52,13 +55,21 @@ function startBackend() {
     
     // Capture stderr output for error reporting
     let stderrOutput = '';
+    const spawnedAt = Date.now();
+    
+    // Persist parsed scores across launches in the per-user data directory
+    const backendEnv = {
+      ...process.env,
+      FLASK_ENV: 'production',
+      PARSE_CACHE_DIR: path.join(app.getPath('userData'), 'parse-cache')
+    };
     
     if (!app.isPackaged) {
       // Unpackaged (dev or direct electron launch): Use Python from system
       const backendPath = path.join(__dirname, '..', 'backend');
       pythonProcess = spawn('python', ['run.py'], {
         cwd: backendPath,
-        env: { ...process.env, FLASK_ENV: 'production' }
+        env: backendEnv
       });
     } else {
       // Production: Use bundled Python executable
@@ -87,7 +98,7 @@ function startBackend() {
       
       log.info(`Using bundled Python backend: ${pythonExe}`);
       pythonProcess = spawn(pythonExe, [], {
-        env: { ...process.env, FLASK_ENV: 'production' }
+        env: backendEnv
       });
     }
     
@@ -140,7 +151,7 @@ function startBackend() {
       try {
         const response = await fetch(`${BACKEND_URL}/api/health`);
         if (response.ok) {
-          log.info('Backend is ready!');
+          log.info(`Backend is ready! (${Date.now() - spawnedAt} ms after spawn)`);
           resolve();
         } else {
           lastError = `Backend responded with status ${response.status}`;
@@ -149,7 +160,7 @@ function startBackend() {
       } catch (error) {
         lastError = error.message;
         attempts++;
-        log.info(`Health check attempt ${attempts}/${MAX_HEALTH_CHECK_ATTEMPTS} failed: ${error.message}`);
+        log.debug(`Health check attempt ${attempts}/${MAX_HEALTH_CHECK_ATTEMPTS} failed: ${error.message}`);
         
         if (attempts >= MAX_HEALTH_CHECK_ATTEMPTS) {
           // Kill process before rejecting to prevent resource leak
@@ -159,7 +170,7 @@ function startBackend() {
           }
           
           // Include stderr output in final error message
-          let errorMessage = `Backend failed to start after ${MAX_HEALTH_CHECK_ATTEMPTS} seconds.\n\nLast error: ${lastError}`;
+          let errorMessage = `Backend failed to start after ${HEALTH_CHECK_TIMEOUT_MS / 1000} seconds.\n\nLast error: ${lastError}`;
           if (stderrOutput) {
             errorMessage += `\n\nBackend stderr output:\n${stderrOutput}`;
           }
@@ -499,9 +510,9 @@ ipcMain.handle('dialog:openFile', async () => {
   const result = await dialog.showOpenDialog(mainWindow, {
     properties: ['openFile'],
     filters: [
-      { name: 'Music Files', extensions: ['mid', 'midi', 'musicxml', 'xml'] },
+      { name: 'Music Files', extensions: ['mid', 'midi', 'musicxml', 'xml', 'mxl'] },
       { name: 'MIDI Files', extensions: ['mid', 'midi'] },
-      { name: 'MusicXML Files', extensions: ['musicxml', 'xml'] }
+      { name: 'MusicXML Files', extensions: ['musicxml', 'xml', 'mxl'] }
     ]
   });
   
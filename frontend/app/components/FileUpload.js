@@ -8,7 +8,7 @@ export default function FileUpload({ onFileUpload }) {
     const file = event.target.files[0];
     if (file) {
       const validTypes = ['audio/midi', 'application/vnd.recordare.musicxml', 'application/vnd.recordare.musicxml+xml', 'text/xml'];
-      if (validTypes.includes(file.type) || file.name.endsWith('.mid') || file.name.endsWith('.musicxml') || file.name.endsWith('.xml')) {
+      if (validTypes.includes(file.type) || file.name.endsWith('.mid') || file.name.endsWith('.musicxml') || file.name.endsWith('.xml') || file.name.endsWith('.mxl')) {
         onFileUpload(file);
       } else {
         alert('Please upload a MIDI or MusicXML file');
@@ -20,7 +20,7 @@ export default function FileUpload({ onFileUpload }) {
     <div className="file-upload">
       <input 
         type="file" 
-        accept=".mid,.midi,.musicxml,.xml"
+        accept=".mid,.midi,.musicxml,.xml,.mxl"
         onChange={handleFileChange}
         className="file-input-browser"
         id="file-input"
@@ -28,7 +28,7 @@ export default function FileUpload({ onFileUpload }) {
       <label htmlFor="file-input" className="file-input-label">
         Choose File
       </label>
-      <p className="file-help">Supported formats: MIDI (.mid, .midi), MusicXML (.xml, .musicxml)</p>
+      <p className="file-help">Supported formats: MIDI (.mid, .midi), MusicXML (.xml, .musicxml, .mxl)</p>
     </div>
   );
 }
@@ -57,6 +57,8 @@ export default function Home() {
         let mimeType = 'audio/midi';
         if (fileExt === 'xml' || fileExt === 'musicxml') {
           mimeType = 'application/vnd.recordare.musicxml+xml';
+        } else if (fileExt === 'mxl') {
+          mimeType = 'application/vnd.recordare.musicxml';
         }
         
         const blob = new Blob([new Uint8Array(result.data)], { type: mimeType });
@@ -185,7 +187,7 @@ export default function Home() {
                 >
                   Choose File
                 </button>
-                <p className="file-help">Supported formats: MIDI (.mid, .midi), MusicXML (.xml, .musicxml)</p>
+                <p className="file-help">Supported formats: MIDI (.mid, .midi), MusicXML (.xml, .musicxml, .mxl)</p>
               </>
             )}
             {!isElectron() && <FileUpload onFileUpload={handleFileUpload} />}